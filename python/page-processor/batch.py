@@ -0,0 +1,309 @@
+"""
+Batch Processing
+
+Runs PageProcessor.process over many pages using a pool of worker processes.
+
+Each worker builds its PageProcessor once and then handles pages one at a time,
+so per-page cost is pure pixel work. Results are reported through a callback as
+pages complete, either in completion order or in input order. A page whose
+worker process dies (crash, out of memory) is reported as failed and the batch
+carries on with a fresh pool.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Optional
+
+
+@dataclass
+class BatchItem:
+    """One page to process."""
+    index: int
+    input_path: str
+    output_dir: str
+
+
+def load_manifest(manifest_path: str, default_output_dir: Optional[str] = None) -> list[BatchItem]:
+    """
+    Load batch items from an NDJSON manifest.
+
+    Each non-empty line is either a JSON string (input path) or an object
+    `{"input": <path>, "output_dir": <dir>}`; `output_dir` falls back to the
+    default output directory.
+
+    Args:
+        manifest_path: Path to NDJSON manifest
+        default_output_dir: Output directory for lines that do not specify one
+
+    Returns:
+        List of batch items in manifest order
+
+    Raises:
+        ValueError: If a line is malformed or lacks an output directory
+    """
+    items: list[BatchItem] = []
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid manifest line {line_no}: {e}") from e
+
+            if isinstance(entry, str):
+                entry = {"input": entry}
+            if not isinstance(entry, dict) or not entry.get("input"):
+                raise ValueError(f"Manifest line {line_no} needs an 'input' path")
+
+            output_dir = entry.get("output_dir") or default_output_dir
+            if not output_dir:
+                raise ValueError(f"Manifest line {line_no} has no output_dir and no default was given")
+
+            items.append(BatchItem(
+                index=len(items),
+                input_path=str(entry["input"]),
+                output_dir=str(output_dir),
+            ))
+    return items
+
+
+def items_from_inputs(inputs: list[str], output_dir: str) -> list[BatchItem]:
+    """Build batch items for plain input paths (a directory expands to its images)."""
+    image_exts = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.webp'}
+    paths: list[str] = []
+    for inp in inputs:
+        p = Path(inp)
+        if p.is_dir():
+            paths.extend(
+                str(c) for c in sorted(p.iterdir())
+                if c.is_file() and c.suffix.lower() in image_exts
+            )
+        else:
+            paths.append(str(p))
+    return [BatchItem(index=i, input_path=p, output_dir=output_dir) for i, p in enumerate(paths)]
+
+
+# Per-worker state (set by _init_worker in each worker process).
+_worker_processor = None
+_worker_operations: list[str] = []
+
+
+def _init_worker(options: dict, operations: list[str], single_threaded: bool = True):
+    global _worker_processor, _worker_operations
+
+    import cv2  # type: ignore
+    from processor import PageProcessor
+
+    # N processes x M OpenCV threads oversubscribes the cores; parallelism comes from the pool.
+    if single_threaded:
+        cv2.setNumThreads(1)
+
+    _worker_processor = PageProcessor(
+        min_skew_angle=options.get('min_skew_angle', 0.5),
+        min_curvature=options.get('min_curvature', 0.1),
+        crop_padding=options.get('crop_padding', 30),
+        auto_detect=options.get('auto_detect', True),
+        force_split=options.get('force_split', False),
+    )
+    if options.get('document'):
+        # Each worker learns the book's layout from the pages it sees.
+        from document import DocumentProcessor
+        _worker_processor = DocumentProcessor(_worker_processor)
+    _worker_operations = list(operations)
+
+
+def _submit_item(item: BatchItem) -> tuple[float, object]:
+    """Process a page; returns (start time, PendingPage or error result)."""
+    t0 = time.monotonic()
+    try:
+        os.makedirs(item.output_dir, exist_ok=True)
+        return t0, _worker_processor.submit(
+            input_path=item.input_path,
+            output_dir=item.output_dir,
+            operations=_worker_operations,
+        )
+    except Exception as e:
+        return t0, {
+            "success": False,
+            "input_path": item.input_path,
+            "error": str(e),
+        }
+
+
+def _finish_item(item: BatchItem, submitted: tuple[float, object]) -> dict:
+    """Wait for a submitted page's outputs and return its result."""
+    t0, pending = submitted
+    result = pending if isinstance(pending, dict) else pending.wait()
+    result["index"] = item.index
+    result["worker_ms"] = int((time.monotonic() - t0) * 1000)
+    return result
+
+
+def _process_item(item: BatchItem) -> dict:
+    return _finish_item(item, _submit_item(item))
+
+
+def _failed_item(item: BatchItem, error: str) -> dict:
+    """Result for a page whose worker failed before it could report."""
+    return {
+        "success": False,
+        "input_path": item.input_path,
+        "error": error,
+        "index": item.index,
+    }
+
+
+def run_batch(
+    items: list[BatchItem],
+    operations: list[str],
+    options: dict,
+    jobs: Optional[int] = None,
+    ordered: bool = True,
+    max_in_flight: Optional[int] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Process many pages in parallel.
+
+    Args:
+        items: Pages to process
+        operations: Operations passed to PageProcessor.process
+        options: PageProcessor options (same keys as the `process` command, plus
+                 `document` to carry layout priors between pages)
+        jobs: Number of worker processes (default: CPU count)
+        ordered: Report results in input order instead of completion order
+        max_in_flight: Cap on pages submitted but not yet reported (default: 2 x jobs)
+        on_result: Called with each page result as it is reported
+
+    Returns:
+        Summary dictionary with counts and timings
+    """
+    start = time.monotonic()
+    jobs = max(1, int(jobs or os.cpu_count() or 1))
+    jobs = min(jobs, max(1, len(items)))
+    max_in_flight = max(jobs, int(max_in_flight or jobs * 2))
+
+    succeeded = 0
+    failed = 0
+
+    def report(result: dict):
+        nonlocal succeeded, failed
+        if result.get("success"):
+            succeeded += 1
+        else:
+            failed += 1
+        if on_result:
+            on_result(result)
+
+    if jobs == 1:
+        # No pool: avoid worker start-up cost and keep OpenCV's own threading.
+        # Page N is reported once page N+1 has been processed, so N's PNG encode
+        # (on the writer threads) overlaps with N+1's decode and detection.
+        _init_worker(options, operations, single_threaded=False)
+        previous = None
+        for item in items:
+            submitted = _submit_item(item)
+            if previous is not None:
+                report(_finish_item(*previous))
+            previous = (item, submitted)
+        if previous is not None:
+            report(_finish_item(*previous))
+    else:
+        pending: dict[Future, BatchItem] = {}
+        completed: dict[int, dict] = {}
+        next_to_report = 0
+        queue = iter(items)
+        exhausted = False
+        # Pages in flight when a worker died (segfault, OOM kill). They are retried one
+        # at a time on a fresh pool, so the page that kills its worker only fails itself.
+        retry: deque[BatchItem] = deque()
+        crashed: set[int] = set()
+
+        def new_pool() -> ProcessPoolExecutor:
+            return ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(options, operations),
+            )
+
+        def deliver(result: dict):
+            nonlocal next_to_report
+            if not ordered:
+                report(result)
+                return
+            completed[result["index"]] = result
+            while next_to_report in completed:
+                report(completed.pop(next_to_report))
+                next_to_report += 1
+
+        def collect(fut: Future) -> bool:
+            """Deliver a finished page; returns False when its worker pool broke."""
+            item = pending.pop(fut)
+            try:
+                result = fut.result()
+            except BrokenProcessPool as e:
+                if item.index not in crashed:
+                    crashed.add(item.index)
+                    retry.append(item)
+                    return False
+                result = _failed_item(item, f"Worker process died: {e}")
+                deliver(result)
+                return False
+            except Exception as e:
+                result = _failed_item(item, str(e))
+            deliver(result)
+            return True
+
+        pool = new_pool()
+        try:
+            while True:
+                if retry:
+                    if not pending:
+                        item = retry.popleft()
+                        pending[pool.submit(_process_item, item)] = item
+                else:
+                    # Unreported work (running + buffered for ordering) stays bounded.
+                    while not exhausted and len(pending) + len(completed) < max_in_flight:
+                        item = next(queue, None)
+                        if item is None:
+                            exhausted = True
+                            break
+                        pending[pool.submit(_process_item, item)] = item
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                intact = True
+                for fut in done:
+                    intact = collect(fut) and intact
+                if not intact:
+                    # Every other page on the broken pool fails too: collect them, start over.
+                    for fut in wait(list(pending)).done:
+                        collect(fut)
+                    pool.shutdown(wait=True)
+                    pool = new_pool()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return {
+        "success": failed == 0,
+        "pages": len(items),
+        "succeeded": succeeded,
+        "failed": failed,
+        "jobs": jobs,
+        "ordered": ordered,
+        "timings_ms": {
+            "total": int((time.monotonic() - start) * 1000),
+        },
+    }
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Accuracy-plus-speed regression gate for the layout detectors.
+
+Runs `detect_facing_pages`, `find_gutter_position` and `detect_skew_angle` on
+the synthetic corpus (see synthetic_pages.py), whose pages have known facing
+layout, gutter position and skew, and records error metrics and timings.
+Pages go through PNG encode/decode and `load_native`, as in production.
+
+Compared with a stored baseline JSON, the gate exits non-zero when accuracy
+drops beyond a tolerance or when a detector's total latency grows beyond a
+threshold. Latency is only compared when the baseline was recorded on the
+same kind of host (platform, machine and CPU count), unless forced.
+
+Usage:
+    python benchmarks/accuracy_gate.py [--baseline FILE] [--write-baseline]
+        [--dpi 150 300] [--seeds 2] [--repeat 3] [--output report.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_pages import PAGE_MODES, default_specs, generate_page, save_page  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "detection_accuracy.json")
+DETECTORS = ("facing", "gutter", "skew")
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _timed(fn, repeat: int):
+    """Run `fn` `repeat` times; return (last result, median ms)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    times.sort()
+    return result, _percentile(times, 0.5)
+
+
+def _error_stats(errors: list[float]) -> dict:
+    errors = sorted(abs(e) for e in errors)
+    if not errors:
+        return {"mean_abs_error": None, "p95_abs_error": None, "max_abs_error": None}
+    return {
+        "mean_abs_error": round(sum(errors) / len(errors), 5),
+        "p95_abs_error": round(_percentile(errors, 0.95), 5),
+        "max_abs_error": round(errors[-1], 5),
+    }
+
+
+def _latency_stats(times: list[float]) -> dict:
+    times = sorted(times)
+    return {
+        "total_ms": round(sum(times), 2),
+        "p50_ms": round(_percentile(times, 0.5), 2),
+        "p95_ms": round(_percentile(times, 0.95), 2),
+    }
+
+
+def run_corpus(dpis: tuple, modes: tuple, seeds: int, repeat: int) -> dict:
+    """
+    Run the detectors over the synthetic corpus.
+
+    Returns:
+        {"pages": per-page records, "metrics": per-detector accuracy and latency}
+    """
+    from detection import detect_facing_pages, detect_skew_angle
+    from split import find_gutter_position
+    from stages.io import load_native
+
+    pages = []
+    with tempfile.TemporaryDirectory(prefix="pp-gate-") as tmp:
+        for seed in range(seeds):
+            for spec in default_specs(dpis, modes, ("single", "spread"), seed):
+                image, truth = generate_page(spec)
+                path = os.path.join(tmp, f"{spec.name}.png")
+                save_page(image, path, spec.mode)
+                del image
+                image, _ = load_native(path)
+                os.unlink(path)
+
+                facing, facing_ms = _timed(lambda: detect_facing_pages(image), repeat)
+                skew, skew_ms = _timed(lambda: detect_skew_angle(image), repeat)
+                record = {
+                    "page": truth["name"],
+                    "facing": bool(facing),
+                    "facing_truth": truth["facing"],
+                    "facing_ms": round(facing_ms, 2),
+                    "skew": round(float(skew or 0.0), 3),
+                    "skew_truth": truth["skew_deg"],
+                    "skew_ms": round(skew_ms, 2),
+                }
+                if truth["facing"]:
+                    gutter_x, gutter_ms = _timed(lambda: find_gutter_position(image), repeat)
+                    record["gutter_x_norm"] = round(gutter_x / image.shape[1], 5)
+                    record["gutter_truth"] = truth["gutter_x_norm"]
+                    record["gutter_ms"] = round(gutter_ms, 2)
+                pages.append(record)
+
+    spreads = [p for p in pages if "gutter_x_norm" in p]
+    metrics = {
+        "facing": {
+            "accuracy": round(sum(p["facing"] == p["facing_truth"] for p in pages) / len(pages), 4),
+            **_latency_stats([p["facing_ms"] for p in pages]),
+        },
+        "gutter": {
+            **_error_stats([p["gutter_x_norm"] - p["gutter_truth"] for p in spreads]),
+            **_latency_stats([p["gutter_ms"] for p in spreads] or [0.0]),
+        },
+        "skew": {
+            **_error_stats([p["skew"] - p["skew_truth"] for p in pages]),
+            **_latency_stats([p["skew_ms"] for p in pages]),
+        },
+    }
+    return {"pages": pages, "metrics": metrics}
+
+
+def environment() -> dict:
+    import cv2
+    import numpy as np
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.system(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def check(report: dict, baseline: dict, args: argparse.Namespace) -> tuple[list[str], list[str]]:
+    """
+    Compare a report with the baseline.
+
+    Returns:
+        (failures, notes)
+    """
+    failures = []
+    notes = []
+    now = report["metrics"]
+    base = baseline["metrics"]
+
+    if now["facing"]["accuracy"] < base["facing"]["accuracy"] - args.facing_tolerance:
+        failures.append(f"facing accuracy {now['facing']['accuracy']:.3f} < baseline {base['facing']['accuracy']:.3f}")
+
+    for name, tolerance, unit in (("gutter", args.gutter_tolerance, ""), ("skew", args.skew_tolerance, " deg")):
+        for stat, scale in (("mean_abs_error", 1.0), ("p95_abs_error", 2.0)):
+            value, reference = now[name][stat], base[name][stat]
+            if value is None or reference is None:
+                continue
+            if value > reference + tolerance * scale:
+                failures.append(f"{name} {stat} {value:.4f}{unit} > baseline {reference:.4f}{unit} + {tolerance * scale:g}")
+
+    host_keys = ("platform", "machine", "cpu_count")
+    same_host = all(report["environment"].get(k) == baseline.get("environment", {}).get(k) for k in host_keys)
+    if same_host or args.force_latency:
+        for name in DETECTORS:
+            value, reference = now[name]["total_ms"], base[name]["total_ms"]
+            if reference > 0 and value > reference * (1.0 + args.latency_threshold):
+                failures.append(
+                    f"{name} latency {value:.0f} ms > baseline {reference:.0f} ms + {args.latency_threshold:.0%}"
+                )
+    else:
+        notes.append("baseline recorded on a different host: latency not compared (use --force-latency)")
+
+    return failures, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON (default: benchmarks/baselines/)')
+    parser.add_argument('--write-baseline', action='store_true', help='Store this run as the new baseline')
+    parser.add_argument('--dpi', type=int, nargs='+', default=[150, 300], help='Page resolutions')
+    parser.add_argument('--modes', nargs='+', choices=PAGE_MODES, default=list(PAGE_MODES), help='Page modes')
+    parser.add_argument('--seeds', type=int, default=2, help='Corpus variants (each is the full DPI x mode x layout matrix)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per detector and page (median is kept)')
+    parser.add_argument('--facing-tolerance', type=float, default=0.0, help='Allowed drop in facing accuracy')
+    parser.add_argument('--gutter-tolerance', type=float, default=0.005, help='Allowed gutter error increase (fraction of width)')
+    parser.add_argument('--skew-tolerance', type=float, default=0.1, help='Allowed skew error increase (degrees)')
+    parser.add_argument('--latency-threshold', type=float, default=0.25, help='Allowed latency increase (fraction)')
+    parser.add_argument('--force-latency', action='store_true', help='Compare latency even across hosts')
+    parser.add_argument('--output', help='Write the report JSON here')
+    args = parser.parse_args()
+
+    config = {"dpi": args.dpi, "modes": args.modes, "seeds": args.seeds, "repeat": args.repeat}
+    report = {"environment": environment(), "config": config, **run_corpus(tuple(args.dpi), tuple(args.modes), args.seeds, args.repeat)}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    m = report["metrics"]
+    print(
+        f"facing accuracy {m['facing']['accuracy']:.3f} ({m['facing']['total_ms']:.0f} ms) | "
+        f"gutter error mean {m['gutter']['mean_abs_error']} p95 {m['gutter']['p95_abs_error']} ({m['gutter']['total_ms']:.0f} ms) | "
+        f"skew error mean {m['skew']['mean_abs_error']} p95 {m['skew']['p95_abs_error']} deg ({m['skew']['total_ms']:.0f} ms)",
+        file=sys.stderr,
+    )
+
+    if args.write_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written: {args.baseline}", file=sys.stderr)
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --write-baseline first", file=sys.stderr)
+        sys.exit(2)
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"Baseline corpus differs ({baseline.get('config')}); comparing anyway", file=sys.stderr)
+
+    failures, notes = check(report, baseline, args)
+    for note in notes:
+        print(f"note: {note}", file=sys.stderr)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print("PASS", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
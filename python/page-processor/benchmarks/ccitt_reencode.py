@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: CCITT re-encode thresholding, Pillow loop vs NumPy/OpenCV.
+
+Compares the former Pillow path (kept here as the reference: convert to 'L',
+Python-loop Otsu on a bilinear thumbnail, `point` with a lambda, `convert('1')`)
+with `pdf_export.ccitt_threshold` + `pdf_export.binarize_packed`, per page,
+from the decoded file to the 1-bit image (the Group 4 save is the same for both
+and not timed). Reports the thresholds chosen and the fraction of pixels that
+differ.
+
+Usage:
+    python benchmarks/ccitt_reencode.py [image ...] [--repeat N]
+
+Without images, a synthetic 300 DPI A4 text page is used.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pdf_export import binarize_packed, ccitt_threshold  # noqa: E402
+from stages.io import load_grayscale  # noqa: E402
+
+
+def loop_otsu_threshold(gray) -> int:
+    """Reference: the pure-Python Otsu over a PIL histogram used before."""
+    hist = gray.histogram()
+    total = sum(hist[:256])
+    if total <= 0:
+        return 128
+    sum_total = 0
+    for i in range(256):
+        sum_total += i * hist[i]
+    sum_b = 0
+    w_b = 0
+    var_max = -1.0
+    threshold = 128
+    for t in range(256):
+        w_b += hist[t]
+        if w_b == 0:
+            continue
+        w_f = total - w_b
+        if w_f == 0:
+            break
+        sum_b += t * hist[t]
+        m_b = sum_b / w_b
+        m_f = (sum_total - sum_b) / w_f
+        var_between = w_b * w_f * (m_b - m_f) * (m_b - m_f)
+        if var_between > var_max:
+            var_max = var_between
+            threshold = t
+    return int(threshold)
+
+
+def pillow_binarize(path: str):
+    """Reference: the former CCITT thresholding path, file to mode '1' image."""
+    from PIL import Image
+
+    with Image.open(path) as src:
+        gray = src.convert("L")
+    w, h = gray.size
+    if w > 900:
+        small = gray.resize((900, max(1, int(h * 900 / float(w)))), Image.Resampling.BILINEAR)
+    else:
+        small = gray
+    thr = loop_otsu_threshold(small)
+    bw = gray.point(lambda p: 255 if p > thr else 0).convert("1", dither=Image.Dither.NONE)
+    return bw, thr
+
+
+def numpy_binarize(path: str):
+    """Current path: OpenCV decode and Otsu, NumPy threshold and bit packing."""
+    gray = load_grayscale(path)
+    thr = ccitt_threshold(gray)
+    return binarize_packed(gray, thr), thr
+
+
+def synthetic_text_page(width: int = 2480, height: int = 3508, seed: int = 0) -> np.ndarray:
+    """Grayscale page with dark text-like strokes on uneven, noisy paper."""
+    rng = np.random.default_rng(seed)
+    paper = np.linspace(225, 245, width, dtype=np.float32)[None, :].repeat(height, axis=0)
+    page = paper + rng.normal(0, 4, (height, width)).astype(np.float32)
+    for top in range(300, height - 300, 70):
+        x = 250
+        while x < width - 300:
+            word = int(rng.integers(40, 220))
+            page[top:top + 32, x:x + word] -= rng.uniform(150, 190)
+            x += word + int(rng.integers(20, 40))
+    return np.clip(page, 0, 255).astype(np.uint8)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='*', help='Page images (default: a synthetic page)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per page (best is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pp-bench-") as tmp:
+        paths = list(args.images)
+        if not paths:
+            paths = [os.path.join(tmp, "synthetic.png")]
+            cv2.imwrite(paths[0], synthetic_text_page(), [cv2.IMWRITE_PNG_COMPRESSION, 1])
+
+        print(f"{'page':<28} {'pixels':>7} {'pillow ms':>10} {'numpy ms':>9} {'speedup':>8} {'thr':>8} {'differ':>8}")
+        for path in paths:
+            ref, ref_thr = pillow_binarize(path)
+            new, new_thr = numpy_binarize(path)
+            differ = float(np.mean(np.asarray(ref) != np.asarray(new)))
+
+            t_ref = min(timeit.repeat(lambda: pillow_binarize(path), number=1, repeat=args.repeat))
+            t_new = min(timeit.repeat(lambda: numpy_binarize(path), number=1, repeat=args.repeat))
+            megapixels = new.size[0] * new.size[1] / 1e6
+            print(
+                f"{os.path.basename(path)[:28]:<28} {megapixels:>6.1f}M {t_ref * 1000:>10.1f} {t_new * 1000:>9.1f} "
+                f"{t_ref / t_new:>7.1f}x {ref_thr:>3}/{new_thr:<4} {differ:>8.2%}"
+            )
+
+
+if __name__ == '__main__':
+    main()
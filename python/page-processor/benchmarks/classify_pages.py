@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Regression check: `--reencode auto` must keep text pages CCITT and photos JPEG.
+
+Text pages come from the synthetic corpus (see synthetic_pages.py): bitonal
+and grayscale single pages and bitonal spreads, which should all classify as
+'ccitt'. Grayscale spreads are left out: their gutter shadow is a real mid
+tone, and either answer is defensible.
+
+Photos are stood in for by histogram-equalised 1/f noise over a range of
+spectral slopes: full-range grey levels with detail at every scale, which
+should all classify as 'jpeg'. Pages go through PNG encode/decode and the
+same thumbnail decode as `img2pdf-pages`. The check exits non-zero on any
+misclassified page.
+
+Usage:
+    python benchmarks/classify_pages.py [--dpi 150 300] [--seeds 1]
+        [--betas 0.6 0.8 1.0 1.2 1.5] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_pages import default_specs, generate_page, save_page  # noqa: E402
+
+# (modes, layouts) of the synthetic text pages that must become CCITT.
+TEXT_PAGES = ((("mono", "gray"), ("single",)), (("mono",), ("spread",)))
+
+
+def noise_photo(beta: float, seed: int, width: int, height: int) -> np.ndarray:
+    """
+    Grayscale 1/f^beta noise, histogram-equalised to the full 0-255 range.
+
+    Natural photographs have roughly this power spectrum (beta around 1), so
+    the image has detail and mid tones everywhere, like a photo plate.
+    """
+    rng = np.random.default_rng(seed)
+    # Synthesized at a quarter of the size: the spectrum is what matters.
+    h, w = max(1, height // 4), max(1, width // 4)
+    fy = np.fft.fftfreq(h)[:, None]
+    fx = np.fft.fftfreq(w)[None, :]
+    freq = np.sqrt(fx ** 2 + fy ** 2)
+    freq[0, 0] = 1.0
+    field = np.real(np.fft.ifft2(np.fft.fft2(rng.standard_normal((h, w))) / freq ** beta))
+    field = cv2.normalize(field, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    return cv2.equalizeHist(cv2.resize(field, (width, height), interpolation=cv2.INTER_CUBIC))
+
+
+def classify_file(path: str) -> dict:
+    """Classify a page file the way `img2pdf-pages --reencode auto` does."""
+    from pdf_export import CLASSIFY_MAX_DIM, classify_page
+    from stages.io import load_image
+
+    return classify_page(load_image(path, max_dim=CLASSIFY_MAX_DIM))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dpi', type=int, nargs='+', default=[150, 300], help='Page resolutions')
+    parser.add_argument('--seeds', type=int, default=1, help='Corpus variants (text pages and photos)')
+    parser.add_argument('--betas', type=float, nargs='+', default=[0.6, 0.8, 1.0, 1.2, 1.5],
+                        help='Spectral slopes of the noise photos')
+    parser.add_argument('--output', help='Write the report JSON here')
+    args = parser.parse_args()
+
+    cases = []
+    for seed in range(args.seeds):
+        for modes, layouts in TEXT_PAGES:
+            for spec in default_specs(tuple(args.dpi), modes, layouts, seed):
+                cases.append((spec.name, "ccitt", lambda spec=spec: (generate_page(spec)[0], spec.mode)))
+        for dpi in args.dpi:
+            width, height = int(8.27 * dpi), int(11.69 * dpi)
+            for beta in args.betas:
+                name = f"photo-b{beta:g}-{dpi}dpi-s{seed}"
+                cases.append((name, "jpeg", lambda b=beta, s=seed, w=width, h=height: (noise_photo(b, s, w, h), "gray")))
+
+    pages = []
+    with tempfile.TemporaryDirectory(prefix="pp-classify-") as tmp:
+        for name, expected, make in cases:
+            image, mode = make()
+            path = os.path.join(tmp, f"{name}.png")
+            save_page(image, path, mode)
+            del image
+            result = classify_file(path)
+            os.unlink(path)
+            record = {"page": name, "expected": expected, **result, "ok": result["mode"] == expected}
+            pages.append(record)
+            print(
+                f"{'ok  ' if record['ok'] else 'FAIL'} {name:<26} {result['mode']:<5} "
+                f"bimodality {result['bimodality']:.3f} edges {result['edge_density']:.3f}",
+                file=sys.stderr,
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages}, f, indent=2)
+
+    failures = [p for p in pages if not p["ok"]]
+    if failures:
+        print(f"FAIL: {len(failures)} of {len(pages)} pages misclassified", file=sys.stderr)
+        sys.exit(1)
+    print("PASS", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Regression check: fused rendering must crop like the staged pipeline.
+
+The fused path (one warp per page) measures content bounds without rendering
+the page; the staged path renders every step and measures the result. Both
+run split/deskew/crop on the synthetic corpus (see synthetic_pages.py) and
+the output page sizes, i.e. the crop boxes after size normalization, are
+compared. The check exits non-zero when any page differs by more than the
+tolerance.
+
+Usage:
+    python benchmarks/fused_vs_staged.py [--dpi 150 300] [--seeds 1]
+        [--tolerance 0.005] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_pages import PAGE_MODES, default_specs, generate_page, save_page  # noqa: E402
+
+OPERATIONS = ["split", "deskew", "crop"]
+
+
+def compare_page(path: str, work_dir: str, tolerance: float) -> dict:
+    """
+    Process one page both ways and compare the output sizes.
+
+    Returns:
+        {"fused", "staged": output sizes, "max_diff": largest size difference
+        as a fraction of the staged dimension, "ok"}
+    """
+    from processor import PageProcessor
+
+    sizes = {}
+    for name, fused in (("fused", True), ("staged", False)):
+        out_dir = os.path.join(work_dir, name)
+        os.makedirs(out_dir, exist_ok=True)
+        result = PageProcessor(fused=fused).process(path, out_dir, OPERATIONS)
+        sizes[name] = [(s["width"], s["height"]) for s in result["output_sizes"]]
+
+    if len(sizes["fused"]) != len(sizes["staged"]):
+        max_diff = 1.0
+    else:
+        max_diff = max(
+            abs(f - s) / float(s)
+            for fused_size, staged_size in zip(sizes["fused"], sizes["staged"])
+            for f, s in zip(fused_size, staged_size)
+        )
+    return {**sizes, "max_diff": round(max_diff, 5), "ok": max_diff <= tolerance}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dpi', type=int, nargs='+', default=[150, 300], help='Page resolutions')
+    parser.add_argument('--modes', nargs='+', choices=PAGE_MODES, default=list(PAGE_MODES), help='Page modes')
+    parser.add_argument('--seeds', type=int, default=1, help='Corpus variants (each is the full DPI x mode x layout matrix)')
+    parser.add_argument('--tolerance', type=float, default=0.005, help='Allowed size difference (fraction of the dimension)')
+    parser.add_argument('--output', help='Write the report JSON here')
+    args = parser.parse_args()
+
+    pages = []
+    with tempfile.TemporaryDirectory(prefix="pp-fused-") as tmp:
+        for seed in range(args.seeds):
+            for spec in default_specs(tuple(args.dpi), tuple(args.modes), ("single", "spread"), seed):
+                image, _ = generate_page(spec)
+                path = os.path.join(tmp, f"{spec.name}.png")
+                save_page(image, path, spec.mode)
+                del image
+                with tempfile.TemporaryDirectory(dir=tmp) as work_dir:
+                    record = {"page": spec.name, **compare_page(path, work_dir, args.tolerance)}
+                os.unlink(path)
+                pages.append(record)
+                print(
+                    f"{'ok  ' if record['ok'] else 'FAIL'} {spec.name:<26} fused {record['fused']} "
+                    f"staged {record['staged']}",
+                    file=sys.stderr,
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"tolerance": args.tolerance, "pages": pages}, f, indent=2)
+
+    failures = [p for p in pages if not p["ok"]]
+    if failures:
+        print(f"FAIL: {len(failures)} of {len(pages)} pages crop differently", file=sys.stderr)
+        sys.exit(1)
+    print("PASS", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: Hough segment statistics, per-segment loop vs vectorized.
+
+Compares the former per-segment Python loop (kept here as the reference) with
+`stages.image_utils.hough_line_stats` on synthetic HoughLinesP output of
+increasing size, and checks both produce the same numbers.
+
+Usage:
+    python benchmarks/hough_line_stats.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stages.image_utils import hough_line_stats  # noqa: E402
+
+
+def loop_line_stats(lines: np.ndarray, max_angle: float, std_scale: float, count_scale: float) -> dict:
+    """Reference: the per-segment loop both skew detectors used before."""
+    angles = []
+    lengths = []
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        dx = float(x2 - x1)
+        dy = float(y2 - y1)
+        if abs(dx) < 1.0:
+            continue
+        angle = float(np.arctan2(dy, dx) * 180.0 / np.pi)
+        if abs(angle) > max_angle:
+            continue
+        angles.append(angle)
+        lengths.append(float(np.hypot(dx, dy)))
+
+    if not angles:
+        return {'angle': 0.0, 'confidence': 0.0}
+
+    total = float(np.sum(lengths))
+    angle = float(np.sum(np.array(angles) * np.array(lengths)) / total) if total > 0 else float(np.median(angles))
+    angle_std = float(np.std(angles)) if len(angles) > 1 else 0.0
+    consistency = max(0.0, 1.0 - angle_std / std_scale)
+    count_score = min(1.0, len(angles) / count_scale)
+    return {'angle': angle, 'confidence': consistency * 0.7 + count_score * 0.3}
+
+
+def synthetic_segments(n: int, seed: int = 0) -> np.ndarray:
+    """HoughLinesP-shaped (N, 1, 4) int32 segments: mostly text lines near -2 deg, some noise."""
+    rng = np.random.default_rng(seed)
+    x1 = rng.integers(0, 800, n)
+    length = rng.integers(190, 700, n)
+    theta = np.where(rng.random(n) < 0.9, rng.normal(-2.0, 0.3, n), rng.uniform(-90, 90, n))
+    x2 = x1 + np.round(length * np.cos(np.radians(theta)))
+    y1 = rng.integers(0, 1500, n)
+    y2 = y1 + np.round(length * np.sin(np.radians(theta)))
+    return np.stack([x1, y1, x2, y2], axis=1).astype(np.int32).reshape(-1, 1, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per size (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'segments':>9} {'loop ms':>9} {'vector ms':>10} {'speedup':>8}")
+    for n in (100, 1000, 5000, 20000):
+        lines = synthetic_segments(n)
+        params = dict(max_angle=15.0, std_scale=5.0, count_scale=20.0)
+
+        ref = loop_line_stats(lines, **params)
+        new = hough_line_stats(lines, **params)
+        assert abs(ref['angle'] - new['angle']) < 1e-9, (ref, new)
+        assert abs(ref['confidence'] - new['confidence']) < 1e-9, (ref, new)
+
+        t_loop = min(timeit.repeat(lambda: loop_line_stats(lines, **params), number=1, repeat=args.repeat))
+        t_vec = min(timeit.repeat(lambda: hough_line_stats(lines, **params), number=1, repeat=args.repeat))
+        print(f"{n:>9} {t_loop * 1000:>9.2f} {t_vec * 1000:>10.3f} {t_loop / t_vec:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: every detector and apply function on synthetic pages.
+
+Generates the synthetic page matrix (see synthetic_pages.py: mono/gray/colour,
+single pages and spreads, 150-600 DPI, known skew/curvature/gutter shadow) and
+times each operation on each page in a fresh worker process, so the peak RSS
+reported is that operation's own. Each case gets warm-up runs, then timed runs.
+
+Reported per case: p50/p95/mean latency, throughput (megapixels/s and pages/s
+at the median), peak RSS and the RSS before the first run (imports + decoded
+nothing). JSON goes to stdout or --output; a summary table goes to stderr.
+Run it before and after a change and pass the earlier JSON to --compare.
+
+Usage:
+    python benchmarks/run_suite.py [--dpi 150 300 600] [--modes mono gray color]
+        [--layouts single spread] [--ops detect.deskew process ...]
+        [--repeat N] [--warmup N] [--output results.json] [--compare before.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PACKAGE_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_pages import PAGE_MODES, default_specs, generate_page, save_page  # noqa: E402
+
+OPERATIONS = (
+    "detect.characteristics",
+    "detect.rotation",
+    "detect.split",
+    "detect.deskew",
+    "detect.dewarp",
+    "apply.rotation",
+    "apply.split",
+    "apply.deskew",
+    "apply.dewarp",
+    "process",
+)
+
+
+def _operation(name: str, path: str, truth: dict, work_dir: str):
+    """Zero-argument callable running one operation on one page."""
+    import main
+
+    if name == "detect.characteristics":
+        return lambda: main.detect_characteristics(path)
+    if name.startswith("detect."):
+        stage = name.split(".", 1)[1]
+        return lambda: main.run_stage_detect(stage, path, {})
+
+    if name == "apply.rotation":
+        return lambda: main.run_stage_apply("rotation", path, os.path.join(work_dir, "rotated.png"), {"rotation": 90})
+    if name == "apply.split":
+        params = {"split_type": "vertical", "position": truth.get("gutter_x_norm") or 0.5}
+        return lambda: main.run_stage_apply("split", path, work_dir, params)
+    if name == "apply.deskew":
+        params = {"angle": truth["skew_deg"]}
+        return lambda: main.run_stage_apply("deskew", path, os.path.join(work_dir, "deskewed.png"), params)
+    if name == "apply.dewarp":
+        return lambda: main.run_stage_apply("dewarp", path, os.path.join(work_dir, "dewarped.png"), {})
+
+    if name == "process":
+        from processor import PageProcessor
+
+        processor = PageProcessor()
+        operations = ["split", "deskew", "dewarp", "crop"]
+        return lambda: processor.process(path, work_dir, operations)
+
+    raise ValueError(f"Unknown operation: {name}")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        # Windows: no getrusage.
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile (exact for small sample counts)."""
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _run_case(name: str, path: str, truth: dict, repeat: int, warmup: int) -> dict:
+    """Worker: time one operation on one page (runs in a fresh process)."""
+    # Stage functions may print progress; keep the benchmark's own output clean.
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    with tempfile.TemporaryDirectory(prefix="pp-bench-") as work_dir:
+        run = _operation(name, path, truth, work_dir)
+        baseline = _peak_rss_mb()
+        for _ in range(warmup):
+            run()
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            run()
+            times.append((time.perf_counter() - t0) * 1000.0)
+
+    times.sort()
+    megapixels = truth["width"] * truth["height"] / 1e6
+    p50 = _percentile(times, 0.5)
+    return {
+        "page": truth["name"],
+        "operation": name,
+        "dpi": truth["spec"]["dpi"],
+        "mode": truth["spec"]["mode"],
+        "layout": "spread" if truth["facing"] else "single",
+        "megapixels": round(megapixels, 2),
+        "runs": len(times),
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(_percentile(times, 0.95), 2),
+        "mean_ms": round(sum(times) / len(times), 2),
+        "megapixels_per_s": round(megapixels / (p50 / 1000.0), 2) if p50 > 0 else None,
+        "pages_per_s": round(1000.0 / p50, 3) if p50 > 0 else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1) if baseline is not None else None,
+        "baseline_rss_mb": round(baseline, 1) if baseline is not None else None,
+    }
+
+
+def environment() -> dict:
+    """Versions and host details recorded with every run."""
+    import cv2
+    import numpy as np
+
+    import main
+
+    return {
+        "page_processor": main.VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _compare(results: list[dict], before_path: str):
+    """Print p50 and peak RSS ratios against an earlier run (matched by page and operation)."""
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = {(r["page"], r["operation"]): r for r in json.load(f)["results"]}
+
+    print(f"\n{'page':<26} {'operation':<23} {'p50 before':>11} {'after':>9} {'ratio':>6} {'rss ratio':>9}", file=sys.stderr)
+    for r in results:
+        old = before.get((r["page"], r["operation"]))
+        if not old:
+            continue
+        ratio = r["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("nan")
+        rss = (
+            r["peak_rss_mb"] / old["peak_rss_mb"]
+            if r.get("peak_rss_mb") and old.get("peak_rss_mb") else float("nan")
+        )
+        print(
+            f"{r['page']:<26} {r['operation']:<23} {old['p50_ms']:>11.1f} {r['p50_ms']:>9.1f} {ratio:>6.2f} {rss:>9.2f}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dpi', type=int, nargs='+', default=[150, 300, 600], help='Page resolutions')
+    parser.add_argument('--modes', nargs='+', choices=PAGE_MODES, default=list(PAGE_MODES), help='Page modes')
+    parser.add_argument('--layouts', nargs='+', choices=['single', 'spread'], default=['single', 'spread'])
+    parser.add_argument('--ops', nargs='+', default=list(OPERATIONS), help='Operations (or prefixes, e.g. detect)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per case')
+    parser.add_argument('--seed', type=int, default=0, help='Page generator seed')
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    parser.add_argument('--compare', help='Earlier JSON output to compare against')
+    args = parser.parse_args()
+
+    ops = [op for op in OPERATIONS if any(op == sel or op.startswith(sel + ".") for sel in args.ops)]
+    if not ops:
+        parser.error(f"No operations match {args.ops}; choose from {', '.join(OPERATIONS)}")
+
+    results = []
+    started = time.monotonic()
+    with tempfile.TemporaryDirectory(prefix="pp-bench-pages-") as pages_dir:
+        specs = default_specs(tuple(args.dpi), tuple(args.modes), tuple(args.layouts), args.seed)
+        cases = []
+        for spec in specs:
+            image, truth = generate_page(spec)
+            path = os.path.join(pages_dir, f"{spec.name}.png")
+            save_page(image, path, spec.mode)
+            del image
+            cases.extend((op, path, truth) for op in ops)
+
+        print(f"{'page':<26} {'operation':<23} {'p50 ms':>9} {'p95 ms':>9} {'MP/s':>7} {'peak MB':>8}", file=sys.stderr)
+        # One case per fresh process: peak RSS is per operation and nothing stays warm between cases.
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn"), max_tasks_per_child=1) as pool:
+            for op, path, truth in cases:
+                r = pool.submit(_run_case, op, path, truth, max(1, args.repeat), max(0, args.warmup)).result()
+                results.append(r)
+                print(
+                    f"{r['page']:<26} {r['operation']:<23} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                    f"{r['megapixels_per_s'] or 0:>7.1f} {r['peak_rss_mb'] or 0:>8.0f}",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "suite": "page-processor",
+        "environment": environment(),
+        "config": {
+            "dpi": args.dpi,
+            "modes": args.modes,
+            "layouts": args.layouts,
+            "operations": ops,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "elapsed_s": round(time.monotonic() - started, 1),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
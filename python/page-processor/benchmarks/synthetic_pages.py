@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic book pages with known geometry.
+
+Generates single pages or facing-page spreads of text lines (Hershey glyphs
+drawn with OpenCV) at a chosen DPI, then applies the distortions the
+page-processor corrects: page curvature towards the gutter, a gutter shadow and
+a skew rotation, plus paper noise. Output is bitonal, grayscale or colour.
+
+The same spec and seed always produce the same pixels, and every page comes
+with its ground truth (skew, facing pages, gutter position, curvature), so the
+pages serve both benchmarks and accuracy checks.
+
+Usage:
+    python benchmarks/synthetic_pages.py <output_dir> [--dpi 150 300 600]
+        [--modes mono gray color] [--layouts single spread]
+"""
+
+import argparse
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+
+PAGE_MODES = ("mono", "gray", "color")
+
+# Ink and paper levels before noise; colour pages get a warm paper tint (BGR).
+INK_LEVEL = 25
+PAPER_BGR = (222, 236, 244)
+
+_LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+@dataclass
+class PageSpec:
+    """
+    Parameters of one synthetic page.
+
+    Args:
+        dpi: Resolution; page size in pixels follows from the trim size
+        mode: 'mono' (0/255, saved 1-bit), 'gray' or 'color' (BGR)
+        facing: Two pages side by side with the gutter in the middle
+        skew_deg: Skew in degrees as detect_deskew reports it (positive = content
+                  rotated clockwise)
+        curvature: Line sag at the gutter as a fraction of page height
+        gutter_shadow: Darkening at the gutter (0 = none, 1 = black)
+        noise: Standard deviation of paper noise (grey levels)
+        seed: Seed for text layout and noise
+        width_in: Trim width of one page in inches
+        height_in: Trim height of one page in inches
+    """
+    dpi: int = 300
+    mode: str = "gray"
+    facing: bool = False
+    skew_deg: float = 0.0
+    curvature: float = 0.0
+    gutter_shadow: float = 0.0
+    noise: float = 3.0
+    seed: int = 0
+    width_in: float = 5.5
+    height_in: float = 8.5
+
+    @property
+    def name(self) -> str:
+        layout = "spread" if self.facing else "single"
+        return f"{layout}-{self.mode}-{self.dpi}dpi-s{self.seed}"
+
+
+def _text_block(width: int, height: int, dpi: int, rng: np.random.Generator) -> np.ndarray:
+    """White page with left-aligned paragraphs of random words in black."""
+    page = np.full((height, width), 255, dtype=np.uint8)
+    margin = int(0.6 * dpi)
+    pitch = max(6, int(0.2 * dpi))          # ~14 pt leading
+    scale = 0.085 * dpi / 22.0               # Hershey simplex cap height is ~22 px at scale 1
+    thickness = max(1, int(round(scale * 1.6)))
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    space = cv2.getTextSize(" ", font, scale, thickness)[0][0]
+    right = width - margin
+
+    y = margin + pitch
+    line_in_paragraph = 0
+    paragraph_lines = int(rng.integers(4, 12))
+    while y < height - margin:
+        x = margin + (int(0.3 * dpi) if line_in_paragraph == 0 else 0)
+        # Last line of a paragraph stops early.
+        stop = right if line_in_paragraph < paragraph_lines - 1 else margin + int(rng.uniform(0.2, 0.8) * (right - margin))
+        while True:
+            word = "".join(rng.choice(_LETTERS, int(rng.integers(2, 10))))
+            w = cv2.getTextSize(word, font, scale, thickness)[0][0]
+            if x + w > stop:
+                break
+            cv2.putText(page, word, (x, y), font, scale, 0, thickness, cv2.LINE_AA)
+            x += w + space
+
+        y += pitch
+        line_in_paragraph += 1
+        if line_in_paragraph >= paragraph_lines:
+            y += pitch // 2
+            line_in_paragraph = 0
+            paragraph_lines = int(rng.integers(4, 12))
+    return page
+
+
+def _curve(page: np.ndarray, gutter_x: float, sag_px: float) -> np.ndarray:
+    """Let lines sag towards the gutter, quadratically in distance from the outer edge."""
+    h, w = page.shape
+    reach = max(gutter_x, w - gutter_x)
+    xs = np.arange(w, dtype=np.float32)
+    closeness = 1.0 - np.abs(xs - gutter_x) / reach
+    dy = (sag_px * closeness ** 2).astype(np.float32)
+    map_x = np.broadcast_to(xs, (h, w))
+    map_y = np.arange(h, dtype=np.float32)[:, None] - dy[None, :]
+    return cv2.remap(page, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+
+def generate_page(spec: PageSpec) -> tuple[np.ndarray, dict]:
+    """
+    Render a synthetic page.
+
+    Args:
+        spec: Page parameters
+
+    Returns:
+        (image, truth): uint8 image (2-D for mono/gray, BGR for colour) and
+        ground truth {"name", "spec", "width", "height", "facing",
+        "gutter_x_norm", "skew_deg", "curvature"}
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if spec.mode not in PAGE_MODES:
+        raise ValueError(f"Unknown page mode: {spec.mode}")
+
+    rng = np.random.default_rng(spec.seed)
+    page_w = int(round(spec.width_in * spec.dpi))
+    page_h = int(round(spec.height_in * spec.dpi))
+
+    if spec.facing:
+        image = np.hstack([_text_block(page_w, page_h, spec.dpi, rng), _text_block(page_w, page_h, spec.dpi, rng)])
+        gutter_x: Optional[float] = float(page_w)
+    else:
+        image = _text_block(page_w, page_h, spec.dpi, rng)
+        gutter_x = None
+
+    h, w = image.shape
+    # A single page is bound on its left edge.
+    binding_x = gutter_x if gutter_x is not None else 0.0
+    if spec.curvature > 0:
+        image = _curve(image, binding_x, spec.curvature * page_h)
+
+    values = image.astype(np.float32)
+    if spec.gutter_shadow > 0:
+        sigma = 0.25 * spec.dpi
+        xs = np.arange(w, dtype=np.float32)
+        shade = 1.0 - spec.gutter_shadow * np.exp(-((xs - binding_x) ** 2) / (2 * sigma ** 2))
+        values *= shade[None, :]
+
+    if spec.skew_deg:
+        rot = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), -spec.skew_deg, 1.0)
+        values = cv2.warpAffine(values, rot, (w, h), flags=cv2.INTER_LINEAR, borderValue=255.0)
+
+    # Map black/white onto ink/paper, then add paper noise.
+    ink = values / 255.0
+    if spec.noise > 0:
+        noise = rng.normal(0.0, spec.noise, (h, w)).astype(np.float32)
+    else:
+        noise = np.zeros((h, w), dtype=np.float32)
+
+    if spec.mode == "color":
+        channels = [INK_LEVEL + (paper - INK_LEVEL) * ink + noise for paper in PAPER_BGR]
+        out = np.clip(cv2.merge(channels), 0, 255).astype(np.uint8)
+    else:
+        out = np.clip(INK_LEVEL + (255 - INK_LEVEL) * ink + noise, 0, 255).astype(np.uint8)
+        if spec.mode == "mono":
+            out = np.where(out > 127, 255, 0).astype(np.uint8)
+
+    truth = {
+        "name": spec.name,
+        "spec": asdict(spec),
+        "width": w,
+        "height": h,
+        "facing": spec.facing,
+        "gutter_x_norm": gutter_x / w if gutter_x is not None else None,
+        "skew_deg": spec.skew_deg,
+        "curvature": spec.curvature,
+    }
+    return out, truth
+
+
+def save_page(image: np.ndarray, path: str, mode: str):
+    """Write a generated page; mono pages are stored as 1-bit PNGs like real bitonal scans."""
+    params = [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    if mode == "mono" and path.lower().endswith(".png"):
+        params += [cv2.IMWRITE_PNG_BILEVEL, 1]
+    if not cv2.imwrite(path, image, params):
+        raise IOError(f"Failed to write image: {path}")
+
+
+def default_specs(
+    dpis: tuple = (150, 300, 600),
+    modes: tuple = PAGE_MODES,
+    layouts: tuple = ("single", "spread"),
+    seed: int = 0,
+) -> list[PageSpec]:
+    """
+    The standard page matrix: every DPI x mode x layout, with skew, curvature
+    and (for spreads) gutter shadow varied deterministically per page.
+    """
+    specs = []
+    for i, (dpi, mode, layout) in enumerate((d, m, l) for d in dpis for m in modes for l in layouts):
+        rng = np.random.default_rng(seed * 1000 + i)
+        facing = layout == "spread"
+        specs.append(PageSpec(
+            dpi=int(dpi),
+            mode=mode,
+            facing=facing,
+            skew_deg=round(float(rng.choice([-1, 1]) * rng.uniform(0.7, 4.0)), 2),
+            curvature=round(float(rng.uniform(0.0, 0.012)), 4),
+            gutter_shadow=round(float(rng.uniform(0.15, 0.4)), 2) if facing else 0.0,
+            seed=seed * 1000 + i,
+        ))
+    return specs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output_dir', help='Directory for PNG pages and truth.json')
+    parser.add_argument('--dpi', type=int, nargs='+', default=[150, 300, 600], help='Resolutions')
+    parser.add_argument('--modes', nargs='+', choices=PAGE_MODES, default=list(PAGE_MODES), help='Page modes')
+    parser.add_argument('--layouts', nargs='+', choices=['single', 'spread'], default=['single', 'spread'])
+    parser.add_argument('--seed', type=int, default=0, help='Base seed')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    truths = []
+    for spec in default_specs(tuple(args.dpi), tuple(args.modes), tuple(args.layouts), args.seed):
+        image, truth = generate_page(spec)
+        path = os.path.join(args.output_dir, f"{spec.name}.png")
+        save_page(image, path, spec.mode)
+        truth["path"] = path
+        truths.append(truth)
+        print(f"{path}  {truth['width']}x{truth['height']}  skew {spec.skew_deg:+.2f}")
+
+    with open(os.path.join(args.output_dir, "truth.json"), "w", encoding="utf-8") as f:
+        json.dump(truths, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
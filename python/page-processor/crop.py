@@ -8,11 +8,15 @@ import cv2
 import numpy as np
 from typing import Optional
 
+from stages.profiling import timed
 
+
+@timed
 def crop_to_content(
     image: np.ndarray,
     bounds: Optional[dict] = None,
     padding: int = 30,
+    copy: bool = True,
 ) -> np.ndarray:
     """
     Crop image to content bounds with optional padding.
@@ -22,6 +26,7 @@ def crop_to_content(
         bounds: Content bounds dict with x, y, width, height
                 (auto-detected if None)
         padding: Pixels to add around content
+        copy: If False, return a view of `image` instead of a copy
 
     Returns:
         Cropped image
@@ -42,7 +47,8 @@ def crop_to_content(
     x2 = min(w, bounds["x"] + bounds["width"] + padding)
     y2 = min(h, bounds["y"] + bounds["height"] + padding)
 
-    return image[y:y2, x:x2].copy()
+    cropped = image[y:y2, x:x2]
+    return cropped.copy() if copy else cropped
 
 
 def normalize_page_size(
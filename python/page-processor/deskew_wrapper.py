@@ -8,6 +8,8 @@ import cv2
 import numpy as np
 import os
 
+from stages.profiling import timed
+
 
 def _interp_flag() -> int:
     # For scanned text, interpolation choice matters at small angles.
@@ -22,6 +24,7 @@ def _interp_flag() -> int:
     return cv2.INTER_LANCZOS4
 
 
+@timed
 def deskew_page(image: np.ndarray, angle: float = None) -> np.ndarray:
     """
     Correct page rotation (skew).
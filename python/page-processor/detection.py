@@ -13,79 +13,55 @@ import numpy as np
 from typing import Optional
 
 from split import find_gutter_position
-from stages.image_utils import _to_gray, _resize_for_analysis, _smooth_1d
+from stages.image_utils import ANALYSIS_MAX_DIM, AnalysisContext, _smooth_1d, hough_line_stats
+from stages.io import load_grayscale, probe_image
+from stages.profiling import span, timed
 
 
+@timed
 def _detect_skew_hough(
     gray: np.ndarray,
     max_angle: float = 15.0,
+    edges: Optional[np.ndarray] = None,
 ) -> tuple[float, float]:
     """
     Fast skew detection using Hough lines on a downscaled image.
 
+    `edges` may pass in a precomputed Canny (50/150) map of `gray`.
+
     Returns the *correction* angle in degrees (positive = CCW rotation).
     """
     h, w = gray.shape[:2]
     if h < 10 or w < 10:
         return 0.0, 0.0
 
-    edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+    if edges is None:
+        with span('cv2.Canny'):
+            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
 
     # Connect text edges into longer line segments to improve Hough stability.
     kernel_w = max(10, w // 30)
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_w, 1))
-    dilated = cv2.dilate(edges, kernel, iterations=1)
-
-    lines = cv2.HoughLinesP(
-        dilated,
-        rho=1,
-        theta=np.pi / 180,
-        threshold=100,
-        minLineLength=max(30, w // 8),
-        maxLineGap=max(10, w // 20),
-    )
-
-    if lines is None or len(lines) == 0:
-        return 0.0, 0.0
-
-    angles: list[float] = []
-    lengths: list[float] = []
-
-    for line in lines:
-        x1, y1, x2, y2 = line[0]
-        dx = float(x2 - x1)
-        dy = float(y2 - y1)
-        if abs(dx) < 1.0:
-            continue
-
-        angle = float(np.arctan2(dy, dx) * 180.0 / np.pi)
-        if abs(angle) > max_angle:
-            continue
-
-        length = float(np.hypot(dx, dy))
-        angles.append(angle)
-        lengths.append(length)
-
-    if not angles:
-        return 0.0, 0.0
-
-    total_len = float(np.sum(lengths)) if lengths else 0.0
-    if total_len <= 0:
-        line_angle = float(np.median(np.array(angles, dtype=np.float64)))
-    else:
-        line_angle = float(np.sum(np.array(angles) * np.array(lengths)) / total_len)
+    with span('cv2.dilate'):
+        dilated = cv2.dilate(edges, kernel, iterations=1)
+
+    with span('cv2.HoughLinesP'):
+        lines = cv2.HoughLinesP(
+            dilated,
+            rho=1,
+            theta=np.pi / 180,
+            threshold=100,
+            minLineLength=max(30, w // 8),
+            maxLineGap=max(10, w // 20),
+        )
 
     # Confidence: we need enough consistent near-horizontal lines.
     # If the image contains lots of diagonals (e.g. illustrations, borders), skew detection can be unstable.
-    angle_std = float(np.std(np.array(angles, dtype=np.float64))) if len(angles) > 1 else 0.0
-    # 2 degrees std => good, 4 degrees => poor.
-    consistency = max(0.0, 1.0 - (angle_std / 4.0))
-    # 15 lines => good signal; fewer => lower confidence.
-    count_score = min(1.0, float(len(angles)) / 15.0)
-    confidence = float(min(1.0, max(0.0, (consistency * 0.7) + (count_score * 0.3))))
+    # 4 degrees std => no consistency; 15 lines => good signal.
+    stats = hough_line_stats(lines, max_angle=max_angle, std_scale=4.0, count_scale=15.0)
 
-    # Hough finds the angle of the text lines; to deskew we rotate in the opposite direction.
-    return -line_angle, confidence
+    # Image y grows downwards, so the segment angle already is the CCW correction angle.
+    return stats['angle'], stats['confidence']
 
 
 def _best_saddle_valley(curve: np.ndarray) -> tuple[int, float]:
@@ -122,7 +98,8 @@ def _best_saddle_valley(curve: np.ndarray) -> tuple[int, float]:
     return idx, float(min(1.0, max(0.0, conf)))
 
 
-def detect_facing_pages(image: np.ndarray) -> bool:
+@timed
+def detect_facing_pages(image: np.ndarray, ctx: Optional[AnalysisContext] = None) -> bool:
     """
     Detect if image contains two facing pages (double-page spread).
 
@@ -133,6 +110,7 @@ def detect_facing_pages(image: np.ndarray) -> bool:
 
     Args:
         image: Input image (BGR format)
+        ctx: Shared analysis context for `image` (built if omitted)
 
     Returns:
         True if likely facing pages, False otherwise
@@ -146,13 +124,14 @@ def detect_facing_pages(image: np.ndarray) -> bool:
     if aspect_ratio < 1.05:
         return False
 
-    # Convert to grayscale and downscale for faster analysis (no quality impact on output).
-    gray = _to_gray(image)
-    gray_small, _ = _resize_for_analysis(gray, max_dim=1500)
+    # Grayscale, downscaled for faster analysis (no quality impact on output).
+    if ctx is None:
+        ctx = AnalysisContext(image)
+    gray_small = ctx.small
     h_s, w_s = gray_small.shape[:2]
 
-    # Pre-compute edges once; used by multiple heuristics.
-    edges = cv2.Canny(gray_small, 50, 150)
+    # Edges are shared by multiple heuristics (and the gutter finder).
+    edges = ctx.edges()
 
     # Robust gutter detection over a broad range. This is especially important for off-center scans.
     start = int(w_s * 0.05)
@@ -226,7 +205,7 @@ def detect_facing_pages(image: np.ndarray) -> bool:
     # Re-use our gutter splitter to propose a center line and verify it looks like
     # a true gutter via projection depth / edge-density dip.
     try:
-        gutter_x = find_gutter_position(image)
+        gutter_x = find_gutter_position(image, ctx=ctx)
         gx_s = int(round(gutter_x * (float(w_s) / float(w))))
         gx_s = max(0, min(w_s - 1, gx_s))
 
@@ -276,7 +255,19 @@ def detect_facing_pages(image: np.ndarray) -> bool:
     return False
 
 
-def detect_skew_angle(image: np.ndarray) -> float:
+# A borderline skew estimate is still applied when it agrees with the document's
+# typical skew (from neighbouring pages) to within this many degrees...
+SKEW_PRIOR_AGREEMENT = 0.5
+# ...as long as its confidence reaches this floor.
+SKEW_PRIOR_MIN_CONFIDENCE = 0.25
+
+
+@timed
+def detect_skew_angle(
+    image: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
+    prior: Optional[float] = None,
+) -> float:
     """
     Detect skew (rotation) angle of the page.
 
@@ -284,13 +275,17 @@ def detect_skew_angle(image: np.ndarray) -> float:
 
     Args:
         image: Input image (BGR or grayscale)
+        ctx: Shared analysis context for `image` (built if omitted)
+        prior: Typical skew of neighbouring pages; lets borderline estimates
+               that agree with it through the confidence guardrails
 
     Returns:
         Skew angle in degrees (-45 to 45)
     """
-    # Convert to grayscale and downscale for faster detection.
-    gray = _to_gray(image)
-    gray_small, _ = _resize_for_analysis(gray, max_dim=1500)
+    # Grayscale, downscaled for faster detection.
+    if ctx is None:
+        ctx = AnalysisContext(image)
+    gray_small = ctx.small
 
     # Quickly bail out for very low-contrast/mostly-blank pages.
     try:
@@ -300,10 +295,17 @@ def detect_skew_angle(image: np.ndarray) -> float:
         pass
 
     try:
-        angle, conf = _detect_skew_hough(gray_small, max_angle=15.0)
+        angle, conf = _detect_skew_hough(gray_small, max_angle=15.0, edges=ctx.edges())
 
         # Guardrail: avoid "random rotations" on pages where skew detection is uncertain.
         # Typical scanner skew is small; larger angles are often false positives.
+        agrees_with_prior = (
+            prior is not None
+            and conf >= SKEW_PRIOR_MIN_CONFIDENCE
+            and abs(angle - prior) <= SKEW_PRIOR_AGREEMENT
+        )
+        if agrees_with_prior and abs(angle) <= 10.0:
+            return float(angle)
         if conf < 0.40:
             return 0.0
         if abs(angle) > 5.0 and conf < 0.70:
@@ -316,7 +318,8 @@ def detect_skew_angle(image: np.ndarray) -> float:
         return 0.0
 
 
-def detect_curvature(image: np.ndarray) -> float:
+@timed
+def detect_curvature(image: np.ndarray, ctx: Optional[AnalysisContext] = None) -> float:
     """
     Detect page curvature (warping from book spine).
 
@@ -324,25 +327,25 @@ def detect_curvature(image: np.ndarray) -> float:
 
     Args:
         image: Input image (BGR format)
+        ctx: Shared analysis context for `image` (built if omitted)
 
     Returns:
         Curvature score (0.0 = flat, 1.0+ = significant curve)
     """
-    # Convert to grayscale and downscale for faster analysis.
-    gray = _to_gray(image)
-    gray, _ = _resize_for_analysis(gray, max_dim=1500)
-
-    h, w = gray.shape
-
-    # Threshold to get binary image
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Analyse the downscaled grayscale image and its Otsu binarization.
+    if ctx is None:
+        ctx = AnalysisContext(image)
+    h, w = ctx.small.shape[:2]
+    binary = ctx.binary()
 
     # Morphological operations to connect text into lines
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (w // 20, 1))
-    dilated = cv2.dilate(binary, kernel, iterations=1)
+    with span('cv2.dilate'):
+        dilated = cv2.dilate(binary, kernel, iterations=1)
 
     # Find contours (text lines)
-    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    with span('cv2.findContours'):
+        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     # Filter for likely text lines (wide, not too tall)
     text_lines = []
@@ -383,27 +386,45 @@ def detect_curvature(image: np.ndarray) -> float:
     return float(np.mean(curvatures))
 
 
+@timed
 def detect_content_bounds(
     image: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
 ) -> Optional[dict]:
     """
     Detect content bounds for margin cropping.
 
     Args:
         image: Input image (BGR format)
+        ctx: Shared analysis context for `image` (built if omitted)
 
     Returns:
         Dictionary with x, y, width, height of content region,
         or None if detection fails
     """
-    gray = _to_gray(image)
-    h, w = gray.shape
+    if ctx is None:
+        ctx = AnalysisContext(image)
+    # Analyse the downscaled binarization to avoid expensive full-res scans.
+    return content_bounds_from_mask(ctx.binary(), ctx.scale, ctx.width, ctx.height)
+
+
+def content_bounds_from_mask(mask: np.ndarray, scale: float, width: int, height: int) -> Optional[dict]:
+    """
+    Content bounds from an ink mask at analysis scale.
 
-    # Downscale for analysis to avoid expensive full-res scans.
-    gray_small, scale = _resize_for_analysis(gray, max_dim=1500)
+    Args:
+        mask: Ink = non-zero, downscaled by `scale` from the page
+        scale: Downscale factor of `mask`
+        width: Page width at full resolution
+        height: Page height at full resolution
 
-    # Threshold to find content
-    _, binary = cv2.threshold(gray_small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    Returns:
+        Dictionary with x, y, width, height of content region (full-resolution
+        pixels), or None if detection fails
+    """
+    # Copied: the border is cleared below (and shared masks are read-only).
+    binary = mask.copy()
+    h, w = int(height), int(width)
 
     # Ignore a thin border so scanner edges/borders don't dominate the bounds.
     border = int(round(min(binary.shape[:2]) * 0.01))
@@ -454,6 +475,7 @@ def detect_content_bounds(
     }
 
 
+@timed
 def detect_page_characteristics(input_path: str) -> dict:
     """
     Full detection without processing - for UI preview.
@@ -464,16 +486,30 @@ def detect_page_characteristics(input_path: str) -> dict:
     Returns:
         Dictionary with all detection results
     """
-    image = cv2.imread(input_path)
-    if image is None:
-        raise ValueError(f"Failed to load image: {input_path}")
-
-    h, w = image.shape[:2]
+    # Every detector works on the analysis-scale grayscale image, so decode straight
+    # to that size (DCT-domain for JPEGs) instead of materializing the full raster.
+    info = probe_image(input_path)
+    w, h = info.width, info.height
+    image = load_grayscale(input_path, max_dim=ANALYSIS_MAX_DIM, info=info)
+    ctx = AnalysisContext(image)
+
+    bounds = detect_content_bounds(image, ctx=ctx)
+    if bounds is not None:
+        # Map analysis-scale bounds back to full-resolution pixels.
+        inv = float(w) / float(image.shape[1])
+        x = max(0, min(int(round(bounds["x"] * inv)), w - 1))
+        y = max(0, min(int(round(bounds["y"] * inv)), h - 1))
+        bounds = {
+            "x": x,
+            "y": y,
+            "width": max(1, min(int(round(bounds["width"] * inv)), w - x)),
+            "height": max(1, min(int(round(bounds["height"] * inv)), h - y)),
+        }
 
     return {
         "size": {"width": w, "height": h},
-        "facing_pages": detect_facing_pages(image),
-        "skew_angle": detect_skew_angle(image),
-        "curvature_score": detect_curvature(image),
-        "content_bounds": detect_content_bounds(image),
+        "facing_pages": detect_facing_pages(image, ctx=ctx),
+        "skew_angle": detect_skew_angle(image, ctx=ctx),
+        "curvature_score": detect_curvature(image, ctx=ctx),
+        "content_bounds": bounds,
     }
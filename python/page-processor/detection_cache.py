@@ -0,0 +1,233 @@
+"""
+Detection Cache
+
+Persists detection results on disk so repeated `detect` calls on the same page
+return without decoding or analysing the raster again.
+
+Entries are keyed by a hash of the input file's content plus the stage name,
+the options that affect that stage, the page-processor version and
+DETECTION_SCHEMA, so editing the file, changing an option, upgrading the tool
+or changing a detector never serves stale results.
+The directory is size-bounded with least-recently-used eviction (access time is
+tracked through file mtimes).
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Revision of the detectors' output. Bump it whenever a detector can return a
+# different result for the same page and options (algorithm, sign or rotation
+# convention, result fields), so cached results from older code are missed.
+# 2: projection-profile deskew, Hough skew sign fix, clockwise rotation.
+# 3: rotation direction noise floor.
+DETECTION_SCHEMA = 3
+
+# Content digests of files already hashed by this process, keyed by
+# (path, size, mtime); keeps repeated lookups in `serve` mode free of I/O.
+_digest_memo: dict[tuple, str] = {}
+
+
+def default_cache_dir() -> str:
+    """
+    Cache directory: $PAGE_PROCESSOR_CACHE_DIR, else the platform's user cache dir.
+    """
+    env_dir = os.environ.get("PAGE_PROCESSOR_CACHE_DIR")
+    if env_dir:
+        return env_dir
+
+    if sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    elif sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return str(base / "page-processor" / "detect")
+
+
+def _default_max_bytes() -> int:
+    try:
+        return int(float(os.environ["PAGE_PROCESSOR_CACHE_MAX_MB"]) * 1024 * 1024)
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_BYTES
+
+
+def file_digest(path: str) -> str:
+    """
+    Content hash of a file (BLAKE2b, 128-bit).
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    cached = _digest_memo.get(memo_key)
+    if cached is not None:
+        return cached
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            h.update(chunk)
+    digest = h.hexdigest()
+    _digest_memo[memo_key] = digest
+    return digest
+
+
+class DetectionCache:
+    """
+    Size-bounded on-disk cache of detection results (one JSON file per entry).
+
+    All operations are best-effort: I/O problems are treated as a cache miss
+    and never fail the detection itself.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.version = version
+        self.cache_dir = Path(cache_dir or default_cache_dir())
+        self.max_bytes = int(max_bytes) if max_bytes is not None else _default_max_bytes()
+
+    def key(self, input_path: str, stage: str, options: Optional[dict] = None) -> str:
+        """
+        Cache key for a detection run.
+
+        Args:
+            input_path: Input image path (hashed by content, not by name)
+            stage: Stage name (or another label for non-stage detection)
+            options: Options that influence the result
+
+        Returns:
+            Hex key
+        """
+        material = json.dumps(
+            {
+                "version": self.version,
+                "schema": DETECTION_SCHEMA,
+                "stage": stage,
+                "options": options or {},
+                "content": file_digest(input_path),
+            },
+            sort_keys=True,
+        )
+        return hashlib.blake2b(material.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Truncated/corrupt entry: drop it and recompute.
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        # Mark as recently used for LRU eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key: str, result: dict):
+        """Store `result` under `key`, then evict old entries beyond the size cap."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(result, f)
+                # Atomic publish: concurrent readers never see a partial entry.
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except (OSError, TypeError, ValueError):
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits in `max_bytes`."""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        except OSError:
+            return
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+    def get_or_compute(self, input_path: str, stage: str, options: Optional[dict], compute) -> dict:
+        """
+        Return the cached result, or run `compute()` and cache its result.
+
+        Args:
+            input_path: Input image path
+            stage: Stage name
+            options: Options that influence the result
+            compute: Zero-argument callable producing the result dict
+
+        Returns:
+            Detection result dictionary
+        """
+        try:
+            key = self.key(input_path, stage, options)
+        except OSError:
+            # Unreadable input: let the detector raise its usual error.
+            return compute()
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        result = compute()
+        self.put(key, result)
+        return result
@@ -0,0 +1,133 @@
+"""
+Document Processing
+
+Processes the pages of one document (book) in sequence, carrying layout priors
+from page to page.
+
+Pages of one book share gutter position, trim size and typical skew. A running
+model of recent pages turns that into DocumentPriors for the next page, so
+facing-page detection can be skipped and gutter search narrowed, with the full
+per-page analysis as fallback when a page does not fit the model.
+"""
+
+from collections import deque
+from statistics import median
+from typing import Callable, Optional
+
+from processor import DocumentPriors, PageProcessor
+from writer import PendingPage
+
+
+class DocumentModel:
+    """
+    Running layout model over the most recent pages.
+
+    Args:
+        history: Number of recent pages the priors are computed from
+        min_agreeing: Consecutive pages that must agree on the facing-pages
+                      verdict before it is used as a prior
+        min_skews: Skew measurements needed before a skew prior is given
+    """
+
+    def __init__(self, history: int = 8, min_agreeing: int = 2, min_skews: int = 3):
+        self.min_agreeing = min_agreeing
+        self.min_skews = min_skews
+        self.layouts: deque[tuple[float, bool]] = deque(maxlen=history)
+        self.gutters: deque[float] = deque(maxlen=history)
+        self.skews: deque[float] = deque(maxlen=history)
+
+    def priors(self) -> Optional[DocumentPriors]:
+        """Priors for the next page (None until anything has been learned)."""
+        if not self.layouts:
+            return None
+
+        priors = DocumentPriors()
+
+        recent = list(self.layouts)[-self.min_agreeing:]
+        verdicts = {facing for _, facing in recent}
+        if len(recent) >= self.min_agreeing and len(verdicts) == 1:
+            priors.facing_pages = recent[-1][1]
+            priors.aspect_ratio = median(aspect for aspect, _ in recent)
+
+        if self.gutters:
+            priors.gutter_x_norm = median(self.gutters)
+
+        if len(self.skews) >= self.min_skews:
+            priors.skew_angle = median(self.skews)
+
+        return priors
+
+    def update(self, result: dict):
+        """Learn from one `PageProcessor.process` result."""
+        if not result.get("success"):
+            return
+
+        size = result.get("original_size") or {}
+        width = float(size.get("width") or 0)
+        height = float(size.get("height") or 0)
+        detection = result.get("detection") or {}
+        if width > 0 and height > 0:
+            self.layouts.append((width / height, bool(detection.get("was_facing_pages"))))
+
+        split_debug = result.get("split_debug")
+        if split_debug:
+            self.gutters.append(float(split_debug["gutter_x_norm"]))
+
+        # Only accepted (non-zero) estimates describe the book's skew; zero means "unsure".
+        for entry in result.get("deskew_debug") or []:
+            angle = float(entry.get("angle") or 0.0)
+            if angle != 0.0:
+                self.skews.append(angle)
+
+
+class DocumentProcessor:
+    """
+    PageProcessor wrapper for a sequence of pages from one document.
+
+    `process` and `submit` have the same signatures as on PageProcessor, so it
+    can be used anywhere a page processor is expected.
+    """
+
+    def __init__(self, processor: PageProcessor, model: Optional[DocumentModel] = None):
+        self.processor = processor
+        self.model = model or DocumentModel()
+
+    def process(
+        self,
+        input_path: str,
+        output_dir: str,
+        operations: list[str],
+        progress_callback: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """
+        Process the next page of the document.
+
+        Args:
+            input_path: Path to input image
+            output_dir: Directory for output files
+            operations: List of operations to perform
+            progress_callback: Function to call with progress updates
+
+        Returns:
+            PageProcessor result; `prior_usage` reports which priors applied
+        """
+        return self.submit(input_path, output_dir, operations, progress_callback).wait()
+
+    def submit(
+        self,
+        input_path: str,
+        output_dir: str,
+        operations: list[str],
+        progress_callback: Optional[Callable[[dict], None]] = None,
+    ) -> PendingPage:
+        """Like `process`, but returns before the outputs are written (see PageProcessor.submit)."""
+        pending = self.processor.submit(
+            input_path=input_path,
+            output_dir=output_dir,
+            operations=operations,
+            progress_callback=progress_callback,
+            priors=self.model.priors(),
+        )
+        # Layout is known once processing is done; no need to wait for the writes.
+        self.model.update(pending.result)
+        return pending
@@ -9,14 +9,18 @@ Processes scanned book page images with:
 - Content detection and margin cropping
 
 Usage:
-    page-processor process <input_image> <output_dir> [options]
-    page-processor detect <input_image>
-    page-processor detect <stage> <input_image>
+    page-processor process <input_image> <output_dir> [--output-format png|raw] [options]
+    page-processor batch <input_or_dir> [...] --output-dir <dir> [--jobs <n>] [--document] [options]
+    page-processor batch --manifest <pages.ndjson> [--output-dir <dir>] [options]
+    page-processor detect <input_image> [--no-cache] [--cache-dir <dir>]
+    page-processor detect <stage> <input_image> [--no-cache] [--cache-dir <dir>]
     page-processor apply <stage> <input_image> <output> --params <json>
     page-processor pad <input_image> <output_image> --width <px> --height <px>
     page-processor img2pdf <input_image> <output_pdf> [--dpi <dpi>]
-    page-processor img2pdf-pages <output_pdf> <image1> [image2 ...] [--dpi <dpi>]
+    page-processor img2pdf-pages <output_pdf> <image1> [image2 ...] [--dpi <dpi>] [--reencode <mode>] [--jobs <n>] [--stream]
+    page-processor serve
     page-processor --version
+    page-processor [--profile <path>] [--memory] <command> [...]
 
 Stages:
     rotation  - Detect/apply page orientation (0/90/180/270)
@@ -28,37 +32,113 @@ Communication:
     - Progress: JSON lines to stdout
     - Errors: stderr
     - Results: JSON file in output directory
+
+Detection cache:
+    `detect` results are cached on disk, keyed by the input file's content hash,
+    the stage, its options, the tool version and the detector revision
+    (detection_cache.DETECTION_SCHEMA). The directory defaults to the
+    user cache dir (override with --cache-dir or PAGE_PROCESSOR_CACHE_DIR) and is
+    capped at PAGE_PROCESSOR_CACHE_MAX_MB (default 64) with LRU eviction.
+
+Large scans:
+    Pages of at least PAGE_PROCESSOR_TILE_PIXELS source pixels (default 100 MP)
+    are rendered and PNG-encoded in horizontal strips, so memory stays close to
+    the decoded source instead of several full-size frames.
+
+Raw buffers:
+    Wherever an input image path is expected, a `raw:` handle may be passed
+    instead: `raw:` plus a JSON header (inline or a .json file path) describing
+    decoded pixels in POSIX shared memory or a memory-mapped file:
+
+        raw:{"storage": "shm", "name": "pp-1", "shape": [1600, 1200, 4], "dtype": "uint8",
+             "strides": [4800, 4, 1], "offset": 0, "channels": "rgba"}
+
+    `process --output-format raw` (and `apply` with a `raw:{"storage": "shm"}`
+    output) return such handles instead of PNG paths, skipping image codecs.
+    Input buffers are only read; output buffers belong to the caller, who
+    unlinks them after use. Detection results for raw inputs are not cached.
+
+Profiling:
+    Every result carries `timings`: the total and the milliseconds of each span
+    (stage functions, their sub-steps and the main OpenCV calls), keyed by
+    slash-separated path. `--profile <path>` (before the command, also inside a
+    `serve` request's argv) runs the command under cProfile and writes
+    <path>.pstats plus the nested span tree as <path>.spans.json. Work done in
+    worker processes (batch, img2pdf-pages --jobs) is not profiled.
+
+    `--memory` adds a `memory` object: peak RSS (sampled), tracemalloc's peak of
+    Python/NumPy allocations and the large buffers still held, per stage. For
+    `process` the stages are load, detect, split, deskew_dewarp, crop,
+    normalize, render and save (next to `timings_ms`); any other command is a
+    single stage named after it (e.g. `detect.deskew`).
+
+Serve mode:
+    `serve` keeps the interpreter (and OpenCV/NumPy) warm across jobs. It prints a
+    `{"type": "ready"}` line, then reads one JSON request per line from stdin:
+
+        {"id": "42", "argv": ["detect", "deskew", "/tmp/page.png"]}
+
+    `argv` accepts any command line the one-shot CLI accepts (except `serve`,
+    `--help` and `--version`).
+    Every progress/result/error line written for that request carries the same
+    `id`; errors go to stdout so they can be correlated. The loop ends on EOF.
 """
 
 import argparse
+import contextlib
 import json
 import sys
 import os
-from pathlib import Path
 from typing import Optional
 
 VERSION = "2.0.0"
 
 STAGES = ['rotation', 'split', 'deskew', 'dewarp']
 
+# Options that influence each stage's detection result (and therefore its cache key).
+STAGE_DETECT_OPTIONS = {
+    'rotation': [],
+    'split': ['min_confidence'],
+    'deskew': ['min_angle', 'max_angle'],
+    'dewarp': ['min_curvature'],
+}
+
+
+# Request id of the `serve` request currently being handled (None in one-shot mode).
+_request_id: Optional[str] = None
+
+
+class CommandError(Exception):
+    """A command failed with a machine-readable error code."""
+
+    def __init__(self, message: str, code: str = "UNKNOWN_ERROR"):
+        super().__init__(message)
+        self.code = code
+
+
+def _tag(data: dict) -> dict:
+    if _request_id is None:
+        return data
+    return {"id": _request_id, **data}
+
 
 def send_progress(data: dict):
     """Send progress update as JSON line to stdout."""
-    print(json.dumps({"type": "progress", **data}), flush=True)
+    print(json.dumps(_tag({"type": "progress", **data})), flush=True)
 
 
 def send_result(data: dict):
     """Send result as JSON line to stdout."""
-    print(json.dumps({"type": "result", **data}), flush=True)
+    print(json.dumps(_tag({"type": "result", **data})), flush=True)
 
 
 def send_error(message: str, code: str = "UNKNOWN_ERROR"):
-    """Send error to stderr."""
-    print(json.dumps({
+    """Send error to stderr (stdout while serving, so it can be matched to its request)."""
+    print(json.dumps(_tag({
         "type": "error",
         "message": message,
         "code": code
-    }), file=sys.stderr, flush=True)
+    })), file=sys.stderr if _request_id is None else sys.stdout, flush=True)
 
 
 def process_image(
@@ -88,6 +168,9 @@ def process_image(
         crop_padding=options.get('crop_padding', 30),
         auto_detect=options.get('auto_detect', True),
         force_split=options.get('force_split', False),
+        output_format=options.get('output_format', 'png'),
+        raw_storage=options.get('raw_storage', 'shm'),
+        track_memory=options.get('track_memory', False),
     )
 
     send_progress({
@@ -105,17 +188,23 @@ def process_image(
     return result
 
 
-def detect_characteristics(input_path: str) -> dict:
+def detect_characteristics(input_path: str, cache=None) -> dict:
     """
     Detect page characteristics without processing.
 
     Returns detection results for UI preview.
     """
-    from detection import detect_page_characteristics
-    return detect_page_characteristics(input_path)
+    def compute() -> dict:
+        from detection import detect_page_characteristics
+        return detect_page_characteristics(input_path)
+
+    if cache is None or input_path.startswith('raw:'):
+        return compute()
+    # Cache hits never import OpenCV.
+    return cache.get_or_compute(input_path, 'characteristics', None, compute)
 
 
-def run_stage_detect(stage: str, input_path: str, options: dict) -> dict:
+def run_stage_detect(stage: str, input_path: str, options: dict, cache=None) -> dict:
     """
     Run detection for a specific stage.
 
@@ -123,10 +212,22 @@ def run_stage_detect(stage: str, input_path: str, options: dict) -> dict:
         stage: Stage name (rotation, split, deskew, dewarp)
         input_path: Path to input image
         options: Stage-specific options
+        cache: DetectionCache to consult/populate (None = always detect)
 
     Returns:
         Detection result dictionary
     """
+    # Raw buffers are mutable shared memory, not content-addressable files.
+    if cache is None or stage not in STAGE_DETECT_OPTIONS or input_path.startswith('raw:'):
+        return _detect_stage(stage, input_path, options)
+
+    key_options = {name: options.get(name) for name in STAGE_DETECT_OPTIONS[stage]}
+    return cache.get_or_compute(
+        input_path, stage, key_options, lambda: _detect_stage(stage, input_path, options),
+    )
+
+
+def _detect_stage(stage: str, input_path: str, options: dict) -> dict:
     if stage == 'rotation':
         from stages.rotation import detect_rotation
         result = detect_rotation(input_path)
@@ -199,12 +300,261 @@ def run_stage_apply(
         raise ValueError(f"Unknown stage: {stage}")
 
 
-def main():
+def pad_image(input_path: str, output_path: str, width: int, height: int) -> dict:
+    """
+    Pad an image to a target canvas size (symmetric white padding, no scaling/cropping).
+
+    Args:
+        input_path: Path to input image
+        output_path: Path for output image
+        width: Target width in pixels
+        height: Target height in pixels
+
+    Returns:
+        Result dictionary with input/output sizes
+    """
+    # Keep this import local so `--version` and other lightweight commands stay fast.
+    import cv2  # type: ignore
+    import numpy as np  # type: ignore
+
+    from stages.profiling import span
+
+    with span('cv2.imread'):
+        image = cv2.imread(input_path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise CommandError(f"Failed to load image: {input_path}", "LOAD_FAILED")
+
+    h, w = image.shape[:2]
+    target_w = int(width)
+    target_h = int(height)
+    if target_w <= 0 or target_h <= 0:
+        raise CommandError("Target width/height must be positive", "INVALID_TARGET")
+    if w > target_w or h > target_h:
+        raise CommandError(
+            f"Target size too small: input={w}x{h}, target={target_w}x{target_h}",
+            "TARGET_TOO_SMALL",
+        )
+
+    # Match channel count; always white padding.
+    if len(image.shape) == 3:
+        canvas = np.full((target_h, target_w, image.shape[2]), 255, dtype=image.dtype)
+    else:
+        canvas = np.full((target_h, target_w), 255, dtype=image.dtype)
+
+    x_off = max(0, (target_w - w) // 2)
+    y_off = max(0, (target_h - h) // 2)
+    canvas[y_off:y_off + h, x_off:x_off + w] = image
+
+    # Use the same env-driven PNG compression as the legacy processor.
+    try:
+        png_compression = int(os.environ.get("PAGE_PROCESSOR_PNG_COMPRESSION", "1"))
+    except Exception:
+        png_compression = 1
+    png_compression = max(0, min(9, png_compression))
+
+    with span('cv2.imwrite'):
+        ok = cv2.imwrite(
+            output_path,
+            canvas,
+            [cv2.IMWRITE_PNG_COMPRESSION, png_compression],
+        )
+    if not ok:
+        raise CommandError(f"Failed to write output image: {output_path}", "WRITE_FAILED")
+
+    return {
+        "success": True,
+        "input_path": input_path,
+        "output_path": output_path,
+        "input_size": {"width": int(w), "height": int(h)},
+        "output_size": {"width": int(target_w), "height": int(target_h)},
+    }
+
+
+def image_to_pdf(input_path: str, output_path: str, dpi: int = 300) -> dict:
+    """
+    Wrap an image into a single-page PDF (lossless).
+
+    Args:
+        input_path: Path to input image
+        output_path: Path for output PDF
+        dpi: Assumed DPI for page size
+
+    Returns:
+        Result dictionary
+    """
+    # Keep this import local to avoid penalizing non-PDF workflows.
+    import img2pdf  # type: ignore
+
+    from stages.profiling import span
+
+    dpi = int(dpi or 300)
+    if dpi <= 0:
+        raise CommandError("DPI must be positive", "INVALID_DPI")
+
+    # img2pdf needs a (x_dpi, y_dpi) tuple.
+    layout_fun = img2pdf.get_fixed_dpi_layout_fun((dpi, dpi))
+
+    try:
+        with open(output_path, "wb") as f, span('img2pdf.convert'):
+            img2pdf.convert(input_path, outputstream=f, layout_fun=layout_fun)
+    except Exception as e:
+        raise CommandError(f"img2pdf failed: {e}", "IMG2PDF_FAILED") from e
+
+    return {
+        "success": True,
+        "input_path": input_path,
+        "output_path": output_path,
+        "dpi": dpi,
+    }
+
+
+def images_to_pdf(
+    output_path: str,
+    images: list[str],
+    dpi: int = 300,
+    reencode: str = "none",
+    jpeg_quality: int = 95,
+    jpeg_subsampling: int = 0,
+    jobs: Optional[int] = None,
+    stream: bool = False,
+) -> dict:
+    """
+    Convert images to a multi-page PDF, optionally re-encoding each page first.
+
+    Args:
+        output_path: Path for output PDF
+        images: Input image paths, one per page
+        dpi: Assumed DPI for page size
+        reencode: 'none', 'jpeg', 'ccitt' or 'auto' (chosen per page by content)
+        jpeg_quality: JPEG quality for JPEG output
+        jpeg_subsampling: JPEG chroma subsampling for JPEG output
+        jobs: Re-encoding worker processes (default: CPU count)
+        stream: Write pages to the PDF one at a time as they are re-encoded
+                (constant memory) instead of assembling the document with img2pdf
+
+    Returns:
+        Result dictionary; `pages` gives each page's encoding and embedded bytes
+    """
+    import tempfile
+
+    from pdf_export import reencode_pages
+    from stages.profiling import span
+
+    dpi = int(dpi or 300)
+    if dpi <= 0:
+        raise CommandError("DPI must be positive", "INVALID_DPI")
+
+    if not images:
+        raise CommandError("At least one image is required", "MISSING_INPUT")
+
+    page_reports: list[dict] = []
+    try:
+        tmp_dir: Optional[tempfile.TemporaryDirectory[str]] = None
+        try:
+            if reencode and reencode != "none":
+                tmp_dir = tempfile.TemporaryDirectory(prefix="pp-img2pdf-")
+                pages = reencode_pages(
+                    images,
+                    reencode,
+                    tmp_dir.name,
+                    jobs=jobs,
+                    jpeg_quality=jpeg_quality,
+                    jpeg_subsampling=jpeg_subsampling,
+                )
+            else:
+                pages = reencode_pages(images, "none", "")
+
+            def page_paths():
+                for index in range(len(images)):
+                    # Only the wait for the page is timed, not the PDF writing between pages.
+                    with span('reencode_pages'):
+                        page = next(pages)
+                    entry = {"input": images[index], "mode": page["mode"], "bytes": page["bytes"]}
+                    if "classification" in page:
+                        entry["classification"] = page["classification"]
+                    page_reports.append(entry)
+                    yield page["path"]
+
+            if stream:
+                from pdf_stream import write_pdf_stream
+
+                def drop_temp(index: int, path: str):
+                    # Re-encoded copies are not needed once embedded; keeps temp space flat too.
+                    if path != images[index]:
+                        os.unlink(path)
+
+                write_pdf_stream(output_path, page_paths(), dpi, on_page=drop_temp)
+            else:
+                import img2pdf  # type: ignore
+
+                # img2pdf needs every input up front.
+                inputs = list(page_paths())
+                layout_fun = img2pdf.get_fixed_dpi_layout_fun((dpi, dpi))
+                with open(output_path, "wb") as f, span('img2pdf.convert'):
+                    img2pdf.convert(*inputs, outputstream=f, layout_fun=layout_fun)
+        finally:
+            if tmp_dir is not None:
+                tmp_dir.cleanup()
+    except Exception as e:
+        label = "PDF stream writer" if stream else "img2pdf"
+        raise CommandError(f"{label} failed: {e}", "IMG2PDF_FAILED") from e
+
+    return {
+        "success": True,
+        "output_path": output_path,
+        "inputs": list(images),
+        "dpi": dpi,
+        "reencode": reencode or "none",
+        "stream": bool(stream),
+        "pages": page_reports,
+        "pdf_bytes": os.path.getsize(output_path),
+    }
+
+
+def _add_process_options(parser: argparse.ArgumentParser):
+    """Options shared by `process` and `batch`."""
+    parser.add_argument(
+        '--operations',
+        nargs='+',
+        choices=['split', 'deskew', 'dewarp', 'crop'],
+        default=['split', 'deskew', 'dewarp', 'crop'],
+        help='Operations to perform',
+    )
+    parser.add_argument('--force-split', action='store_true', help='Force page splitting')
+    parser.add_argument('--no-auto-detect', action='store_true', help='Disable auto-detection')
+    parser.add_argument('--min-skew-angle', type=float, default=0.5, help='Minimum skew angle')
+    parser.add_argument('--min-curvature', type=float, default=0.1, help='Minimum curvature')
+    parser.add_argument('--crop-padding', type=int, default=30, help='Crop padding in pixels')
+
+
+def _process_options(args: argparse.Namespace) -> dict:
+    return {
+        'force_split': args.force_split,
+        'auto_detect': not args.no_auto_detect,
+        'min_skew_angle': args.min_skew_angle,
+        'min_curvature': args.min_curvature,
+        'crop_padding': args.crop_padding,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser (shared by one-shot mode and `serve` requests)."""
     parser = argparse.ArgumentParser(
+        prog='page-processor',
         description="Page Processor for scanned book pages",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     parser.add_argument('--version', action='version', version=f'page-processor {VERSION}')
+    parser.add_argument(
+        '--profile',
+        metavar='PATH',
+        help='Run the command under cProfile; write PATH.pstats and the span tree to PATH.spans.json',
+    )
+    parser.add_argument(
+        '--memory',
+        action='store_true',
+        help='Report peak RSS and traced allocations (per pipeline stage for process) in the result',
+    )
 
     subparsers = parser.add_subparsers(dest='command', required=True)
 
@@ -213,17 +563,42 @@ def main():
     process_parser.add_argument('input', help='Input image path')
     process_parser.add_argument('output_dir', help='Output directory')
     process_parser.add_argument(
-        '--operations',
-        nargs='+',
-        choices=['split', 'deskew', 'dewarp', 'crop'],
-        default=['split', 'deskew', 'dewarp', 'crop'],
-        help='Operations to perform',
+        '--output-format',
+        choices=['png', 'raw'],
+        default='png',
+        help='png files, or raw pixel buffers returned as raw: handles (default: png)',
+    )
+    process_parser.add_argument(
+        '--raw-storage',
+        choices=['shm', 'mmap'],
+        default='shm',
+        help='Raw output storage: shared memory segments or .raw files in output_dir (default: shm)',
     )
-    process_parser.add_argument('--force-split', action='store_true', help='Force page splitting')
-    process_parser.add_argument('--no-auto-detect', action='store_true', help='Disable auto-detection')
-    process_parser.add_argument('--min-skew-angle', type=float, default=0.5, help='Minimum skew angle')
-    process_parser.add_argument('--min-curvature', type=float, default=0.1, help='Minimum curvature')
-    process_parser.add_argument('--crop-padding', type=int, default=30, help='Crop padding in pixels')
+    _add_process_options(process_parser)
+
+    # Batch command - many pages across a pool of worker processes
+    batch_parser = subparsers.add_parser('batch', help='Process many images in parallel')
+    batch_parser.add_argument('inputs', nargs='*', help='Input image paths or directories')
+    batch_parser.add_argument('--manifest', help='NDJSON manifest ({"input": ..., "output_dir": ...} per line)')
+    batch_parser.add_argument('--output-dir', help='Output directory (default for manifest lines)')
+    batch_parser.add_argument('--jobs', type=int, default=0, help='Worker processes (default: CPU count)')
+    batch_parser.add_argument(
+        '--unordered',
+        action='store_true',
+        help='Report pages as they complete instead of in input order',
+    )
+    batch_parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=0,
+        help='Max pages submitted but not yet reported (default: 2 x jobs)',
+    )
+    batch_parser.add_argument(
+        '--document',
+        action='store_true',
+        help='Inputs are pages of one book: reuse gutter/skew/layout priors between pages',
+    )
+    _add_process_options(batch_parser)
 
     # Detect command - with optional stage argument
     detect_parser = subparsers.add_parser('detect', help='Detect page characteristics or run stage detection')
@@ -233,6 +608,11 @@ def main():
     detect_parser.add_argument('--min-angle', type=float, default=0.5, help='Min deskew angle')
     detect_parser.add_argument('--max-angle', type=float, default=15.0, help='Max deskew angle')
     detect_parser.add_argument('--min-curvature', type=float, default=0.1, help='Min dewarp curvature')
+    detect_parser.add_argument(
+        '--cache-dir',
+        help='Detection cache directory (default: $PAGE_PROCESSOR_CACHE_DIR or the user cache dir)',
+    )
+    detect_parser.add_argument('--no-cache', action='store_true', help='Always re-run detection')
 
     # Apply command
     apply_parser = subparsers.add_parser('apply', help='Apply stage transformation')
@@ -242,7 +622,7 @@ def main():
     apply_parser.add_argument('--params', type=str, required=True, help='JSON parameters')
 
     # List-stages command
-    list_parser = subparsers.add_parser('list-stages', help='List available stages')
+    subparsers.add_parser('list-stages', help='List available stages')
 
     # Pad command - symmetric white padding to a target canvas size (no scaling/cropping)
     pad_parser = subparsers.add_parser('pad', help='Pad an image to a target size (symmetric, white)')
@@ -263,327 +643,305 @@ def main():
     img2pdf_pages_parser.add_argument('--dpi', type=int, default=300, help='Assumed DPI for page size (default: 300)')
     img2pdf_pages_parser.add_argument(
         '--reencode',
-        choices=['none', 'jpeg', 'ccitt'],
+        choices=['none', 'jpeg', 'ccitt', 'auto'],
         default='none',
-        help='Optional re-encoding for smaller scanned PDFs (default: none)',
+        help='Optional re-encoding for smaller scanned PDFs; auto picks per page (default: none)',
     )
     img2pdf_pages_parser.add_argument(
         '--jpeg-quality',
         type=int,
         default=95,
-        help='JPEG quality when --reencode=jpeg (default: 95)',
+        help='JPEG quality for JPEG output (default: 95)',
     )
     img2pdf_pages_parser.add_argument(
         '--jpeg-subsampling',
         type=int,
         default=0,
-        help='JPEG chroma subsampling when --reencode=jpeg (0=4:4:4, default: 0)',
+        help='JPEG chroma subsampling for JPEG output (0=4:4:4, default: 0)',
+    )
+    img2pdf_pages_parser.add_argument(
+        '--jobs',
+        type=int,
+        default=0,
+        help='Re-encoding worker processes (default: CPU count)',
+    )
+    img2pdf_pages_parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Write pages one at a time as they are ready (constant memory for long documents)',
     )
 
-    args = parser.parse_args()
-
-    try:
-        if args.command == 'process':
-            os.makedirs(args.output_dir, exist_ok=True)
+    # Serve command - persistent worker reading NDJSON requests from stdin.
+    subparsers.add_parser('serve', help='Serve NDJSON requests from stdin (keeps dependencies warm)')
 
-            options = {
-                'force_split': args.force_split,
-                'auto_detect': not args.no_auto_detect,
-                'min_skew_angle': args.min_skew_angle,
-                'min_curvature': args.min_curvature,
-                'crop_padding': args.crop_padding,
-            }
+    return parser
 
-            result = process_image(
-                input_path=args.input,
-                output_dir=args.output_dir,
-                operations=args.operations,
-                options=options,
-            )
-
-            send_result(result)
-
-        elif args.command == 'detect':
-            # Check if first arg is a stage name or an input file
-            if args.stage_or_input in STAGES:
-                # Stage-specific detection
-                stage = args.stage_or_input
-                input_path = args.input
-
-                if not input_path:
-                    send_error(f"Input path required for stage detection", "MISSING_INPUT")
-                    sys.exit(1)
-
-                options = {
-                    'min_confidence': args.min_confidence,
-                    'min_angle': args.min_angle,
-                    'max_angle': args.max_angle,
-                    'min_curvature': args.min_curvature,
-                }
-
-                result = run_stage_detect(stage, input_path, options)
-                send_result({
-                    'stage': stage,
-                    **result
-                })
 
-            else:
-                # Legacy full detection (first arg is input path)
-                input_path = args.stage_or_input
-                result = detect_characteristics(input_path)
-                send_result(result)
+def _command_label(args: argparse.Namespace) -> str:
+    """Command name, with the stage for stage commands (e.g. `detect.deskew`)."""
+    if args.command == 'apply':
+        return f"apply.{args.stage}"
+    if args.command == 'detect' and args.stage_or_input in STAGES:
+        return f"detect.{args.stage_or_input}"
+    return args.command
 
-        elif args.command == 'apply':
-            # Parse params JSON
-            try:
-                params = json.loads(args.params)
-            except json.JSONDecodeError as e:
-                send_error(f"Invalid JSON params: {e}", "INVALID_PARAMS")
-                sys.exit(1)
-
-            result = run_stage_apply(
-                stage=args.stage,
-                input_path=args.input,
-                output_path=args.output,
-                params=params,
-            )
-
-            send_result({
-                'stage': args.stage,
-                **result
-            })
 
-        elif args.command == 'list-stages':
-            send_result({
-                'stages': STAGES,
-                'version': VERSION,
-            })
+def run_command(args: argparse.Namespace) -> dict:
+    """
+    Execute a parsed command and return its result payload.
 
-        elif args.command == 'pad':
-            # Keep this import local so `--version` and other lightweight commands stay fast.
-            import cv2  # type: ignore
-            import numpy as np  # type: ignore
-
-            image = cv2.imread(args.input, cv2.IMREAD_UNCHANGED)
-            if image is None:
-                send_error(f"Failed to load image: {args.input}", "LOAD_FAILED")
-                sys.exit(1)
-
-            h, w = image.shape[:2]
-            target_w = int(args.width)
-            target_h = int(args.height)
-            if target_w <= 0 or target_h <= 0:
-                send_error("Target width/height must be positive", "INVALID_TARGET")
-                sys.exit(1)
-            if w > target_w or h > target_h:
-                send_error(
-                    f"Target size too small: input={w}x{h}, target={target_w}x{target_h}",
-                    "TARGET_TOO_SMALL",
-                )
-                sys.exit(1)
+    Progress lines are streamed as the command runs; the caller sends the result.
+    The payload gets a `timings` object (total and per-span milliseconds),
+    with --profile a `profile` object naming the files written, and with
+    --memory a `memory` object.
 
-            # Match channel count; always white padding.
-            if len(image.shape) == 3:
-                canvas = np.full((target_h, target_w, image.shape[2]), 255, dtype=image.dtype)
-            else:
-                canvas = np.full((target_h, target_w), 255, dtype=image.dtype)
+    Raises:
+        CommandError: For expected failures with a specific error code
+    """
+    from contextlib import nullcontext
+
+    from stages.profiling import Profile
+
+    # `process` measures memory per pipeline stage itself; other commands are one stage.
+    probe = None
+    if args.memory and args.command != 'process':
+        from stages.memory import MemoryProbe
+        probe = MemoryProbe()
+
+    profile_path = args.profile
+    with Profile(args.command, cprofile=bool(profile_path)) as profile, probe or nullcontext():
+        result = _run_command(args)
+        if probe is not None:
+            probe.checkpoint(_command_label(args))
+            result = {**result, "memory": probe.report()}
+
+    result = {**result, "timings": profile.timings()}
+    if profile_path:
+        try:
+            result["profile"] = profile.dump(profile_path)
+        except OSError as e:
+            raise CommandError(f"Failed to write profile: {e}", "PROFILE_FAILED") from e
+    return result
 
-            x_off = max(0, (target_w - w) // 2)
-            y_off = max(0, (target_h - h) // 2)
-            canvas[y_off:y_off + h, x_off:x_off + w] = image
 
-            # Use the same env-driven PNG compression as the legacy processor.
+def _run_command(args: argparse.Namespace) -> dict:
+    if args.command == 'process':
+        os.makedirs(args.output_dir, exist_ok=True)
+
+        return process_image(
+            input_path=args.input,
+            output_dir=args.output_dir,
+            operations=args.operations,
+            options={
+                **_process_options(args),
+                'output_format': args.output_format,
+                'raw_storage': args.raw_storage,
+                'track_memory': args.memory,
+            },
+        )
+
+    elif args.command == 'batch':
+        from batch import items_from_inputs, load_manifest, run_batch
+
+        if args.manifest:
+            if args.inputs:
+                raise CommandError("Pass either input paths or --manifest, not both", "INVALID_ARGS")
             try:
-                png_compression = int(os.environ.get("PAGE_PROCESSOR_PNG_COMPRESSION", "1"))
-            except Exception:
-                png_compression = 1
-            png_compression = max(0, min(9, png_compression))
-
-            ok = cv2.imwrite(
-                args.output,
-                canvas,
-                [cv2.IMWRITE_PNG_COMPRESSION, png_compression],
-            )
-            if not ok:
-                send_error(f"Failed to write output image: {args.output}", "WRITE_FAILED")
-                sys.exit(1)
-
-            send_result({
-                "success": True,
-                "input_path": args.input,
-                "output_path": args.output,
-                "input_size": {"width": int(w), "height": int(h)},
-                "output_size": {"width": int(target_w), "height": int(target_h)},
+                items = load_manifest(args.manifest, args.output_dir)
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e), "INVALID_MANIFEST") from e
+        else:
+            if not args.output_dir:
+                raise CommandError("--output-dir is required with input paths", "MISSING_OUTPUT")
+            items = items_from_inputs(args.inputs, args.output_dir)
+
+        if not items:
+            raise CommandError("No input images", "MISSING_INPUT")
+
+        def on_page(result: dict):
+            send_progress({
+                "stage": "page_done",
+                "message": f"Processed {result.get('input_path')}",
+                "total": len(items),
+                "result": result,
             })
 
-        elif args.command == 'img2pdf':
-            # Keep this import local to avoid penalizing non-PDF workflows.
-            import img2pdf  # type: ignore
+        return run_batch(
+            items,
+            operations=args.operations,
+            options={**_process_options(args), 'document': args.document},
+            jobs=args.jobs or None,
+            ordered=not args.unordered,
+            max_in_flight=args.max_in_flight or None,
+            on_result=on_page,
+        )
+
+    elif args.command == 'detect':
+        cache = None
+        if not args.no_cache:
+            from detection_cache import DetectionCache
+            cache = DetectionCache(VERSION, cache_dir=args.cache_dir)
+
+        # Check if first arg is a stage name or an input file
+        if args.stage_or_input in STAGES:
+            # Stage-specific detection
+            stage = args.stage_or_input
+            input_path = args.input
+
+            if not input_path:
+                raise CommandError("Input path required for stage detection", "MISSING_INPUT")
 
-            dpi = int(args.dpi or 300)
-            if dpi <= 0:
-                send_error("DPI must be positive", "INVALID_DPI")
-                sys.exit(1)
+            options = {
+                'min_confidence': args.min_confidence,
+                'min_angle': args.min_angle,
+                'max_angle': args.max_angle,
+                'min_curvature': args.min_curvature,
+            }
 
-            # img2pdf needs a (x_dpi, y_dpi) tuple.
-            layout_fun = img2pdf.get_fixed_dpi_layout_fun((dpi, dpi))
+            result = run_stage_detect(stage, input_path, options, cache=cache)
+            return {
+                'stage': stage,
+                **result
+            }
+
+        # Legacy full detection (first arg is input path)
+        return detect_characteristics(args.stage_or_input, cache=cache)
+
+    elif args.command == 'apply':
+        # Parse params JSON
+        try:
+            params = json.loads(args.params)
+        except json.JSONDecodeError as e:
+            raise CommandError(f"Invalid JSON params: {e}", "INVALID_PARAMS") from e
+
+        if args.stage == 'split' and args.output.startswith('raw:'):
+            raise CommandError("split writes to an output directory; raw output is not supported", "INVALID_ARGS")
+
+        result = run_stage_apply(
+            stage=args.stage,
+            input_path=args.input,
+            output_path=args.output,
+            params=params,
+        )
+
+        return {
+            'stage': args.stage,
+            **result
+        }
+
+    elif args.command == 'list-stages':
+        return {
+            'stages': STAGES,
+            'version': VERSION,
+        }
+
+    elif args.command == 'pad':
+        return pad_image(args.input, args.output, args.width, args.height)
+
+    elif args.command == 'img2pdf':
+        return image_to_pdf(args.input, args.output, args.dpi)
+
+    elif args.command == 'img2pdf-pages':
+        return images_to_pdf(
+            output_path=args.output,
+            images=args.images,
+            dpi=args.dpi,
+            reencode=args.reencode,
+            jpeg_quality=args.jpeg_quality,
+            jpeg_subsampling=args.jpeg_subsampling,
+            jobs=args.jobs,
+            stream=args.stream,
+        )
+
+    raise CommandError(f"Unknown command: {args.command}", "UNKNOWN_COMMAND")
+
+
+def _warm_up():
+    """Import the heavy modules once so every served request skips that cost."""
+    import cv2  # type: ignore  # noqa: F401
+    import numpy  # type: ignore  # noqa: F401
+    import processor  # noqa: F401
+    import detection  # noqa: F401
+    import stages  # noqa: F401
+
+
+def serve(stdin=None):
+    """
+    Handle NDJSON requests from stdin until EOF.
 
+    Each request is `{"id": <any>, "argv": [<command>, ...]}`; see the module docstring.
+    A failing request reports an error and the loop continues with the next one.
+    """
+    global _request_id
+
+    stdin = stdin or sys.stdin
+    parser = build_parser()
+
+    _warm_up()
+    print(json.dumps({"type": "ready", "version": VERSION}), flush=True)
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            send_error(f"Invalid JSON request: {e}", "INVALID_REQUEST")
+            continue
+
+        if not isinstance(request, dict):
+            send_error("Request must be a JSON object", "INVALID_REQUEST")
+            continue
+
+        request_id = request.get('id')
+        _request_id = str(request_id) if request_id is not None else ""
+        try:
+            argv = request.get('argv')
+            if not isinstance(argv, list) or not argv:
+                raise CommandError("Request needs a non-empty 'argv' list", "INVALID_REQUEST")
             try:
-                with open(args.output, "wb") as f:
-                    img2pdf.convert(args.input, outputstream=f, layout_fun=layout_fun)
-            except Exception as e:
-                send_error(f"img2pdf failed: {e}", "IMG2PDF_FAILED")
-                sys.exit(1)
-
-            send_result({
-                "success": True,
-                "input_path": args.input,
-                "output_path": args.output,
-                "dpi": dpi,
-            })
+                # stdout carries only protocol lines: --help/--version text goes to stderr.
+                with contextlib.redirect_stdout(sys.stderr):
+                    args = parser.parse_args([str(a) for a in argv])
+            except SystemExit as e:
+                if e.code == 0:
+                    raise CommandError("--help and --version are not served", "INVALID_ARGS") from e
+                # argparse already printed the usage message to stderr.
+                raise CommandError(f"Invalid arguments: {' '.join(map(str, argv))}", "INVALID_ARGS") from e
+
+            if args.command == 'serve':
+                raise CommandError("Nested serve is not supported", "INVALID_REQUEST")
+
+            send_result(run_command(args))
+        except CommandError as e:
+            send_error(str(e), e.code)
+        except Exception as e:
+            send_error(str(e), "PROCESSING_ERROR")
+        finally:
+            _request_id = None
 
-        elif args.command == 'img2pdf-pages':
-            import img2pdf  # type: ignore
-            import tempfile
-            from PIL import Image  # type: ignore
-
-            dpi = int(args.dpi or 300)
-            if dpi <= 0:
-                send_error("DPI must be positive", "INVALID_DPI")
-                sys.exit(1)
-
-            if not args.images:
-                send_error("At least one image is required", "MISSING_INPUT")
-                sys.exit(1)
-
-            layout_fun = img2pdf.get_fixed_dpi_layout_fun((dpi, dpi))
-
-            def _otsu_threshold(gray: Image.Image) -> int:
-                # Compute Otsu threshold on a downscaled grayscale image for speed.
-                # Returns a value in [0, 255].
-                hist = gray.histogram()
-                if not hist or len(hist) < 256:
-                    return 128
-                total = sum(hist[:256])
-                if total <= 0:
-                    return 128
-
-                sum_total = 0
-                for i in range(256):
-                    sum_total += i * hist[i]
-
-                sum_b = 0
-                w_b = 0
-                w_f = 0
-                var_max = -1.0
-                threshold = 128
-
-                for t in range(256):
-                    w_b += hist[t]
-                    if w_b == 0:
-                        continue
-                    w_f = total - w_b
-                    if w_f == 0:
-                        break
-                    sum_b += t * hist[t]
-                    m_b = sum_b / w_b
-                    m_f = (sum_total - sum_b) / w_f
-                    var_between = w_b * w_f * (m_b - m_f) * (m_b - m_f)
-                    if var_between > var_max:
-                        var_max = var_between
-                        threshold = t
-                return int(threshold)
-
-            def _reencode_one(inp: str, mode: str, work_dir: Path) -> str:
-                if mode == "none":
-                    return inp
-
-                src = Image.open(inp)
-                try:
-                    if mode == "jpeg":
-                        # JPEG can't store alpha; flatten to white.
-                        if src.mode in ("RGBA", "LA"):
-                            bg = Image.new("RGB", src.size, (255, 255, 255))
-                            bg.paste(src, mask=src.split()[-1])
-                            src_rgb = bg
-                        elif src.mode != "RGB":
-                            src_rgb = src.convert("RGB")
-                        else:
-                            src_rgb = src
-
-                        q = int(args.jpeg_quality or 95)
-                        q = max(1, min(100, q))
-                        subs = int(args.jpeg_subsampling or 0)
-                        subs = max(0, min(2, subs))
-
-                        outp = work_dir / (Path(inp).stem + ".jpg")
-                        src_rgb.save(
-                            str(outp),
-                            format="JPEG",
-                            quality=q,
-                            subsampling=subs,
-                            optimize=True,
-                        )
-                        return str(outp)
-
-                    if mode == "ccitt":
-                        # Convert to 1-bit and store as TIFF G4 so img2pdf embeds CCITT Fax (lossless for bitonal).
-                        if src.mode != "L":
-                            gray = src.convert("L")
-                        else:
-                            gray = src
-
-                        # Downscale for threshold estimation.
-                        w, h = gray.size
-                        max_w = 900
-                        if w > max_w:
-                            scale = max_w / float(w)
-                            small = gray.resize((max_w, max(1, int(h * scale))), Image.Resampling.BILINEAR)
-                        else:
-                            small = gray
-
-                        thr = _otsu_threshold(small)
-                        bw_l = gray.point(lambda p: 255 if p > thr else 0)
-                        bw = bw_l.convert("1", dither=Image.Dither.NONE)
-
-                        outp = work_dir / (Path(inp).stem + ".tif")
-                        bw.save(str(outp), format="TIFF", compression="group4")
-                        return str(outp)
-
-                    raise ValueError(f"Unknown reencode mode: {mode}")
-                finally:
-                    try:
-                        src.close()
-                    except Exception:
-                        pass
 
-            try:
-                tmp_dir: Optional[tempfile.TemporaryDirectory[str]] = None
-                try:
-                    if args.reencode and args.reencode != "none":
-                        tmp_dir = tempfile.TemporaryDirectory(prefix="pp-img2pdf-")
-                        work_dir = Path(tmp_dir.name)
-                        inputs = [_reencode_one(p, args.reencode, work_dir) for p in args.images]
-                    else:
-                        inputs = list(args.images)
-
-                    with open(args.output, "wb") as f:
-                        img2pdf.convert(*inputs, outputstream=f, layout_fun=layout_fun)
-                finally:
-                    if tmp_dir is not None:
-                        tmp_dir.cleanup()
-            except Exception as e:
-                send_error(f"img2pdf failed: {e}", "IMG2PDF_FAILED")
-                sys.exit(1)
-
-            send_result({
-                "success": True,
-                "output_path": args.output,
-                "inputs": list(args.images),
-                "dpi": dpi,
-                "reencode": getattr(args, "reencode", "none"),
-            })
+def main():
+    # Required for worker processes (batch, img2pdf-pages) when running as a frozen PyInstaller binary.
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    parser = build_parser()
+    args = parser.parse_args()
 
+    try:
+        if args.command == 'serve':
+            serve()
+            return
+
+        result = run_command(args)
+        send_result(result)
+
+    except CommandError as e:
+        send_error(str(e), e.code)
+        sys.exit(1)
     except Exception as e:
         send_error(str(e), "PROCESSING_ERROR")
         sys.exit(1)
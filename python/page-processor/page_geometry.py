@@ -0,0 +1,217 @@
+"""
+Page Geometry Planner
+
+Composes split, deskew, crop and size normalization into one affine transform
+per output page, so each page is rendered with a single warp straight into its
+final canvas instead of materializing every intermediate image.
+"""
+
+from typing import Iterator
+
+import cv2
+import numpy as np
+
+from deskew_wrapper import _interp_flag
+from stages.image_utils import rebinarize
+
+# Source pixels read beyond a strip's exact preimage: covers the widest
+# interpolation kernel (Lanczos4 reads 3 px before and 4 after) plus rounding.
+STRIP_MARGIN = 6
+
+
+class PageGeometry:
+    """
+    Planned geometry of one output page.
+
+    The plan starts as a region of the source image (the page after splitting)
+    and accumulates operations in pipeline order. Each operation mirrors its
+    staged counterpart exactly (same rotation centre, canvas expansion and
+    integer offsets), so rendering the plan matches running the stages one by
+    one, minus the intermediate copies.
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int, bitonal: bool = False):
+        self.src_x = int(x)
+        self.src_y = int(y)
+        self.src_w = int(width)
+        self.src_h = int(height)
+        # Homogeneous 3x3 map from region coordinates to output coordinates.
+        self.matrix = np.eye(3, dtype=np.float64)
+        self.width = self.src_w
+        self.height = self.src_h
+        # Bitonal sources are re-thresholded after resampling so pages stay 1-bit.
+        self.bitonal = bitonal
+
+    @property
+    def is_translation(self) -> bool:
+        """True when the plan is an integer translation (no resampling needed)."""
+        m = self.matrix
+        return (
+            m[0, 0] == 1.0 and m[1, 1] == 1.0
+            and m[0, 1] == 0.0 and m[1, 0] == 0.0
+            and float(m[0, 2]).is_integer() and float(m[1, 2]).is_integer()
+        )
+
+    def _compose(self, step: np.ndarray):
+        self.matrix = step @ self.matrix
+
+    def rotate(self, angle: float):
+        """
+        Rotate the current canvas about its centre onto an expanded canvas.
+
+        Matches `deskew_page`, including its small-angle no-op.
+        """
+        if abs(angle) < 0.1:
+            return
+
+        w, h = self.width, self.height
+        step = np.eye(3, dtype=np.float64)
+        step[:2] = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+
+        cos = abs(step[0, 0])
+        sin = abs(step[0, 1])
+        new_w = int(h * sin + w * cos)
+        new_h = int(h * cos + w * sin)
+        step[0, 2] += (new_w - w) / 2
+        step[1, 2] += (new_h - h) / 2
+
+        self._compose(step)
+        self.width, self.height = new_w, new_h
+
+    def crop(self, x1: int, y1: int, x2: int, y2: int):
+        """Restrict the current canvas to the rectangle [x1, x2) x [y1, y2)."""
+        step = np.eye(3, dtype=np.float64)
+        step[0, 2] = -int(x1)
+        step[1, 2] = -int(y1)
+        self._compose(step)
+        self.width = int(x2) - int(x1)
+        self.height = int(y2) - int(y1)
+
+    def pad_to(self, width: int, height: int):
+        """Centre the current canvas on a larger background canvas."""
+        x_off = max(0, (int(width) - self.width) // 2)
+        y_off = max(0, (int(height) - self.height) // 2)
+        step = np.eye(3, dtype=np.float64)
+        step[0, 2] = x_off
+        step[1, 2] = y_off
+        self._compose(step)
+        self.width = int(width)
+        self.height = int(height)
+
+    def region(self, image: np.ndarray) -> np.ndarray:
+        """Source region of the page (a view, never a copy)."""
+        return image[self.src_y:self.src_y + self.src_h, self.src_x:self.src_x + self.src_w]
+
+    def preview_mask(self, mask_small: np.ndarray, scale: float) -> np.ndarray:
+        """
+        Carry an analysis-scale mask of the source region through the plan.
+
+        Nothing is resampled into new grey levels: pixels are taken
+        nearest-neighbour and everything outside the region is 0, so a
+        binarization of the source stays exactly binary.
+
+        Args:
+            mask_small: Mask of the page's source region, downscaled by `scale`
+            scale: Downscale factor of `mask_small`
+
+        Returns:
+            The mask in output-page coordinates at (approximately) `scale`
+        """
+        s = np.diag([scale, scale, 1.0])
+        s_inv = np.diag([1.0 / scale, 1.0 / scale, 1.0])
+        matrix = s @ self.matrix @ s_inv
+        out_w = max(1, int(round(self.width * scale)))
+        out_h = max(1, int(round(self.height * scale)))
+        return cv2.warpAffine(
+            mask_small,
+            matrix[:2],
+            (out_w, out_h),
+            flags=cv2.INTER_NEAREST,
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=0,
+        )
+
+    def render(self, image: np.ndarray) -> np.ndarray:
+        """
+        Render the planned page at full resolution.
+
+        Args:
+            image: Full source image
+
+        Returns:
+            Output page; a view of `image` when the plan is the identity
+        """
+        src = self.region(image)
+        if not self.is_translation:
+            page = self._warp(src, self.matrix, self.width, self.height, _interp_flag())
+            return rebinarize(page) if self.bitonal else page
+
+        tx, ty = int(self.matrix[0, 2]), int(self.matrix[1, 2])
+        sh, sw = src.shape[:2]
+        if tx == 0 and ty == 0 and self.width == sw and self.height == sh:
+            return src
+
+        # Pure offset (crop and/or pad): copy the overlapping rectangle, no resampling.
+        canvas = np.full((self.height, self.width) + src.shape[2:], 255, dtype=src.dtype)
+        dx1, dy1 = max(0, tx), max(0, ty)
+        dx2, dy2 = min(self.width, tx + sw), min(self.height, ty + sh)
+        if dx2 > dx1 and dy2 > dy1:
+            canvas[dy1:dy2, dx1:dx2] = src[dy1 - ty:dy2 - ty, dx1 - tx:dx2 - tx]
+        return canvas
+
+    def render_strips(self, image: np.ndarray, strip_rows: int = 1024) -> Iterator[np.ndarray]:
+        """
+        Render the planned page as consecutive horizontal strips.
+
+        Each strip warps only the source rectangle its rows map back to (plus
+        an interpolation margin), so memory is bounded by the strip size, not
+        the page size. Concatenated, the strips equal `render(image)`.
+
+        Args:
+            image: Full source image
+            strip_rows: Output rows per strip
+
+        Yields:
+            Arrays of shape (rows, width[, channels])
+        """
+        src = self.region(image)
+        sh, sw = src.shape[:2]
+        inverse = np.linalg.inv(self.matrix)
+        flags = _interp_flag() if not self.is_translation else cv2.INTER_NEAREST
+        strip_rows = max(1, int(strip_rows))
+
+        for y0 in range(0, self.height, strip_rows):
+            y1 = min(self.height, y0 + strip_rows)
+
+            # Bounding box of the strip's preimage in region coordinates.
+            corners = np.array([[0, y0, 1], [self.width, y0, 1], [0, y1, 1], [self.width, y1, 1]], dtype=np.float64)
+            mapped = corners @ inverse.T
+            sx0 = max(0, int(np.floor(mapped[:, 0].min())) - STRIP_MARGIN)
+            sy0 = max(0, int(np.floor(mapped[:, 1].min())) - STRIP_MARGIN)
+            sx1 = min(sw, int(np.ceil(mapped[:, 0].max())) + STRIP_MARGIN)
+            sy1 = min(sh, int(np.ceil(mapped[:, 1].max())) + STRIP_MARGIN)
+
+            if sx1 <= sx0 or sy1 <= sy0:
+                yield np.full((y1 - y0, self.width) + src.shape[2:], 255, dtype=src.dtype)
+                continue
+
+            # Region -> strip: shift the source origin to (sx0, sy0), the output origin to row y0.
+            shift_src = np.array([[1, 0, sx0], [0, 1, sy0], [0, 0, 1]], dtype=np.float64)
+            shift_dst = np.array([[1, 0, 0], [0, 1, -y0], [0, 0, 1]], dtype=np.float64)
+            matrix = shift_dst @ self.matrix @ shift_src
+            strip = self._warp(src[sy0:sy1, sx0:sx1], matrix, self.width, y1 - y0, flags)
+            yield rebinarize(strip) if self.bitonal and not self.is_translation else strip
+
+    @staticmethod
+    def _warp(src: np.ndarray, matrix: np.ndarray, width: int, height: int, flags: int) -> np.ndarray:
+        # The source is a view of just this page, so the constant border stops at the
+        # page edge and never samples the neighbouring page of a spread.
+        background = (255, 255, 255) if src.ndim == 3 else 255
+        return cv2.warpAffine(
+            src,
+            matrix[:2],
+            (width, height),
+            flags=flags,
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=background,
+        )
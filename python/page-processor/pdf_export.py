@@ -0,0 +1,345 @@
+"""
+PDF Export
+
+Re-encodes page images for the `img2pdf-pages` command: JPEG for photographic
+pages, CCITT Group 4 (via 1-bit TIFF) for text pages, or per page by content
+(`auto`).
+
+Re-encoding is per page and CPU-bound (codec and thresholding work), so pages
+are spread over a pool of worker processes. Results come back in page
+order, each as soon as it and every page before it are done, so PDF assembly
+can start on the first pages while later ones are still being encoded.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+from stages.io import load_grayscale, load_image
+from stages.profiling import timed
+
+# Width the page is reduced to for the Otsu threshold estimate.
+OTSU_MAX_WIDTH = 900
+
+# `--reencode auto` page classification (see classify_page).
+CLASSIFY_MAX_DIM = 512
+CLASSIFY_MAX_COLORFULNESS = 12.0
+CLASSIFY_MIN_BIMODALITY = 0.85
+CLASSIFY_MIN_CONTRAST = 80.0
+CLASSIFY_MAX_EDGE_DENSITY = 0.25
+
+
+@timed
+def ccitt_threshold(gray: np.ndarray) -> int:
+    """
+    Otsu threshold of a grayscale page, estimated on a downscaled copy.
+
+    Args:
+        gray: uint8 grayscale page
+
+    Returns:
+        Threshold in [0, 255]; pixels above it are white
+    """
+    h, w = gray.shape[:2]
+    if w > OTSU_MAX_WIDTH:
+        # Only the histogram matters: plain sampling keeps it faithful (area averaging
+        # smears strokes into mid greys) and costs a fraction of a millisecond.
+        small = cv2.resize(
+            gray, (OTSU_MAX_WIDTH, max(1, int(h * OTSU_MAX_WIDTH / float(w)))), interpolation=cv2.INTER_LINEAR,
+        )
+    else:
+        small = gray
+    thr, _ = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return int(thr)
+
+
+@timed
+def binarize_packed(gray: np.ndarray, thr: int):
+    """
+    Threshold a full-resolution grayscale page straight into a mode '1' image.
+
+    Args:
+        gray: uint8 grayscale page
+        thr: Pixels above this value become white
+
+    Returns:
+        PIL mode '1' image (8 pixels per byte, 1 = white)
+    """
+    from PIL import Image  # type: ignore
+
+    h, w = gray.shape[:2]
+    packed = np.packbits(gray > thr, axis=1)
+    return Image.frombuffer("1", (w, h), packed, "raw", "1", 0, 1)
+
+
+@timed
+def save_group4(bw, outp: str):
+    """
+    Save a mode '1' image as a CCITT Group 4 TIFF with a single strip.
+
+    PDF embeds one G4 stream per image, so a single strip can be copied into
+    the PDF as is; Pillow otherwise splits the data into 64 KB strips, which
+    forces PDF writers to decode and re-encode the page.
+    """
+    w, h = bw.size
+    bw.save(outp, format="TIFF", compression="group4", strip_size=(w + 7) // 8 * h)
+
+
+@timed
+def classify_page(image: np.ndarray) -> dict:
+    """
+    Pick an encoding for a page from a thumbnail.
+
+    Three cheap measurements decide it:
+    - colourfulness (Hasler-Suesstrunk): colour pages need JPEG;
+    - edge density (Canny): share of edge pixels. Text pages stay near 0.13;
+      detailed photos are edges almost everywhere and go to JPEG;
+    - bimodality: share of the pixels away from edges (where a downscaled
+      text page has its only greys) that are close to one of the two Otsu
+      class means. Text and line art sit near paper or ink; photos and
+      shading fill the tones in between.
+
+    benchmarks/classify_pages.py checks text pages against photo-like noise.
+
+    Args:
+        image: BGR or grayscale thumbnail (a few hundred px is plenty)
+
+    Returns:
+        {"mode": "ccitt" | "jpeg", "grayscale", "colorfulness", "bimodality",
+        "edge_density"}
+    """
+    if image.ndim == 3:
+        b, g, r = (c.astype(np.float32) for c in cv2.split(image[:, :, :3]))
+        rg = r - g
+        yb = 0.5 * (r + g) - b
+        colorfulness = float(
+            np.sqrt(rg.std() ** 2 + yb.std() ** 2) + 0.3 * np.sqrt(rg.mean() ** 2 + yb.mean() ** 2)
+        )
+        gray = cv2.cvtColor(image[:, :, :3], cv2.COLOR_BGR2GRAY)
+    else:
+        colorfulness = 0.0
+        gray = image
+
+    edges = cv2.Canny(gray, 50, 150)
+    near_edge = cv2.dilate(edges, np.ones((3, 3), np.uint8)) > 0
+
+    thr, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    values = gray.astype(np.float32)
+    dark = values <= thr
+    ink = float(values[dark].mean()) if dark.any() else 0.0
+    paper = float(values[~dark].mean()) if not dark.all() else 255.0
+    tolerance = max(12.0, 0.25 * (paper - ink))
+    midtone = (np.abs(values - ink) > tolerance) & (np.abs(values - paper) > tolerance)
+    off_edge = midtone[~near_edge]
+    bimodality = 1.0 - float(off_edge.mean()) if off_edge.size else 0.0
+    edge_density = float(np.count_nonzero(edges)) / edges.size
+
+    grayscale = colorfulness < CLASSIFY_MAX_COLORFULNESS
+    bitonal = (
+        grayscale
+        and edge_density <= CLASSIFY_MAX_EDGE_DENSITY
+        and bimodality >= CLASSIFY_MIN_BIMODALITY
+        and paper - ink >= CLASSIFY_MIN_CONTRAST
+    )
+    return {
+        "mode": "ccitt" if bitonal else "jpeg",
+        "grayscale": bool(grayscale),
+        "colorfulness": round(colorfulness, 2),
+        "bimodality": round(bimodality, 4),
+        "edge_density": round(edge_density, 4),
+    }
+
+
+def _save_jpeg(src, outp: str, jpeg_quality: int, jpeg_subsampling: int, grayscale: bool = False):
+    from PIL import Image  # type: ignore
+
+    # JPEG can't store alpha; flatten to white.
+    if src.mode in ("RGBA", "LA"):
+        bg = Image.new("RGB", src.size, (255, 255, 255))
+        bg.paste(src, mask=src.split()[-1])
+        src_rgb = bg
+    elif src.mode != "RGB":
+        src_rgb = src.convert("RGB")
+    else:
+        src_rgb = src
+    if grayscale:
+        # One component instead of three: smaller file, and no chroma to lose.
+        src_rgb = src_rgb.convert("L")
+
+    q = int(jpeg_quality or 95)
+    q = max(1, min(100, q))
+    subs = int(jpeg_subsampling or 0)
+    subs = max(0, min(2, subs))
+
+    src_rgb.save(
+        outp,
+        format="JPEG",
+        quality=q,
+        subsampling=subs,
+        optimize=True,
+    )
+
+
+def _save_ccitt(src, inp: str, outp: str):
+    # Convert to 1-bit and store as TIFF G4 so the PDF embeds CCITT Fax (lossless for bitonal).
+    if src.mode == "1":
+        # Already bilevel (e.g. a bitonal page from `process`): no re-thresholding.
+        save_group4(src, outp)
+        return
+
+    gray = load_grayscale(inp)
+    bw = binarize_packed(gray, ccitt_threshold(gray))
+    del gray
+    save_group4(bw, outp)
+
+
+@timed
+def reencode_page(
+    inp: str,
+    mode: str,
+    outp_stem: str,
+    jpeg_quality: int = 95,
+    jpeg_subsampling: int = 0,
+) -> dict:
+    """
+    Re-encode one page image for PDF embedding.
+
+    In 'auto' mode the encoding is chosen by `classify_page` (bilevel sources
+    always get CCITT, non-colour JPEGs are written grayscale), and the source
+    file is kept as is when it is smaller than the re-encoded one and a PDF
+    can embed it directly (PNG or JPEG).
+
+    Args:
+        inp: Input image path
+        mode: 'none', 'jpeg', 'ccitt' or 'auto'
+        outp_stem: Output path without extension ('.jpg' or '.tif' is appended)
+        jpeg_quality: JPEG quality for JPEG output
+        jpeg_subsampling: JPEG chroma subsampling for JPEG output
+
+    Returns:
+        {"path": image to embed (`inp` itself when not re-encoded),
+        "mode": encoding used ('none', 'jpeg' or 'ccitt'), "bytes": file size,
+        "classification": classify_page result (auto mode only)}
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if mode == "none":
+        return {"path": inp, "mode": "none", "bytes": os.path.getsize(inp)}
+    if mode not in ("jpeg", "ccitt", "auto"):
+        raise ValueError(f"Unknown reencode mode: {mode}")
+
+    from PIL import Image  # type: ignore
+
+    report: dict = {}
+    src = Image.open(inp)
+    try:
+        source_format = src.format
+        chosen = mode
+        grayscale = False
+        if mode == "auto":
+            if src.mode == "1":
+                chosen = "ccitt"
+            else:
+                classification = classify_page(load_image(inp, max_dim=CLASSIFY_MAX_DIM))
+                report["classification"] = classification
+                chosen = classification["mode"]
+                grayscale = classification["grayscale"]
+
+        if chosen == "jpeg":
+            outp = outp_stem + ".jpg"
+            _save_jpeg(src, outp, jpeg_quality, jpeg_subsampling, grayscale=grayscale)
+        else:
+            outp = outp_stem + ".tif"
+            _save_ccitt(src, inp, outp)
+    finally:
+        try:
+            src.close()
+        except Exception:
+            pass
+
+    size = os.path.getsize(outp)
+    if mode == "auto" and source_format in ("PNG", "JPEG"):
+        source_size = os.path.getsize(inp)
+        if source_size <= size:
+            # Re-encoding would not shrink the page: embed the original (no extra loss).
+            os.unlink(outp)
+            outp, chosen, size = inp, "none", source_size
+
+    report.update({"path": outp, "mode": chosen, "bytes": size})
+    return report
+
+
+def reencode_pages(
+    images: list[str],
+    mode: str,
+    work_dir: str,
+    jobs: Optional[int] = None,
+    jpeg_quality: int = 95,
+    jpeg_subsampling: int = 0,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Re-encode pages in parallel, yielding page reports in page order.
+
+    Each report is yielded as soon as that page and all pages before it are
+    done. Outputs are named by page index, so inputs with the same file name
+    (from different directories) do not collide.
+
+    Args:
+        images: Input image paths, one per page
+        mode: 'none', 'jpeg', 'ccitt' or 'auto'
+        work_dir: Directory for re-encoded files
+        jobs: Worker processes (default: CPU count; 1 re-encodes in this process)
+        jpeg_quality: JPEG quality for JPEG output
+        jpeg_subsampling: JPEG chroma subsampling for JPEG output
+        max_in_flight: Cap on pages submitted but not yet yielded (default: 2 x jobs)
+
+    Yields:
+        `reencode_page` result for each page
+    """
+    if mode == "none":
+        for inp in images:
+            yield reencode_page(inp, mode, "")
+        return
+
+    def outp_stem(index: int, inp: str) -> str:
+        return os.path.join(work_dir, f"{index:05d}-{Path(inp).stem}")
+
+    jobs = max(1, int(jobs or os.cpu_count() or 1))
+    jobs = min(jobs, max(1, len(images)))
+    if jobs == 1:
+        # No pool: avoid worker start-up cost for small documents or single-core hosts.
+        for index, inp in enumerate(images):
+            yield reencode_page(inp, mode, outp_stem(index, inp), jpeg_quality, jpeg_subsampling)
+        return
+
+    max_in_flight = max(jobs, int(max_in_flight or jobs * 2))
+    pending: deque[Future] = deque()
+    queue = iter(enumerate(images))
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context("spawn")) as pool:
+        try:
+            while True:
+                # Bounded window: finished pages wait in order instead of piling up.
+                while len(pending) < max_in_flight:
+                    entry = next(queue, None)
+                    if entry is None:
+                        break
+                    index, inp = entry
+                    pending.append(pool.submit(
+                        reencode_page, inp, mode, outp_stem(index, inp), jpeg_quality, jpeg_subsampling,
+                    ))
+                if not pending:
+                    break
+                yield pending.popleft().result()
+        finally:
+            # Abandoned early (error or consumer stopped): don't start queued pages.
+            for fut in pending:
+                fut.cancel()
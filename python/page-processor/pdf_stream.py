@@ -0,0 +1,347 @@
+"""
+Streaming PDF Writer
+
+Writes a multi-page image PDF one page at a time: each page's image XObject is
+copied (or compressed) straight into the output file and only byte offsets are
+kept, so memory does not grow with page count and the file starts filling as
+soon as the first page is ready. The cross-reference table is written at the end.
+
+Encoded data is embedded without re-encoding where PDF can carry it as is:
+JPEG (DCTDecode), single-strip CCITT Group 4 TIFF (CCITTFaxDecode) and
+non-interlaced 8-bit-or-less PNG without transparency (FlateDecode with the PNG
+predictor, IDAT chunks copied verbatim). Anything else is decoded and stored
+Flate-compressed.
+"""
+
+import struct
+import zlib
+from typing import BinaryIO, Callable, Iterable, Optional
+
+from stages.profiling import timed
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COPY_CHUNK_BYTES = 1 << 20
+FLATE_BAND_ROWS = 256
+
+# PDF colour space and component count by PNG colour type (palette handled separately).
+_PNG_COLOR_SPACES = {0: ("/DeviceGray", 1), 2: ("/DeviceRGB", 3)}
+
+# PDF colour space by PIL mode for decoded (fallback) and JPEG images.
+_PIL_COLOR_SPACES = {"1": "/DeviceGray", "L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+class _Image:
+    """An image ready to be written as an XObject: dictionary entries plus a data writer."""
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        entries: str,
+        write_data: Callable[[Callable[[bytes], None]], None],
+        length: Optional[int] = None,
+    ):
+        self.width = width
+        self.height = height
+        self.entries = entries
+        self.write_data = write_data
+        self.length = length
+
+
+def _copy_range(path: str, ranges: list[tuple[int, int]]) -> Callable[[Callable[[bytes], None]], None]:
+    """Data writer copying byte ranges of a file in bounded chunks."""
+    def write_data(write: Callable[[bytes], None]):
+        with open(path, "rb") as f:
+            for offset, length in ranges:
+                f.seek(offset)
+                while length > 0:
+                    chunk = f.read(min(length, COPY_CHUNK_BYTES))
+                    if not chunk:
+                        raise IOError(f"Unexpected end of file: {path}")
+                    write(chunk)
+                    length -= len(chunk)
+    return write_data
+
+
+def _png_image(path: str) -> Optional[_Image]:
+    """Pass-through XObject for a PNG whose IDAT stream PDF can decode directly (else None)."""
+    idat: list[tuple[int, int]] = []
+    palette = b""
+    with open(path, "rb") as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+        header = None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                return None
+            length, kind = struct.unpack(">I4s", head)
+            if kind == b"IHDR":
+                header = struct.unpack(">IIBBBBB", f.read(13))
+                f.seek(4, 1)
+            elif kind == b"PLTE":
+                palette = f.read(length)
+                f.seek(4, 1)
+            elif kind == b"tRNS":
+                # Transparency needs a soft mask; let the decoding path flatten it.
+                return None
+            elif kind == b"IDAT":
+                idat.append((f.tell(), length))
+                f.seek(length + 4, 1)
+            elif kind == b"IEND":
+                break
+            else:
+                f.seek(length + 4, 1)
+
+    if header is None or not idat:
+        return None
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if interlace or bit_depth > 8:
+        return None
+
+    if color_type == 3:
+        if not palette:
+            return None
+        colors = 1
+        color_space = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]"
+    elif color_type in _PNG_COLOR_SPACES:
+        color_space, colors = _PNG_COLOR_SPACES[color_type]
+    else:
+        # Alpha channels (types 4 and 6) are interleaved with colour; decode instead.
+        return None
+
+    entries = (
+        f"/ColorSpace {color_space} /BitsPerComponent {bit_depth} /Filter /FlateDecode "
+        f"/DecodeParms << /Predictor 15 /Colors {colors} /BitsPerComponent {bit_depth} /Columns {width} >>"
+    )
+    return _Image(width, height, entries, _copy_range(path, idat), sum(n for _, n in idat))
+
+
+def _g4_image(path: str, img) -> Optional[_Image]:
+    """Pass-through XObject for a single-strip CCITT Group 4 TIFF (else None)."""
+    from PIL import TiffImagePlugin  # type: ignore
+
+    if img.info.get("compression") != "group4":
+        return None
+    tags = img.tag_v2
+    offsets = tags.get(TiffImagePlugin.STRIPOFFSETS)
+    counts = tags.get(TiffImagePlugin.STRIPBYTECOUNTS)
+    photometric = tags.get(TiffImagePlugin.PHOTOMETRIC_INTERPRETATION)
+    if not offsets or not counts or len(offsets) != 1 or len(counts) != 1:
+        # PDF carries one G4 stream per image; strips cannot simply be concatenated.
+        return None
+    if photometric not in (0, 1) or tags.get(TiffImagePlugin.FILLORDER, 1) != 1:
+        return None
+
+    width, height = img.size
+    # The G4 codec codes 0 bits as white runs; TIFF's photometric says whether 0 means white.
+    black_is_1 = "false" if photometric == 0 else "true"
+    entries = (
+        f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /CCITTFaxDecode "
+        f"/DecodeParms << /K -1 /Columns {width} /Rows {height} /BlackIs1 {black_is_1} >>"
+    )
+    return _Image(width, height, entries, _copy_range(path, [(offsets[0], counts[0])]), counts[0])
+
+
+def _decoded_image(img) -> _Image:
+    """Decode an image and store its pixels Flate-compressed (band by band)."""
+    from PIL import Image  # type: ignore
+
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        # No soft masks: flatten transparency onto white, as the JPEG re-encode does.
+        rgba = img.convert("RGBA")
+        flat = Image.new("RGB", img.size, (255, 255, 255))
+        flat.paste(rgba, mask=rgba.split()[-1])
+        img = flat
+    elif img.mode not in _PIL_COLOR_SPACES:
+        img = img.convert("L" if img.mode.startswith("I") else "RGB")
+
+    width, height = img.size
+    bits = 1 if img.mode == "1" else 8
+    entries = f"/ColorSpace {_PIL_COLOR_SPACES[img.mode]} /BitsPerComponent {bits} /Filter /FlateDecode"
+    img.load()
+
+    def write_data(write: Callable[[bytes], None]):
+        compressor = zlib.compressobj(6)
+        for top in range(0, height, FLATE_BAND_ROWS):
+            band = img.crop((0, top, width, min(height, top + FLATE_BAND_ROWS)))
+            # Mode '1' packs 8 pixels per byte with rows padded to a byte, as PDF expects.
+            write(compressor.compress(band.tobytes()))
+        write(compressor.flush())
+
+    return _Image(width, height, entries, write_data)
+
+
+def _open_image(path: str) -> _Image:
+    """Describe one page image as an XObject, embedding its encoded data where possible."""
+    from PIL import Image  # type: ignore
+
+    with open(path, "rb") as f:
+        is_png = f.read(8) == PNG_SIGNATURE
+    if is_png:
+        image = _png_image(path)
+        if image is not None:
+            return image
+
+    with Image.open(path) as img:
+        if img.format == "JPEG" and img.mode in _PIL_COLOR_SPACES:
+            width, height = img.size
+            entries = f"/ColorSpace {_PIL_COLOR_SPACES[img.mode]} /BitsPerComponent 8 /Filter /DCTDecode"
+            if img.mode == "CMYK" and "adobe" in img.info:
+                # Adobe CMYK JPEGs store inverted components.
+                entries += " /Decode [1 0 1 0 1 0 1 0]"
+            length = _file_size(path)
+            return _Image(width, height, entries, _copy_range(path, [(0, length)]), length)
+
+        if img.format == "TIFF":
+            image = _g4_image(path, img)
+            if image is not None:
+                return image
+
+        return _decoded_image(img)
+
+
+def _file_size(path: str) -> int:
+    with open(path, "rb") as f:
+        return f.seek(0, 2)
+
+
+class PdfStreamWriter:
+    """
+    Appends image pages to a PDF file as they arrive.
+
+    Args:
+        output: Binary file object to write to (need not be seekable)
+        dpi: Resolution used to size pages (points = pixels * 72 / dpi)
+    """
+
+    def __init__(self, output: BinaryIO, dpi: int = 300):
+        self.output = output
+        self.dpi = dpi
+        self.position = 0
+        self.offsets: dict[int, int] = {}
+        self.page_ids: list[int] = []
+        # 1 = catalog, 2 = page tree; both are written by close() but referenced earlier.
+        self.next_id = 3
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.output.flush()
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _new_id(self) -> int:
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def _object(self, obj_id: int, body: str):
+        self.offsets[obj_id] = self.position
+        self._write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+
+    def _stream(
+        self,
+        obj_id: int,
+        entries: str,
+        write_data: Callable[[Callable[[bytes], None]], None],
+        length: Optional[int] = None,
+    ):
+        """Write a stream object; an unknown length goes into a follow-up object."""
+        length_id = self._new_id() if length is None else None
+        length_ref = f"{length_id} 0 R" if length_id is not None else str(length)
+
+        self.offsets[obj_id] = self.position
+        self._write(f"{obj_id} 0 obj\n<< {entries} /Length {length_ref} >>\nstream\n".encode("latin-1"))
+        start = self.position
+        write_data(self._write)
+        written = self.position - start
+        self._write(b"\nendstream\nendobj\n")
+
+        if length_id is not None:
+            self._object(length_id, str(written))
+        elif written != length:
+            raise IOError(f"Stream length mismatch: wrote {written} bytes, expected {length}")
+
+    @timed
+    def add_page(self, path: str):
+        """
+        Append one page showing the image at `path`, scaled to the writer's DPI.
+
+        Args:
+            path: Image file (PNG, JPEG, TIFF or anything Pillow can decode)
+        """
+        image = _open_image(path)
+        image_id = self._new_id()
+        content_id = self._new_id()
+        page_id = self._new_id()
+
+        self._stream(
+            image_id,
+            f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} {image.entries}",
+            image.write_data,
+            image.length,
+        )
+
+        page_w = _fmt(image.width * 72.0 / self.dpi)
+        page_h = _fmt(image.height * 72.0 / self.dpi)
+        content = f"q\n{page_w} 0 0 {page_h} 0 0 cm\n/Im0 Do\nQ".encode("latin-1")
+        self._stream(content_id, "", lambda write: write(content), len(content))
+
+        self._object(
+            page_id,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w} {page_h}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>",
+        )
+        self.page_ids.append(page_id)
+        self.output.flush()
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        if not self.page_ids:
+            raise ValueError("A PDF needs at least one page")
+
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>")
+        self._object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_start = self.position
+        size = self.next_id
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            lines.append(f"{self.offsets[obj_id]:010d} 00000 n \n")
+        lines.append(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_start}\n%%EOF\n")
+        self._write("".join(lines).encode("latin-1"))
+        self.output.flush()
+
+
+@timed
+def write_pdf_stream(
+    output_path: str,
+    pages: Iterable[str],
+    dpi: int = 300,
+    on_page: Optional[Callable[[int, str], None]] = None,
+) -> int:
+    """
+    Write a PDF with one page per image, consuming `pages` lazily.
+
+    Args:
+        output_path: Output PDF path
+        pages: Image paths in page order (may be a generator)
+        dpi: Resolution used to size pages
+        on_page: Called with (index, path) after each page is written
+
+    Returns:
+        Number of pages written
+    """
+    with open(output_path, "wb") as f:
+        writer = PdfStreamWriter(f, dpi)
+        for index, path in enumerate(pages):
+            writer.add_page(path)
+            if on_page:
+                on_page(index, path)
+        writer.close()
+    return len(writer.page_ids)
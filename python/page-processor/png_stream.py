@@ -0,0 +1,111 @@
+"""
+Streaming PNG Writer
+
+Writes a PNG from horizontal strips, so a page can be encoded while it is being
+rendered and never has to exist in memory as a whole (cv2.imwrite needs the
+full raster). Used by tiled processing for very large scans.
+
+Rows are filtered with PNG's "Up" filter (vectorized per strip) and compressed
+with one streaming zlib object; IDAT chunks are flushed as they fill.
+"""
+
+import struct
+import zlib
+from typing import Iterable, Optional
+
+import cv2
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+IDAT_CHUNK_BYTES = 1 << 20
+
+# PNG colour type by channel count (BGR/BGRA input is reordered to RGB/RGBA).
+_COLOR_TYPES = {1: 0, 3: 2, 4: 6}
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF)
+    )
+
+
+def _filter_up(strip: np.ndarray, previous: Optional[np.ndarray]) -> np.ndarray:
+    """Prefix each row with filter type 2 ("Up") and subtract the row above."""
+    rows = strip.reshape(strip.shape[0], -1)
+    out = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = 2
+    out[:, 1:] = rows
+    # uint8 arithmetic wraps modulo 256, exactly as the filter specifies.
+    out[1:, 1:] -= rows[:-1]
+    if previous is not None:
+        out[0, 1:] -= previous
+    return out
+
+
+def write_png_strips(
+    path: str,
+    width: int,
+    height: int,
+    channels: int,
+    strips: Iterable[np.ndarray],
+    compression: int = 1,
+    bilevel: bool = False,
+):
+    """
+    Write an 8-bit (or 1-bit) PNG from a sequence of horizontal strips.
+
+    Args:
+        path: Output file path
+        width: Image width in pixels
+        height: Image height in pixels
+        channels: 1 (gray), 3 (BGR) or 4 (BGRA), as produced by OpenCV
+        strips: Arrays of shape (rows, width[, channels]) covering all rows in order
+        compression: zlib level (0-9)
+        bilevel: Write a 1-bit grayscale PNG (channels must be 1; pixels > 127 are white)
+
+    Raises:
+        ValueError: If the strips do not match the declared size
+    """
+    if channels not in _COLOR_TYPES or (bilevel and channels != 1):
+        raise ValueError(f"Unsupported channel count for PNG: {channels}")
+    bit_depth = 1 if bilevel else 8
+
+    compressor = zlib.compressobj(max(0, min(9, int(compression))))
+    previous: Optional[np.ndarray] = None
+    rows_written = 0
+    pending = bytearray()
+
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        f.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, _COLOR_TYPES[channels], 0, 0, 0)))
+
+        for strip in strips:
+            if strip.shape[1] != width or (strip.shape[2] if strip.ndim == 3 else 1) != channels:
+                raise ValueError(f"Strip shape {strip.shape} does not match {width}x{channels}")
+            if channels == 3:
+                strip = cv2.cvtColor(strip, cv2.COLOR_BGR2RGB)
+            elif channels == 4:
+                strip = cv2.cvtColor(strip, cv2.COLOR_BGRA2RGBA)
+            strip = np.ascontiguousarray(strip, dtype=np.uint8)
+            if bilevel:
+                # 8 pixels per byte, most significant bit first; 1 = white.
+                strip = np.packbits(strip > 127, axis=1)
+
+            pending += compressor.compress(memoryview(_filter_up(strip, previous)).cast('B'))
+            previous = strip[-1].reshape(-1)
+            rows_written += strip.shape[0]
+
+            while len(pending) >= IDAT_CHUNK_BYTES:
+                f.write(_chunk(b"IDAT", bytes(pending[:IDAT_CHUNK_BYTES])))
+                del pending[:IDAT_CHUNK_BYTES]
+
+        if rows_written != height:
+            raise ValueError(f"Strips cover {rows_written} rows, expected {height}")
+
+        pending += compressor.flush()
+        if pending:
+            f.write(_chunk(b"IDAT", bytes(pending)))
+        f.write(_chunk(b"IEND", b""))
@@ -8,6 +8,8 @@ import cv2
 import numpy as np
 import os
 import time
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 from typing import Callable, Optional
 
@@ -16,10 +18,49 @@ from detection import (
     detect_skew_angle,
     detect_curvature,
     detect_content_bounds,
+    content_bounds_from_mask,
 )
-from split import find_gutter_position, split_facing_pages
+from split import locate_gutter, split_facing_pages
+from stages.image_utils import AnalysisContext, rebinarize
+from stages.io import RawImageHeader, image_stem, load_native, raw_handle
+from stages.memory import MemoryProbe
+from page_geometry import PageGeometry
+from writer import PageWriter, PendingPage
 from deskew_wrapper import deskew_page
 from crop import crop_to_content
+from dewarp import dewarp_page
+
+# Pages with at least this many source pixels are rendered and encoded in strips
+# (override with PAGE_PROCESSOR_TILE_PIXELS); see PageProcessor.
+TILE_PIXELS = 100_000_000
+TILE_STRIP_ROWS = 256
+
+
+def tile_pixels_threshold() -> int:
+    """Tiled-mode threshold from PAGE_PROCESSOR_TILE_PIXELS (default TILE_PIXELS)."""
+    try:
+        return int(float(os.environ.get("PAGE_PROCESSOR_TILE_PIXELS", TILE_PIXELS)))
+    except ValueError:
+        return TILE_PIXELS
+
+
+@dataclass
+class DocumentPriors:
+    """
+    Expectations carried over from earlier pages of the same document.
+
+    Every field is optional; None means no prior for that property.
+    """
+    facing_pages: Optional[bool] = None
+    aspect_ratio: Optional[float] = None  # width / height of the pages facing_pages was learned on
+    gutter_x_norm: Optional[float] = None
+    skew_angle: Optional[float] = None
+
+    def same_layout(self, width: int, height: int, tolerance: float = 0.03) -> bool:
+        """True when a page has the aspect ratio the facing-pages prior was learned on."""
+        if self.facing_pages is None or not self.aspect_ratio or height <= 0:
+            return False
+        return abs((width / height) / self.aspect_ratio - 1.0) <= tolerance
 
 
 class PageProcessor:
@@ -29,8 +70,21 @@ class PageProcessor:
     Handles the full pipeline of:
     1. Loading image
     2. Detection (facing pages, skew, curvature, content bounds)
-    3. Processing (split, deskew, dewarp, crop)
+    3. Processing (split, deskew, dewarp, crop), fused into one warp per page
+       unless dewarp applies
     4. Saving results
+
+    Very large scans (at least `tile_pixels` source pixels) run in tiled mode:
+    each planned page is rendered in horizontal strips that are PNG-encoded as
+    they are produced, and no full-resolution grayscale copy is kept, so beyond
+    the decoded source, memory is bounded by the strip size. Pages that need
+    dewarping still go through the staged pipeline.
+
+    With `fused=False` every page goes through the staged pipeline (the
+    reference the fused path must match; see benchmarks/fused_vs_staged.py).
+
+    With `track_memory`, `process` adds a "memory" object to its result with
+    the peak RSS and traced allocations of each stage (see stages.memory).
     """
 
     def __init__(
@@ -40,12 +94,26 @@ class PageProcessor:
         crop_padding: int = 30,
         auto_detect: bool = True,
         force_split: bool = False,
+        writer: Optional[PageWriter] = None,
+        output_format: str = "png",
+        raw_storage: str = "shm",
+        tile_pixels: Optional[int] = None,
+        track_memory: bool = False,
+        fused: bool = True,
     ):
         self.min_skew_angle = min_skew_angle
         self.min_curvature = min_curvature
         self.crop_padding = crop_padding
         self.auto_detect = auto_detect
         self.force_split = force_split
+        # Output pages are encoded on this pool (shared when passed in, e.g. by batch runs).
+        self.writer = writer or PageWriter()
+        # "raw" writes pixels to shared memory / mapped files (see stages.io) instead of PNGs.
+        self.output_format = output_format
+        self.raw_storage = raw_storage
+        self.tile_pixels = tile_pixels_threshold() if tile_pixels is None else int(tile_pixels)
+        self.track_memory = track_memory
+        self.fused = fused
 
     def process(
         self,
@@ -53,19 +121,56 @@ class PageProcessor:
         output_dir: str,
         operations: list[str],
         progress_callback: Optional[Callable[[dict], None]] = None,
+        priors: Optional[DocumentPriors] = None,
     ) -> dict:
         """
-        Process a single page image.
+        Process a single page image and wait for its outputs to be written.
 
         Args:
             input_path: Path to input image
             output_dir: Directory for output files
             operations: List of operations to perform
             progress_callback: Function to call with progress updates
+            priors: Layout learned from earlier pages of the same document
+                    (see DocumentProcessor); narrows gutter search and can
+                    skip facing-page detection
 
         Returns:
             Dictionary with results and metadata
         """
+        if not self.track_memory:
+            return self.submit(input_path, output_dir, operations, progress_callback, priors).wait()
+
+        # Measured here rather than in submit: overlapping pages would share one process-wide peak.
+        with MemoryProbe() as memory:
+            result = self.submit(input_path, output_dir, operations, progress_callback, priors, memory).wait()
+            result["memory"] = memory.report()
+        return result
+
+    def submit(
+        self,
+        input_path: str,
+        output_dir: str,
+        operations: list[str],
+        progress_callback: Optional[Callable[[dict], None]] = None,
+        priors: Optional[DocumentPriors] = None,
+        memory: Optional[MemoryProbe] = None,
+    ) -> PendingPage:
+        """
+        Process a single page image, leaving its outputs writing in the background.
+
+        Each output page is queued on the writer as soon as it is rendered, so
+        encoding overlaps with the remaining work; callers may process the next
+        page before calling `wait()` on the returned handle.
+
+        Args:
+            Same as `process`, plus:
+            memory: Started probe that gets a checkpoint after each stage
+                    (the last one, "save", when `wait()` returns)
+
+        Returns:
+            PendingPage whose `wait()` returns the result dictionary
+        """
         def progress(stage: str, message: str, **kwargs):
             if progress_callback:
                 progress_callback({
@@ -74,26 +179,26 @@ class PageProcessor:
                     **kwargs,
                 })
 
+        def checkpoint(stage: str, *arrays):
+            if memory is not None:
+                memory.checkpoint(stage, arrays)
+
         timings_ms: dict = {}
         total_start = time.monotonic()
 
         # Load image
         load_start = time.monotonic()
         progress("loading", f"Loading {input_path}")
-        image = cv2.imread(input_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {input_path}")
+        image, color_mode = load_native(input_path)
+        # 1-bit sources stay single-channel end to end and are saved as 1-bit PNGs.
+        bitonal = color_mode == "bitonal"
         timings_ms["load"] = int((time.monotonic() - load_start) * 1000)
+        checkpoint("load", image)
 
         original_height, original_width = image.shape[:2]
-        input_stem = Path(input_path).stem
+        input_stem = image_stem(input_path)
 
-        # PNG compression is lossless; lower values speed up saves dramatically on large pages.
-        try:
-            png_compression = int(os.environ.get("PAGE_PROCESSOR_PNG_COMPRESSION", "1"))
-        except Exception:
-            png_compression = 1
-        png_compression = max(0, min(9, png_compression))
+        png_compression = self.writer.png_compression
 
         # Detection phase
         detect_start = time.monotonic()
@@ -107,33 +212,58 @@ class PageProcessor:
 
         detect_breakdown: dict = {}
 
+        # Raw output hands whole pages to the caller, so there is nothing to stream.
+        tiled = self.output_format == "png" and original_width * original_height >= self.tile_pixels
+
+        # One shared context: detectors reuse the same gray/downscale/Otsu/Canny rasters.
+        ctx = AnalysisContext(image, keep_full_gray=not tiled)
+
+        prior_usage: dict = {"facing_pages": False, "gutter": False}
+        gutter_prior = priors.gutter_x_norm if priors else None
+        skew_prior = priors.skew_angle if priors else None
+        located_gutter: Optional[int] = None
+
         if 'split' in operations and self.auto_detect:
             t0 = time.monotonic()
-            detection["was_facing_pages"] = detect_facing_pages(image)
+            if priors is not None and priors.same_layout(original_width, original_height):
+                if priors.facing_pages:
+                    # Same layout as earlier spreads: a gutter found near the prior confirms it.
+                    gutter_x, _, used = locate_gutter(image, ctx=ctx, prior_x_norm=gutter_prior)
+                    if used:
+                        detection["was_facing_pages"] = True
+                        located_gutter = gutter_x
+                        prior_usage["facing_pages"] = prior_usage["gutter"] = True
+                    else:
+                        detection["was_facing_pages"] = detect_facing_pages(image, ctx=ctx)
+                else:
+                    detection["was_facing_pages"] = False
+                    prior_usage["facing_pages"] = True
+            else:
+                detection["was_facing_pages"] = detect_facing_pages(image, ctx=ctx)
             detect_breakdown["facing_pages"] = int((time.monotonic() - t0) * 1000)
 
         if 'deskew' in operations:
             t0 = time.monotonic()
-            detection["skew_angle"] = detect_skew_angle(image)
+            detection["skew_angle"] = detect_skew_angle(image, ctx=ctx, prior=skew_prior)
             detect_breakdown["skew_angle"] = int((time.monotonic() - t0) * 1000)
 
         if 'dewarp' in operations:
             t0 = time.monotonic()
-            detection["curvature_score"] = detect_curvature(image)
+            detection["curvature_score"] = detect_curvature(image, ctx=ctx)
             detect_breakdown["curvature_score"] = int((time.monotonic() - t0) * 1000)
 
         if 'crop' in operations:
             t0 = time.monotonic()
-            detection["content_bounds"] = detect_content_bounds(image)
+            detection["content_bounds"] = detect_content_bounds(image, ctx=ctx)
             detect_breakdown["content_bounds"] = int((time.monotonic() - t0) * 1000)
 
         timings_ms["detect"] = {
             "total": int((time.monotonic() - detect_start) * 1000),
             **detect_breakdown,
         }
+        checkpoint("detect", *ctx.buffers())
 
         # Processing phase
-        pages = [image]
         operations_applied = []
         split_debug: Optional[dict] = None
 
@@ -147,17 +277,22 @@ class PageProcessor:
             elif self.auto_detect and detection["was_facing_pages"]:
                 should_split = True
 
+        gutter_x: Optional[int] = None
         if should_split:
             progress("splitting", "Splitting facing pages")
-            gutter_x = find_gutter_position(image)
-            left, right = split_facing_pages(image, gutter_x=gutter_x)
-            pages = [left, right]
+            if located_gutter is not None:
+                gutter_x = located_gutter
+            else:
+                gutter_x, _, prior_usage["gutter"] = locate_gutter(image, ctx=ctx, prior_x_norm=gutter_prior)
+                gutter_x = int(gutter_x)
+            left_w = min(gutter_x, original_width)
+            right_w = original_width - max(gutter_x, 0)
             operations_applied.append("split")
             split_debug = {
                 "gutter_x": int(gutter_x),
                 "gutter_x_norm": float(gutter_x) / float(max(1, original_width)),
-                "left_size": {"width": int(left.shape[1]), "height": int(left.shape[0])},
-                "right_size": {"width": int(right.shape[1]), "height": int(right.shape[0])},
+                "left_size": {"width": int(left_w), "height": int(original_height)},
+                "right_size": {"width": int(right_w), "height": int(original_height)},
             }
 
             # Optional debug overlay to validate gutter detection visually.
@@ -177,28 +312,309 @@ class PageProcessor:
                     # Debug outputs are best-effort only.
                     pass
         timings_ms["split"] = int((time.monotonic() - split_start) * 1000)
+        checkpoint("split", *ctx.buffers())
+
+        # Dewarp is a non-affine remap, so pages that get dewarped go through the staged
+        # pipeline; everything else is planned and rendered with one warp per page.
+        dewarp_applies = (
+            'dewarp' in operations
+            and float(detection.get("curvature_score") or 0.0) >= self.min_curvature
+        )
+        run = self._process_staged if dewarp_applies or not self.fused else self._process_fused
+        processed_pages, deskew_debug = run(
+            image, ctx, gutter_x, detection, operations, operations_applied, timings_ms, progress,
+            skew_prior, bitonal, checkpoint,
+        )
+
+        # Save outputs: each page goes to the writer pool as soon as it exists
+        # (fused pages are rendered here, one at a time).
+        save_start = time.monotonic()
+        render_ms = 0
+        output_paths = []
+        output_sizes = []
+        writes = []
+        for i, page in enumerate(processed_pages):
+            if isinstance(page, PageGeometry) and not tiled:
+                t0 = time.monotonic()
+                page = page.render(image)
+                render_ms += int((time.monotonic() - t0) * 1000)
+
+            page_suffix = f"_{i+1}" if len(processed_pages) > 1 else ""
+            if self.output_format == "raw":
+                output_filename = f"{input_stem}{page_suffix}.raw"
+                location = str(Path(output_dir) / output_filename) if self.raw_storage == "mmap" else ""
+                output_path = raw_handle(RawImageHeader(self.raw_storage, location).describe(page))
+            else:
+                output_filename = f"{input_stem}{page_suffix}.png"
+                output_path = str(Path(output_dir) / output_filename)
+
+            progress("saving", f"Saving {output_filename}")
+            if isinstance(page, PageGeometry):
+                # Tiled: the writer thread renders and encodes the page strip by strip.
+                channels = image.shape[2] if image.ndim == 3 else 1
+                strips = partial(page.render_strips, image, TILE_STRIP_ROWS)
+                writes.append(self.writer.submit_strips(
+                    strips, page.width, page.height, channels, output_path, bilevel=bitonal,
+                ))
+                pw, ph = page.width, page.height
+            else:
+                writes.append(self.writer.submit(page, output_path, bilevel=bitonal))
+                ph, pw = page.shape[:2]
+            output_paths.append(output_path)
+            output_sizes.append({"width": int(pw), "height": int(ph)})
+        if "render" in timings_ms:
+            timings_ms["render"] = render_ms
+        checkpoint("render", image)
+
+        result = {
+            "success": True,
+            "input_path": input_path,
+            "output_paths": output_paths,
+            "output_sizes": output_sizes,
+            "operations_applied": operations_applied,
+            "detection": detection,
+            "split_debug": split_debug,
+            "deskew_debug": deskew_debug if 'deskew' in operations else None,
+            "original_size": {
+                "width": original_width,
+                "height": original_height,
+            },
+            "prior_usage": prior_usage if priors is not None else None,
+            "tiled": tiled,
+            "color_mode": color_mode,
+            "timings_ms": timings_ms,
+        }
+        return PendingPage(
+            result,
+            writes,
+            progress_callback=progress_callback,
+            total_start=total_start,
+            save_start=save_start,
+            memory=memory,
+        )
+
+    def _page_skew(
+        self,
+        page: np.ndarray,
+        page_ctx: Optional[AnalysisContext],
+        n_pages: int,
+        detection: dict,
+        skew_prior: Optional[float],
+    ) -> float:
+        # IMPORTANT:
+        # If we split a spread, each half can have different "best" skew angle. Using the
+        # whole-spread angle tends to over-rotate one side (often near the gutter), which
+        # looks like a wrong/warped deskew. So we detect skew per output page after split.
+        if n_pages > 1:
+            return float(detect_skew_angle(page, ctx=page_ctx, prior=skew_prior) or 0.0)
+        return float(detection.get("skew_angle") or 0.0)
+
+    def _split_crop_rect(self, i: int, b: dict, y1: int, y2: int, pw: int, ph: int) -> Optional[tuple]:
+        # When splitting, avoid asymmetric "content crop" that can cut one half differently
+        # and/or remove information near the gutter. We:
+        # - unify top/bottom crop between halves (y1/y2 come from both pages)
+        # - crop only on the *outer* edges (left edge of left page, right edge of right page)
+        pad = int(self.crop_padding)
+        y1p = max(0, y1 - pad)
+        y2p = min(ph, y2 + pad)
+
+        # Preserve the gutter-side edge to avoid cutting inner content.
+        if i == 0:
+            x1 = max(0, int(b["x"]) - pad)
+            x2 = pw
+        else:
+            x1 = 0
+            x2 = min(pw, int(b["x"] + b["width"]) + pad)
+
+        if x2 <= x1 or y2p <= y1p:
+            return None
+        return x1, y1p, x2, y2p
+
+    def _process_fused(
+        self,
+        image: np.ndarray,
+        ctx: AnalysisContext,
+        gutter_x: Optional[int],
+        detection: dict,
+        operations: list[str],
+        operations_applied: list[str],
+        timings_ms: dict,
+        progress: Callable,
+        skew_prior: Optional[float] = None,
+        bitonal: bool = False,
+        checkpoint: Callable = lambda stage, *arrays: None,
+    ) -> tuple[list[PageGeometry], list[dict]]:
+        """
+        Plan split/deskew/crop/normalize per page (rendered once, at save time).
+
+        Every geometric step is folded into a `PageGeometry`; content bounds for
+        cropping are measured on the page's analysis-scale binarization carried
+        through the plan, so no full-resolution intermediate is ever allocated.
+        """
+        h, w = image.shape[:2]
+        if gutter_x is None:
+            plans = [PageGeometry(0, 0, w, h, bitonal=bitonal)]
+            page_ctxs = [ctx]
+        else:
+            left_end = min(gutter_x, w)
+            right_start = max(gutter_x, 0)
+            plans = [
+                PageGeometry(0, 0, left_end, h, bitonal=bitonal),
+                PageGeometry(right_start, 0, w - right_start, h, bitonal=bitonal),
+            ]
+            page_ctxs = [
+                AnalysisContext(plan.region(image), keep_full_gray=ctx.keep_full_gray) for plan in plans
+            ]
+
+        def analysis_buffers() -> list[np.ndarray]:
+            # Plans hold no pixels: only the source and the analysis rasters are alive.
+            return [b for c in (ctx, *page_ctxs) for b in c.buffers()]
+
+        # 2. Deskew
+        deskew_start = time.monotonic()
+        deskew_debug: list[dict] = []
+        if 'deskew' in operations:
+            for i, (plan, page_ctx) in enumerate(zip(plans, page_ctxs)):
+                page_suffix = f"_{i+1}" if len(plans) > 1 else ""
+                page_skew = self._page_skew(plan.region(image), page_ctx, len(plans), detection, skew_prior)
+                applied = abs(page_skew) >= self.min_skew_angle
+                if applied:
+                    progress("deskewing", f"Deskewing page{page_suffix} by {page_skew:.2f}°")
+                    plan.rotate(page_skew)
+                    if 'deskew' not in operations_applied:
+                        operations_applied.append("deskew")
+                deskew_debug.append({"page_index": i + 1, "angle": float(page_skew), "applied": applied})
+        timings_ms["deskew_dewarp"] = int((time.monotonic() - deskew_start) * 1000)
+        checkpoint("deskew_dewarp", *analysis_buffers())
+
+        # 3. Crop
+        crop_start = time.monotonic()
+        if 'crop' in operations:
+            progress("cropping", "Cropping page")
+            bounds_list = [
+                self._planned_content_bounds(image, plan, page_ctx)
+                for plan, page_ctx in zip(plans, page_ctxs)
+            ]
+            if len(plans) == 1:
+                b = bounds_list[0]
+                if b:
+                    plan = plans[0]
+                    pad = self.crop_padding
+                    plan.crop(
+                        max(0, b["x"] - pad),
+                        max(0, b["y"] - pad),
+                        min(plan.width, b["x"] + b["width"] + pad),
+                        min(plan.height, b["y"] + b["height"] + pad),
+                    )
+                    operations_applied.append("crop")
+            else:
+                valid_bounds = [b for b in bounds_list if b]
+                if valid_bounds:
+                    y1 = min(int(b["y"]) for b in valid_bounds)
+                    y2 = max(int(b["y"] + b["height"]) for b in valid_bounds)
+                    for i, plan in enumerate(plans):
+                        b = bounds_list[i]
+                        rect = self._split_crop_rect(i, b, y1, y2, plan.width, plan.height) if b else None
+                        if rect:
+                            plan.crop(*rect)
+                    operations_applied.append("crop")
+        timings_ms["crop"] = int((time.monotonic() - crop_start) * 1000)
+        checkpoint("crop", *analysis_buffers())
+
+        # 4. Normalize page sizes after splitting:
+        # pad to the largest width/height (no scaling) and center the content.
+        normalize_start = time.monotonic()
+        if len(plans) > 1:
+            target_w = max(plan.width for plan in plans)
+            target_h = max(plan.height for plan in plans)
+            for plan in plans:
+                if plan.width != target_w or plan.height != target_h:
+                    plan.pad_to(target_w, target_h)
+        timings_ms["normalize"] = int((time.monotonic() - normalize_start) * 1000)
+        checkpoint("normalize", *analysis_buffers())
+
+        # 5. Render happens at save time: one warp (or plain copy/view) per page, straight
+        # into the final canvas, so each page's encode overlaps the next page's render.
+        timings_ms["render"] = 0
+        return plans, deskew_debug
+
+    def _planned_content_bounds(
+        self,
+        image: np.ndarray,
+        plan: PageGeometry,
+        page_ctx: AnalysisContext,
+    ) -> Optional[dict]:
+        """
+        Content bounds of a planned page, in the plan's output coordinates.
+
+        The staged pipeline thresholds the rendered page; rotation adds only
+        paper to it, so the source region's binarization, carried through the
+        plan, marks the same ink. (Re-thresholding a resampled grey preview
+        does not: interpolation blurs strokes into mid greys and moves the
+        Otsu threshold far enough to take a gutter shadow for content.)
+        """
+        if plan.is_translation:
+            # Nothing rotated yet: the page is its source region.
+            return detect_content_bounds(plan.region(image), ctx=page_ctx)
+
+        scale = page_ctx.scale
+        mask = plan.preview_mask(page_ctx.binary(), scale)
+        return content_bounds_from_mask(mask, scale, plan.width, plan.height)
+
+    def _process_staged(
+        self,
+        image: np.ndarray,
+        ctx: AnalysisContext,
+        gutter_x: Optional[int],
+        detection: dict,
+        operations: list[str],
+        operations_applied: list[str],
+        timings_ms: dict,
+        progress: Callable,
+        skew_prior: Optional[float] = None,
+        bitonal: bool = False,
+        checkpoint: Callable = lambda stage, *arrays: None,
+    ) -> tuple[list[np.ndarray], list[dict]]:
+        """
+        Run split/deskew/dewarp/crop/normalize one stage at a time (needed for dewarp).
+
+        Pages are views of `image` until a stage that resamples (deskew, dewarp,
+        normalize padding) gives them their own buffer; split and crop never
+        copy. Nothing here writes into a page in place, so views are safe to
+        hand to the writer, which accepts strided arrays.
+        """
+        pages = [image]
+        page_ctxs = [ctx]
+        if gutter_x is not None:
+            left, right = split_facing_pages(image, gutter_x=gutter_x)
+            pages = [left, right]
+            page_ctxs = [
+                AnalysisContext(left, keep_full_gray=ctx.keep_full_gray),
+                AnalysisContext(right, keep_full_gray=ctx.keep_full_gray),
+            ]
 
         # Process each page (may be 1 or 2 after splitting)
         deskew_start = time.monotonic()
         processed_pages: list[np.ndarray] = []
+        # Analysis context per processed page; reset whenever a page is transformed.
+        processed_ctxs: list[Optional[AnalysisContext]] = []
         deskew_debug: list[dict] = []
         for i, page in enumerate(pages):
+            page_ctx: Optional[AnalysisContext] = page_ctxs[i]
+            # Drop our references to the split view and its analysis buffers so
+            # they are freed as soon as this page is transformed.
+            pages[i] = page_ctxs[i] = None
             page_suffix = f"_{i+1}" if len(pages) > 1 else ""
 
             # 2. Deskew
             if 'deskew' in operations:
-                # IMPORTANT:
-                # If we split a spread, each half can have different "best" skew angle. Using the
-                # whole-spread angle tends to over-rotate one side (often near the gutter), which
-                # looks like a wrong/warped deskew. So we detect skew per output page after split.
-                if len(pages) > 1:
-                    page_skew = float(detect_skew_angle(page) or 0.0)
-                else:
-                    page_skew = float(detection.get("skew_angle") or 0.0)
-
+                page_skew = self._page_skew(page, page_ctx, len(pages), detection, skew_prior)
                 if abs(page_skew) >= self.min_skew_angle:
                     progress("deskewing", f"Deskewing page{page_suffix} by {page_skew:.2f}°")
                     page = deskew_page(page, page_skew)
+                    if bitonal:
+                        page = rebinarize(page)
+                    page_ctx = None
                     if 'deskew' not in operations_applied:
                         operations_applied.append("deskew")
                     deskew_debug.append({"page_index": i + 1, "angle": float(page_skew), "applied": True})
@@ -207,70 +623,59 @@ class PageProcessor:
 
             # 3. Dewarp
             if 'dewarp' in operations:
-                # Import lazily; page_dewarp pulls heavy deps (matplotlib/sympy) and should not
-                # impact non-dewarp runs.
-                from dewarp import dewarp_page
-
                 curvature = float(detection.get("curvature_score") or 0.0)
                 if curvature >= self.min_curvature:
                     progress("dewarping", f"Dewarping page{page_suffix}")
                     page = dewarp_page(page)
+                    if bitonal:
+                        page = rebinarize(page)
+                    page_ctx = None
                     if 'dewarp' not in operations_applied:
                         operations_applied.append("dewarp")
 
             processed_pages.append(page)
+            processed_ctxs.append(page_ctx)
         timings_ms["deskew_dewarp"] = int((time.monotonic() - deskew_start) * 1000)
+        checkpoint(
+            "deskew_dewarp", image, *processed_pages, *(b for c in processed_ctxs if c for b in c.buffers()),
+        )
 
         crop_start = time.monotonic()
         if 'crop' in operations:
             if len(processed_pages) == 1:
                 progress("cropping", "Cropping page")
-                bounds = detect_content_bounds(processed_pages[0])
+                bounds = detect_content_bounds(processed_pages[0], ctx=processed_ctxs[0])
                 if bounds:
-                    processed_pages[0] = crop_to_content(processed_pages[0], bounds, padding=self.crop_padding)
+                    processed_pages[0] = crop_to_content(
+                        processed_pages[0], bounds, padding=self.crop_padding, copy=False,
+                    )
                     if 'crop' not in operations_applied:
                         operations_applied.append("crop")
             else:
-                # When splitting, avoid asymmetric "content crop" that can cut one half differently
-                # and/or remove information near the gutter. We:
-                # - unify top/bottom crop between halves
-                # - crop only on the *outer* edges (left edge of left page, right edge of right page)
-                bounds_list = [detect_content_bounds(p) for p in processed_pages]
+                bounds_list = [
+                    detect_content_bounds(p, ctx=c) for p, c in zip(processed_pages, processed_ctxs)
+                ]
                 valid_bounds = [b for b in bounds_list if b]
                 if valid_bounds:
                     y1 = min(int(b["y"]) for b in valid_bounds)
                     y2 = max(int(b["y"] + b["height"]) for b in valid_bounds)
-                    pad = int(self.crop_padding)
 
                     cropped_pages: list[np.ndarray] = []
                     for i, page in enumerate(processed_pages):
                         b = bounds_list[i]
-                        if not b:
-                            cropped_pages.append(page)
-                            continue
-
                         ph, pw = page.shape[:2]
-                        y1p = max(0, y1 - pad)
-                        y2p = min(ph, y2 + pad)
-
-                        # Preserve the gutter-side edge to avoid cutting inner content.
-                        if i == 0:
-                            x1 = max(0, int(b["x"]) - pad)
-                            x2 = pw
-                        else:
-                            x1 = 0
-                            x2 = min(pw, int(b["x"] + b["width"]) + pad)
-
-                        if x2 <= x1 or y2p <= y1p:
+                        rect = self._split_crop_rect(i, b, y1, y2, pw, ph) if b else None
+                        if rect is None:
                             cropped_pages.append(page)
                             continue
-
-                        cropped_pages.append(page[y1p:y2p, x1:x2].copy())
+                        x1, y1p, x2, y2p = rect
+                        cropped_pages.append(page[y1p:y2p, x1:x2])
 
                     processed_pages = cropped_pages
                     if 'crop' not in operations_applied:
                         operations_applied.append("crop")
         timings_ms["crop"] = int((time.monotonic() - crop_start) * 1000)
+        checkpoint("crop", image, *processed_pages)
 
         # Normalize page sizes after splitting:
         # pad to the largest width/height (no scaling) and center the content.
@@ -299,42 +704,6 @@ class PageProcessor:
 
             processed_pages = normalized
         timings_ms["normalize"] = int((time.monotonic() - normalize_start) * 1000)
+        checkpoint("normalize", image, *processed_pages)
 
-        # Save outputs
-        save_start = time.monotonic()
-        output_paths = []
-        output_sizes = []
-        for i, page in enumerate(processed_pages):
-            page_suffix = f"_{i+1}" if len(processed_pages) > 1 else ""
-            output_filename = f"{input_stem}{page_suffix}.png"
-            output_path = Path(output_dir) / output_filename
-
-            progress("saving", f"Saving {output_filename}")
-            cv2.imwrite(
-                str(output_path),
-                page,
-                [cv2.IMWRITE_PNG_COMPRESSION, png_compression],
-            )
-            output_paths.append(str(output_path))
-            ph, pw = page.shape[:2]
-            output_sizes.append({"width": int(pw), "height": int(ph)})
-        timings_ms["save"] = int((time.monotonic() - save_start) * 1000)
-
-        return {
-            "success": True,
-            "input_path": input_path,
-            "output_paths": output_paths,
-            "output_sizes": output_sizes,
-            "operations_applied": operations_applied,
-            "detection": detection,
-            "split_debug": split_debug,
-            "deskew_debug": deskew_debug if 'deskew' in operations else None,
-            "original_size": {
-                "width": original_width,
-                "height": original_height,
-            },
-            "timings_ms": {
-                **timings_ms,
-                "total": int((time.monotonic() - total_start) * 1000),
-            },
-        }
+        return processed_pages, deskew_debug
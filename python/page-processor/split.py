@@ -4,11 +4,11 @@ Page Splitting
 Splits facing page scans (double-page spreads) into individual pages.
 """
 
-import cv2
 import numpy as np
-from typing import Tuple
+from typing import Optional, Tuple
 
-from stages.image_utils import _to_gray, _resize_for_analysis, _smooth_1d
+from stages.image_utils import AnalysisContext, _smooth_1d
+from stages.profiling import timed
 
 
 def _confidence_from_valley(curve: np.ndarray, idx: int) -> float:
@@ -65,7 +65,20 @@ def _band_edges(curve: np.ndarray, idx: int) -> tuple[int, int]:
     return int(left), int(right)
 
 
-def find_gutter_position(image: np.ndarray) -> int:
+# Half-width (fraction of image width) of the window searched around a gutter prior.
+GUTTER_PRIOR_WINDOW = 0.06
+
+# A valley outside the prior window wins only if its score beats the best valley
+# inside the window by more than this (scores are 0..1 blends of normalized curves).
+GUTTER_PRIOR_TOLERANCE = 0.10
+
+
+# Not @timed: the work (and its span) is in locate_gutter.
+def find_gutter_position(
+    image: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
+    prior_x_norm: Optional[float] = None,
+) -> int:
     """
     Find the vertical gutter (fold line) position.
 
@@ -76,13 +89,41 @@ def find_gutter_position(image: np.ndarray) -> int:
 
     Args:
         image: Input image (BGR format)
+        ctx: Shared analysis context for `image` (built if omitted)
+        prior_x_norm: Expected gutter position (fraction of width), e.g. from
+                      neighbouring pages of the same book
 
     Returns:
         X coordinate of the gutter
     """
+    return locate_gutter(image, ctx=ctx, prior_x_norm=prior_x_norm)[0]
+
+
+@timed
+def locate_gutter(
+    image: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
+    prior_x_norm: Optional[float] = None,
+) -> Tuple[int, float, bool]:
+    """
+    Find the gutter, preferring a narrow window around a prior position.
+
+    The valley is picked inside `prior_x_norm +/- GUTTER_PRIOR_WINDOW` unless a
+    clearly stronger valley exists elsewhere (e.g. a page from another part of
+    the book), in which case the full-range result is used.
+
+    Args:
+        image: Input image (BGR format)
+        ctx: Shared analysis context for `image` (built if omitted)
+        prior_x_norm: Expected gutter position (fraction of width), or None
+
+    Returns:
+        Tuple of (gutter_x, confidence, used_prior)
+    """
     h, w = image.shape[:2]
-    gray = _to_gray(image)
-    gray_small, scale = _resize_for_analysis(gray, max_dim=1500)
+    if ctx is None:
+        ctx = AnalysisContext(image)
+    gray_small, scale = ctx.level()
     hs, ws = gray_small.shape[:2]
 
     # Gutter is usually near the middle, but allow real-world off-center scans.
@@ -90,7 +131,7 @@ def find_gutter_position(image: np.ndarray) -> int:
     start = int(ws * 0.10)
     end = int(ws * 0.90)
     if end <= start + 10:
-        return w // 2
+        return w // 2, 0.0, False
 
     region = gray_small[:, start:end]
     region_w = int(region.shape[1])
@@ -99,7 +140,7 @@ def find_gutter_position(image: np.ndarray) -> int:
     proj = np.sum(inverted.astype(np.float64), axis=0)
     proj_s = _smooth_1d(proj, kernel_size=max(9, region_w // 25))
 
-    edges = cv2.Canny(gray_small, 50, 150)
+    edges = ctx.edges()
     edge_region = edges[:, start:end]
     edge_proj = np.sum((edge_region > 0).astype(np.uint8), axis=0).astype(np.float64)
     edge_s = _smooth_1d(edge_proj, kernel_size=max(9, region_w // 25))
@@ -153,11 +194,12 @@ def find_gutter_position(image: np.ndarray) -> int:
     else:
         w_ink, w_edge, w_shadow = 0.45, 0.20, 0.35
 
-    score = (ink_score * w_ink) + (edge_score * w_edge) + (shadow_score * w_shadow)
+    raw_score = (ink_score * w_ink) + (edge_score * w_edge) + (shadow_score * w_shadow)
 
     # Soft prior toward center to avoid selecting scanner borders when ambiguous.
     xs = np.arange(region_w, dtype=np.float64)
     center = (region_w - 1) / 2.0
+    score = raw_score.copy()
     if center > 1:
         dist = np.abs(xs - center) / center
         score = score - (dist ** 2) * 0.22
@@ -171,6 +213,20 @@ def find_gutter_position(image: np.ndarray) -> int:
     if not np.isfinite(float(score[idx])):
         idx = region_w // 2
 
+    used_prior = False
+    if prior_x_norm is not None:
+        # Document prior replaces the centre prior: best valley inside the window,
+        # unless the unconstrained valley is clearly stronger.
+        prior_idx = float(prior_x_norm) * ws - start
+        half = GUTTER_PRIOR_WINDOW * ws
+        window = (np.abs(xs - prior_idx) <= half) & np.isfinite(score)
+        if np.any(window):
+            windowed = np.where(window, raw_score, -np.inf)
+            prior_best = int(np.argmax(windowed))
+            if float(raw_score[prior_best]) >= float(raw_score[idx]) - GUTTER_PRIOR_TOLERANCE:
+                idx = prior_best
+                used_prior = True
+
     # Decide which signal to use to estimate the gutter *band* width.
     comp_ink = float(ink_score[idx]) * w_ink
     comp_edge = float(edge_score[idx]) * w_edge
@@ -189,6 +245,7 @@ def find_gutter_position(image: np.ndarray) -> int:
     # between pages without "assigning" the whole gutter/shadow to one side.
     left_edge_idx, right_edge_idx = _band_edges(band_curve, idx)
     band_center_idx = int((int(left_edge_idx) + int(right_edge_idx)) // 2)
+    confidence = _confidence_from_valley(band_curve, idx)
     split_small = start + band_center_idx
     split_small = int(np.clip(split_small, start + 1, end - 1))
 
@@ -201,13 +258,15 @@ def find_gutter_position(image: np.ndarray) -> int:
     max_x = int(w * 0.97)
     gutter_x = max(min_x, min(max_x, gutter_x))
 
-    return gutter_x
+    return gutter_x, confidence, used_prior
 
 
+@timed
 def split_facing_pages(
     image: np.ndarray,
     gutter_x: int = None,
     overlap: int = 0,
+    copy: bool = False,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """
     Split a facing pages image into left and right pages.
@@ -216,9 +275,11 @@ def split_facing_pages(
         image: Input image (BGR format)
         gutter_x: X coordinate of split (auto-detected if None)
         overlap: Pixels to include from each side of the gutter
+        copy: Return independent arrays instead of views of `image`
 
     Returns:
-        Tuple of (left_page, right_page) images
+        Tuple of (left_page, right_page) images; views of `image` unless
+        `copy` is set, so write into them only after copying
     """
     h, w = image.shape[:2]
 
@@ -229,7 +290,9 @@ def split_facing_pages(
     left_end = min(gutter_x + overlap, w)
     right_start = max(gutter_x - overlap, 0)
 
-    left_page = image[:, :left_end].copy()
-    right_page = image[:, right_start:].copy()
+    left_page = image[:, :left_end]
+    right_page = image[:, right_start:]
+    if copy:
+        left_page, right_page = left_page.copy(), right_page.copy()
 
     return left_page, right_page
@@ -12,8 +12,10 @@ import numpy as np
 from dataclasses import dataclass, asdict
 from typing import Optional, List, Tuple
 
-from .io import load_image, load_grayscale, save_image
+from .io import load_grayscale, load_native, probe_image, save_image
 from .geometry import rotate_angle
+from .image_utils import ANALYSIS_MAX_DIM, AnalysisContext, hough_line_stats, rebinarize
+from .profiling import span, timed
 
 # Legacy note: we previously supported the `deskew` library, but we now use OpenCV-only
 # methods for performance and packaging simplicity.
@@ -34,6 +36,7 @@ class DeskewResult:
         return asdict(self)
 
 
+@timed
 def detect_deskew(
     image_path: str,
     min_angle: float = 0.5,
@@ -55,14 +58,17 @@ def detect_deskew(
     Returns:
         DeskewResult with detected angle and confidence
     """
-    gray = load_grayscale(image_path)
+    # Detection never needs the full raster; JPEGs decode directly at reduced size.
+    info = probe_image(image_path)
+    gray = load_grayscale(image_path, max_dim=ANALYSIS_MAX_DIM, info=info)
     h, w = gray.shape
+    ctx = AnalysisContext(gray)
 
     # Method 1: Hough transform
-    hough_result = detect_skew_hough(gray, max_angle)
+    hough_result = detect_skew_hough(gray, max_angle, ctx)
 
     # Method 2: Projection profile
-    projection_result = detect_skew_projection(gray, max_angle)
+    projection_result = detect_skew_projection(gray, max_angle, ctx)
 
     # Combine results with weighted voting
     weights = {
@@ -99,7 +105,7 @@ def detect_deskew(
         final_confidence *= 0.5  # Reduce confidence for clamped angles
 
     # Determine if correction is needed
-    needs_correction = abs(final_angle) >= min_angle
+    needs_correction = bool(abs(final_angle) >= min_angle)
 
     # Find best method
     method_scores = {m[0]: m[2] * weights[m[0]] for m in methods}
@@ -122,14 +128,17 @@ def detect_deskew(
             'method_scores': method_scores,
             'min_angle_threshold': min_angle,
             'max_angle_limit': max_angle,
-            'image_size': {'width': w, 'height': h},
+            'image_size': {'width': info.width, 'height': info.height},
+            'analysis_size': {'width': w, 'height': h},
         }
     )
 
 
+@timed
 def detect_skew_hough(
     gray: np.ndarray,
     max_angle: float = 15.0,
+    ctx: Optional[AnalysisContext] = None,
 ) -> dict:
     """
     Detect skew using Hough line transform.
@@ -140,6 +149,7 @@ def detect_skew_hough(
     Args:
         gray: Grayscale image
         max_angle: Maximum expected skew angle
+        ctx: Shared analysis context for `gray` (built if omitted)
 
     Returns:
         Dictionary with angle and confidence
@@ -147,138 +157,154 @@ def detect_skew_hough(
     h, w = gray.shape
 
     # Apply edge detection
-    edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+    if ctx is None:
+        ctx = AnalysisContext(gray)
+    edges = ctx.edges(None)
 
     # Apply morphological operations to connect text
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (w // 30, 1))
-    dilated = cv2.dilate(edges, kernel, iterations=1)
+    with span('cv2.dilate'):
+        dilated = cv2.dilate(edges, kernel, iterations=1)
 
     # Hough line detection
-    lines = cv2.HoughLinesP(
-        dilated,
-        rho=1,
-        theta=np.pi / 180,
-        threshold=100,
-        minLineLength=w // 8,
-        maxLineGap=w // 20,
-    )
-
-    if lines is None or len(lines) == 0:
-        return {'angle': 0.0, 'confidence': 0.0, 'lines_count': 0}
-
-    # Calculate angles of all lines
-    angles = []
-    line_lengths = []
+    with span('cv2.HoughLinesP'):
+        lines = cv2.HoughLinesP(
+            dilated,
+            rho=1,
+            theta=np.pi / 180,
+            threshold=100,
+            minLineLength=w // 8,
+            maxLineGap=w // 20,
+        )
+
+    # 5 degree std = 0 consistency; 20+ lines = max count confidence
+    stats = hough_line_stats(lines, max_angle=max_angle, std_scale=5.0, count_scale=20.0)
+    if stats['lines_count'] == 0:
+        return {'angle': 0.0, 'confidence': 0.0, 'lines_count': stats['total_lines']}
 
-    for line in lines:
-        x1, y1, x2, y2 = line[0]
-        dx = x2 - x1
-        dy = y2 - y1
+    return {
+        'angle': stats['angle'],
+        'confidence': stats['confidence'],
+        'lines_count': stats['lines_count'],
+        'angle_std': stats['angle_std'],
+    }
 
-        if abs(dx) < 1:
-            continue  # Skip vertical lines
 
-        angle = np.arctan2(dy, dx) * 180 / np.pi
-        length = np.sqrt(dx**2 + dy**2)
+# Projection search schedule: (pyramid max_dim, half window in degrees, angles tested).
+# The first level spans the full +/-max_angle range; each later level narrows around
+# the previous best on a larger image. None = the analysis image itself.
+PROJECTION_LEVELS = (
+    (375, None, 31),
+    (750, 1.0, 21),
+    (None, 0.1, 11),
+)
 
-        # Only consider near-horizontal lines (likely text lines)
-        if abs(angle) <= max_angle:
-            angles.append(angle)
-            line_lengths.append(length)
 
-    if not angles:
-        return {'angle': 0.0, 'confidence': 0.0, 'lines_count': len(lines)}
+@timed
+def _projection_scores(binary: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """
+    Variance of the horizontal projection of `binary` rotated by each angle.
 
-    # Weight by line length
-    total_length = sum(line_lengths)
-    if total_length == 0:
-        weighted_angle = np.median(angles)
+    Nothing is warped: ink is rotated as coordinates (same centre and sign
+    convention as cv2.getRotationMatrix2D) and binned into rows, so each angle
+    costs one bincount. Ink is taken either pixel by pixel or, when cheaper,
+    as per-row sums over narrow column bands that are sheared as a unit (bands
+    are narrow enough that rows inside one band move by under half a pixel).
+    """
+    h, w = binary.shape[:2]
+    max_sin = float(np.max(np.abs(np.sin(np.deg2rad(angles))))) if len(angles) else 0.0
+    band = int(min(w, 0.5 / max_sin)) if max_sin > 0 else w
+    band = max(1, band)
+    n_bands = -(-w // band)
+
+    ink = cv2.countNonZero(binary)
+    if ink == 0:
+        return np.zeros(len(angles), dtype=np.float64)
+
+    if n_bands * h < ink:
+        # Band sums: weights[k, y] = ink in row y of band k, sheared at the band centre.
+        padded = binary
+        if n_bands * band != w:
+            padded = np.zeros((h, n_bands * band), dtype=binary.dtype)
+            padded[:, :w] = binary
+        weights = (padded.reshape(h, n_bands, band) > 0).sum(axis=2, dtype=np.float32).T
+        centres = np.minimum(np.arange(n_bands, dtype=np.float32) * band + (band - 1) / 2, w - 1)
+        dx = np.repeat(centres - np.float32(w / 2), h)
+        dy = np.tile(np.arange(h, dtype=np.float32) - np.float32(h / 2), n_bands)
+        weights = weights.reshape(-1)
     else:
-        weighted_angle = sum(a * l for a, l in zip(angles, line_lengths)) / total_length
-
-    # Calculate confidence based on angle consistency
-    angle_std = np.std(angles) if len(angles) > 1 else 0.0
-    consistency_score = max(0, 1 - angle_std / 5)  # 5 degree std = 0 confidence
-
-    # More lines = higher confidence
-    count_score = min(1.0, len(angles) / 20)  # 20+ lines = max confidence
-
-    confidence = consistency_score * 0.7 + count_score * 0.3
-
-    return {
-        'angle': weighted_angle,
-        'confidence': confidence,
-        'lines_count': len(angles),
-        'angle_std': angle_std,
-    }
-
-
+        ys, xs = np.nonzero(binary)
+        dx = xs.astype(np.float32) - np.float32(w / 2)
+        dy = ys.astype(np.float32) - np.float32(h / 2)
+        weights = None
+
+    scores = np.empty(len(angles), dtype=np.float64)
+    for i, angle in enumerate(angles):
+        theta = np.deg2rad(angle)
+        sin_t = np.float32(np.sin(theta))
+        cos_t = np.float32(np.cos(theta))
+        rx = cos_t * dx + sin_t * dy + np.float32(w / 2)
+        ry = cos_t * dy - sin_t * dx + np.float32(h / 2)
+        # Ink rotated out of the frame is dropped, as with a same-size warp.
+        inside = (rx >= 0) & (rx < w) & (ry >= 0) & (ry < h)
+        projection = np.bincount(
+            ry[inside].astype(np.int32),
+            weights=None if weights is None else weights[inside],
+            minlength=h,
+        )
+        scores[i] = np.var(projection * 255.0)
+    return scores
+
+
+@timed
 def detect_skew_projection(
     gray: np.ndarray,
     max_angle: float = 15.0,
+    ctx: Optional[AnalysisContext] = None,
 ) -> dict:
     """
     Detect skew using projection profile analysis.
 
-    Rotates the image at various angles and finds the angle
-    that produces the sharpest horizontal projection profile.
+    Searches coarse-to-fine on a binarized pyramid for the rotation that gives
+    the sharpest horizontal projection profile.
 
     Args:
         gray: Grayscale image
         max_angle: Maximum angle to test
+        ctx: Shared analysis context for `gray` (built if omitted)
 
     Returns:
         Dictionary with angle and confidence
     """
-    h, w = gray.shape
+    if ctx is None:
+        ctx = AnalysisContext(gray)
 
-    # Binarize
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-
-    # Test angles from -max_angle to +max_angle
-    angles_to_test = np.linspace(-max_angle, max_angle, 31)
     best_angle = 0.0
-    best_score = 0.0
-
-    # Calculate score for each angle
-    scores = []
-
-    for angle in angles_to_test:
-        # Rotate binary image
-        center = (w / 2, h / 2)
-        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(binary, matrix, (w, h), borderValue=0)
-
-        # Calculate horizontal projection
-        projection = np.sum(rotated, axis=1)
-
-        # Score is variance of projection (higher = sharper peaks)
-        score = np.var(projection)
-        scores.append(score)
+    coarse_scores: Optional[np.ndarray] = None
+    coarse_binary: Optional[np.ndarray] = None
 
-        if score > best_score:
-            best_score = score
-            best_angle = angle
+    for max_dim, window, count in PROJECTION_LEVELS:
+        binary = ctx.binary(max_dim)
+        if window is None:
+            angles = np.linspace(-max_angle, max_angle, count)
+        else:
+            angles = np.linspace(best_angle - window, best_angle + window, count)
 
-    # Refine best angle with finer search
-    fine_angles = np.linspace(best_angle - 1.0, best_angle + 1.0, 21)
-    for angle in fine_angles:
-        center = (w / 2, h / 2)
-        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(binary, matrix, (w, h), borderValue=0)
-        projection = np.sum(rotated, axis=1)
-        score = np.var(projection)
+        scores = _projection_scores(binary, angles)
+        best_angle = float(angles[int(np.argmax(scores))])
 
-        if score > best_score:
-            best_score = score
-            best_angle = angle
+        if coarse_scores is None:
+            coarse_scores = scores
+            coarse_binary = binary
 
     # Calculate confidence
-    # Compare best score to median score
-    median_score = np.median(scores)
+    # Compare the refined angle's score to the median score, both on the coarse level.
+    median_score = float(np.median(coarse_scores))
     if median_score == 0:
         confidence = 0.0
     else:
+        best_score = float(_projection_scores(coarse_binary, np.array([best_angle]))[0])
+        best_score = max(best_score, float(np.max(coarse_scores)))
         score_ratio = best_score / median_score
         confidence = min(1.0, (score_ratio - 1) / 0.5)  # 50% improvement = full confidence
 
@@ -301,6 +327,7 @@ def detect_skew_library(
     return {'angle': 0.0, 'confidence': 0.0}
 
 
+@timed
 def apply_deskew(
     image_path: str,
     output_path: str,
@@ -319,7 +346,7 @@ def apply_deskew(
     Returns:
         Result dictionary with output path and metadata
     """
-    image = load_image(image_path)
+    image, color_mode = load_native(image_path)
     h, w = image.shape[:2]
 
     if abs(angle) < 0.01:
@@ -328,10 +355,12 @@ def apply_deskew(
         rotation_applied = False
     else:
         rotated = rotate_angle(image, angle, background_color, expand=True)
+        if color_mode == 'bitonal':
+            rotated = rebinarize(rotated)
         rotation_applied = True
 
     new_h, new_w = rotated.shape[:2]
-    saved_path = save_image(rotated, output_path)
+    saved_path = save_image(rotated, output_path, bilevel=color_mode == 'bitonal')
 
     return {
         'success': True,
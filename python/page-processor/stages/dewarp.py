@@ -2,27 +2,28 @@
 Stage 3b: Dewarp Detection and Correction
 
 Detects and corrects page curvature (warping from book spine).
-Uses page_dewarp library for cubic spline-based dewarping.
+
+Correction runs fully in memory: text lines are fitted with quadratics at
+analysis resolution, turned into a vertical displacement field, and the page
+is resampled once with cv2.remap.
 
 This stage typically runs after deskew and before split detection.
 """
 
 import cv2
 import numpy as np
-import tempfile
-import os
 from dataclasses import dataclass, asdict
-from pathlib import Path
 from typing import Optional, Tuple
 
-from .io import load_image, load_grayscale, save_image
+from .io import load_grayscale, load_native, probe_image, save_image
+from .image_utils import ANALYSIS_MAX_DIM, AnalysisContext, rebinarize
+from .profiling import span, timed
+
+# Rows remapped per call; bounds the full-resolution map memory for huge pages.
+REMAP_STRIP_ROWS = 512
 
-# Try to import page_dewarp
-try:
-    from page_dewarp import dewarp as pd_dewarp
-    PAGE_DEWARP_AVAILABLE = True
-except ImportError:
-    PAGE_DEWARP_AVAILABLE = False
+# Minimum number of fitted text lines needed to build a displacement field.
+MIN_FIELD_LINES = 3
 
 
 @dataclass
@@ -40,6 +41,7 @@ class DewarpResult:
         return asdict(self)
 
 
+@timed
 def detect_dewarp(
     image_path: str,
     min_curvature: float = 0.1,
@@ -56,41 +58,42 @@ def detect_dewarp(
     Returns:
         DewarpResult with curvature assessment
     """
-    gray = load_grayscale(image_path)
+    # Detection never needs the full raster; JPEGs decode directly at reduced size.
+    info = probe_image(image_path)
+    gray = load_grayscale(image_path, max_dim=ANALYSIS_MAX_DIM, info=info)
     h, w = gray.shape
 
     # Detect curvature using text line analysis
-    curvature_result = detect_curvature_lines(gray)
+    curvature_result = detect_curvature_lines(gray, AnalysisContext(gray))
 
-    needs_dewarp = (
-        curvature_result['score'] >= min_curvature and
-        PAGE_DEWARP_AVAILABLE
-    )
+    needs_dewarp = curvature_result['score'] >= min_curvature
 
     return DewarpResult(
         needs_dewarp=needs_dewarp,
         curvature_score=curvature_result['score'],
         confidence=curvature_result['confidence'],
         method_used='text_line_curvature',
-        tool_available=PAGE_DEWARP_AVAILABLE,
+        tool_available=True,
         debug={
             'curvature_score': curvature_result['score'],
             'num_lines_analyzed': curvature_result['num_lines'],
             'avg_curvature': curvature_result['avg_curvature'],
             'max_curvature': curvature_result['max_curvature'],
             'min_curvature_threshold': min_curvature,
-            'page_dewarp_available': PAGE_DEWARP_AVAILABLE,
-            'image_size': {'width': w, 'height': h},
+            'image_size': {'width': info.width, 'height': info.height},
+            'analysis_size': {'width': w, 'height': h},
         }
     )
 
 
-def detect_curvature_lines(gray: np.ndarray) -> dict:
+@timed
+def detect_curvature_lines(gray: np.ndarray, ctx: Optional[AnalysisContext] = None) -> dict:
     """
     Detect page curvature by analyzing text line bending.
 
     Args:
         gray: Grayscale image
+        ctx: Shared analysis context for `gray` (built if omitted)
 
     Returns:
         Dictionary with curvature analysis results
@@ -98,14 +101,18 @@ def detect_curvature_lines(gray: np.ndarray) -> dict:
     h, w = gray.shape
 
     # Threshold to get binary image
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if ctx is None:
+        ctx = AnalysisContext(gray)
+    binary = ctx.binary(None)
 
     # Morphological operations to connect text into lines
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (w // 20, 1))
-    dilated = cv2.dilate(binary, kernel, iterations=1)
+    with span('cv2.dilate'):
+        dilated = cv2.dilate(binary, kernel, iterations=1)
 
     # Find contours (text lines)
-    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    with span('cv2.findContours'):
+        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     # Filter for likely text lines (wide, not too tall)
     text_lines = []
@@ -179,12 +186,190 @@ def detect_curvature_lines(gray: np.ndarray) -> dict:
     }
 
 
+@timed
+def _fit_text_lines(ctx: AnalysisContext) -> list[tuple[np.ndarray, float, int, int]]:
+    """
+    Fit a quadratic centre line to every text line at analysis resolution.
+
+    Returns:
+        List of (polynomial coefficients, mean y, x start, x end), in
+        analysis-scale pixels
+    """
+    binary = ctx.binary()
+    h, w = binary.shape[:2]
+
+    # Same line model as detect_curvature_lines: horizontal dilation merges words into lines.
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(1, w // 20), 1))
+    with span('cv2.dilate'):
+        dilated = cv2.dilate(binary, kernel, iterations=1)
+    with span('cv2.connectedComponentsWithStats'):
+        n, labels, stats, _ = cv2.connectedComponentsWithStats(dilated, connectivity=8)
+    if n <= 1:
+        return []
+
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    keep = (widths > w * 0.3) & (heights < h * 0.1)
+    keep[0] = False
+    if int(keep.sum()) < MIN_FIELD_LINES:
+        return []
+
+    # Per (line, column) centroid of ink pixels, for all lines at once.
+    ys, xs = np.nonzero(binary)
+    lab = labels[ys, xs]
+    sel = keep[lab]
+    ys, xs, lab = ys[sel], xs[sel], lab[sel]
+    key = lab.astype(np.int64) * w + xs
+    size = int(n) * w
+    counts = np.bincount(key, minlength=size).reshape(n, w)
+    sums = np.bincount(key, weights=ys, minlength=size).reshape(n, w)
+
+    lines = []
+    for k in np.flatnonzero(keep):
+        cols = np.flatnonzero(counts[k])
+        if cols.size < 10:
+            continue
+        centre = sums[k, cols] / counts[k, cols]
+        try:
+            coeffs = np.polyfit(cols.astype(np.float64), centre, 2)
+        except (ValueError, np.linalg.LinAlgError):
+            continue
+        lines.append((coeffs, float(np.mean(centre)), int(cols[0]), int(cols[-1])))
+    return lines
+
+
+@timed
+def compute_dewarp_field(ctx: AnalysisContext) -> Optional[Tuple[np.ndarray, dict]]:
+    """
+    Build a vertical displacement field that straightens curved text lines.
+
+    For each output row y and column x, the field gives the source row offset:
+    the page is corrected by sampling source pixel (x, y + field[y, x]). Lines
+    are pulled onto their mean height; rows between lines interpolate
+    linearly, rows outside the text block reuse the nearest line.
+
+    Args:
+        ctx: Analysis context of the page
+
+    Returns:
+        (field, info) with the field at analysis resolution in full-resolution
+        pixels, or None when too few text lines were found
+    """
+    lines = _fit_text_lines(ctx)
+    if len(lines) < MIN_FIELD_LINES:
+        return None
+
+    h, w = ctx.small.shape[:2]
+    lines.sort(key=lambda line: line[1])
+    xs = np.arange(w, dtype=np.float64)
+
+    # Displacement of each line along the full width (held flat beyond its ends).
+    disp = np.empty((len(lines), w), dtype=np.float64)
+    centres = np.empty(len(lines), dtype=np.float64)
+    for i, (coeffs, mean_y, x0, x1) in enumerate(lines):
+        disp[i] = np.polyval(coeffs, np.clip(xs, x0, x1)) - mean_y
+        centres[i] = mean_y
+
+    # Row interpolation weights depend only on the line centres, so the whole
+    # field is one gather + blend instead of a per-column interpolation.
+    rows = np.arange(h, dtype=np.float64)
+    hi = np.clip(np.searchsorted(centres, rows), 1, len(lines) - 1)
+    lo = hi - 1
+    row_span = np.maximum(centres[hi] - centres[lo], 1e-6)
+    t = np.clip((rows - centres[lo]) / row_span, 0.0, 1.0)[:, None]
+    field = (1.0 - t) * disp[lo] + t * disp[hi]
+
+    field = cv2.GaussianBlur(field.astype(np.float32), (0, 0), sigmaX=max(1.0, w / 100))
+    field /= float(ctx.scale)
+
+    info = {
+        'num_lines': len(lines),
+        'max_displacement': float(np.abs(field).max()),
+    }
+    return field, info
+
+
+@timed
+def remap_with_field(image: np.ndarray, field: np.ndarray) -> np.ndarray:
+    """
+    Resample a page with a vertical displacement field.
+
+    The field is upscaled to full resolution strip by strip so the float maps
+    never cover the whole page at once.
+
+    Args:
+        image: Full-resolution page
+        field: Displacement field from `compute_dewarp_field`
+
+    Returns:
+        Dewarped page (same size as `image`)
+    """
+    h, w = image.shape[:2]
+    fh, fw = field.shape[:2]
+    out = np.empty_like(image)
+    background = (255, 255, 255) if image.ndim == 3 else 255
+    map_x_row = np.arange(w, dtype=np.float32)
+
+    # Full-res pixel (x, y) samples field at ((x + 0.5) * fw / w - 0.5, ...), i.e.
+    # the same pixel-centre convention as cv2.resize with INTER_LINEAR.
+    fx = np.clip((map_x_row + 0.5) * (fw / w) - 0.5, 0, fw - 1).astype(np.float32)
+
+    for y0 in range(0, h, REMAP_STRIP_ROWS):
+        y1 = min(h, y0 + REMAP_STRIP_ROWS)
+        rows = np.arange(y0, y1, dtype=np.float32)
+        fy = np.clip((rows + 0.5) * (fh / h) - 0.5, 0, fh - 1).astype(np.float32)
+        grid_x, grid_y = np.meshgrid(fx, fy)
+        dy = cv2.remap(field, grid_x, grid_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+        map_y = dy
+        map_y += rows[:, None]
+        map_x = np.broadcast_to(map_x_row, map_y.shape).copy()
+        with span('cv2.remap'):
+            out[y0:y1] = cv2.remap(
+                image,
+                map_x,
+                map_y,
+                cv2.INTER_CUBIC,
+                borderMode=cv2.BORDER_CONSTANT,
+                borderValue=background,
+            )
+    return out
+
+
+@timed
+def dewarp_array(
+    image: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
+) -> Tuple[np.ndarray, dict]:
+    """
+    Dewarp a page held in memory.
+
+    Args:
+        image: Input image (BGR or grayscale)
+        ctx: Shared analysis context for `image` (built if omitted)
+
+    Returns:
+        (dewarped image, info); the input is returned unchanged with
+        info['dewarp_applied'] False when no usable text lines were found
+    """
+    if ctx is None:
+        ctx = AnalysisContext(image)
+
+    fitted = compute_dewarp_field(ctx)
+    if fitted is None:
+        return image, {'dewarp_applied': False, 'reason': 'not enough text lines'}
+
+    field, info = fitted
+    return remap_with_field(image, field), {'dewarp_applied': True, **info}
+
+
+@timed
 def apply_dewarp(
     image_path: str,
     output_path: str,
 ) -> dict:
     """
-    Apply dewarping to image using page_dewarp library.
+    Apply dewarping to an image.
 
     Args:
         image_path: Path to input image
@@ -193,72 +378,24 @@ def apply_dewarp(
     Returns:
         Result dictionary with output path and metadata
     """
-    image = load_image(image_path)
+    image, color_mode = load_native(image_path)
     h, w = image.shape[:2]
 
-    if not PAGE_DEWARP_AVAILABLE:
-        # Fallback: copy original
-        saved_path = save_image(image, output_path)
-        return {
-            'success': True,
-            'output_path': saved_path,
-            'dewarp_applied': False,
-            'reason': 'page_dewarp library not available',
-            'original_size': {'width': w, 'height': h},
-            'output_size': {'width': w, 'height': h},
-        }
-
-    # page-dewarp works on files, so we need temp files
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Save input image
-        input_temp = os.path.join(tmpdir, "input.png")
-        cv2.imwrite(input_temp, image)
-
-        try:
-            # Run page-dewarp
-            pd_dewarp(input_temp)
-
-            # Check for output files (page-dewarp creates various suffixed files)
-            possible_outputs = [
-                os.path.join(tmpdir, "input_thresh.png"),
-                os.path.join(tmpdir, "input_dewarped.png"),
-                os.path.join(tmpdir, "input.png"),  # Sometimes overwrites
-            ]
-
-            result_image = None
-            for output_temp in possible_outputs:
-                if os.path.exists(output_temp) and output_temp != input_temp:
-                    result_image = cv2.imread(output_temp)
-                    if result_image is not None:
-                        break
-
-            if result_image is None:
-                # Dewarping didn't produce output, use original
-                result_image = image
-                dewarp_applied = False
-                reason = 'page_dewarp produced no output'
-            else:
-                dewarp_applied = True
-                reason = None
-
-        except Exception as e:
-            # Dewarping failed, use original
-            result_image = image
-            dewarp_applied = False
-            reason = f'page_dewarp failed: {str(e)}'
+    try:
+        result_image, info = dewarp_array(image)
+        if color_mode == 'bitonal' and result_image is not image:
+            result_image = rebinarize(result_image)
+    except Exception as e:
+        # Dewarping failed, use original
+        result_image, info = image, {'dewarp_applied': False, 'reason': f'dewarp failed: {str(e)}'}
 
     new_h, new_w = result_image.shape[:2]
-    saved_path = save_image(result_image, output_path)
+    saved_path = save_image(result_image, output_path, bilevel=color_mode == 'bitonal')
 
-    result = {
+    return {
         'success': True,
         'output_path': saved_path,
-        'dewarp_applied': dewarp_applied,
+        **info,
         'original_size': {'width': w, 'height': h},
         'output_size': {'width': new_w, 'height': new_h},
     }
-
-    if reason:
-        result['reason'] = reason
-
-    return result
@@ -8,7 +8,10 @@ import cv2
 import numpy as np
 from typing import Tuple, Optional
 
+from .profiling import timed
 
+
+@timed
 def rotate_90(image: np.ndarray, times: int = 1) -> np.ndarray:
     """
     Rotate image by 90 degree increments.
@@ -34,6 +37,7 @@ def rotate_90(image: np.ndarray, times: int = 1) -> np.ndarray:
     return image
 
 
+@timed
 def rotate_angle(
     image: np.ndarray,
     angle: float,
@@ -91,10 +95,12 @@ def rotate_angle(
     return rotated
 
 
+@timed
 def split_horizontal(
     image: np.ndarray,
     position: float = 0.5,
     overlap: int = 0,
+    copy: bool = False,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """
     Split image horizontally into left and right halves.
@@ -103,9 +109,10 @@ def split_horizontal(
         image: Input image
         position: Split position (0-1 normalized, default 0.5 = center)
         overlap: Pixels to include from each side of split
+        copy: Return independent arrays instead of views of `image`
 
     Returns:
-        Tuple of (left_image, right_image)
+        Tuple of (left_image, right_image), views of `image` unless `copy`
     """
     h, w = image.shape[:2]
     split_x = int(w * position)
@@ -113,16 +120,20 @@ def split_horizontal(
     left_end = min(split_x + overlap, w)
     right_start = max(split_x - overlap, 0)
 
-    left = image[:, :left_end].copy()
-    right = image[:, right_start:].copy()
+    left = image[:, :left_end]
+    right = image[:, right_start:]
+    if copy:
+        return left.copy(), right.copy()
 
     return left, right
 
 
+@timed
 def split_vertical(
     image: np.ndarray,
     position: float = 0.5,
     overlap: int = 0,
+    copy: bool = False,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """
     Split image vertically into top and bottom halves.
@@ -131,9 +142,10 @@ def split_vertical(
         image: Input image
         position: Split position (0-1 normalized, default 0.5 = center)
         overlap: Pixels to include from each side of split
+        copy: Return independent arrays instead of views of `image`
 
     Returns:
-        Tuple of (top_image, bottom_image)
+        Tuple of (top_image, bottom_image), views of `image` unless `copy`
     """
     h, w = image.shape[:2]
     split_y = int(h * position)
@@ -141,8 +153,10 @@ def split_vertical(
     top_end = min(split_y + overlap, h)
     bottom_start = max(split_y - overlap, 0)
 
-    top = image[:top_end, :].copy()
-    bottom = image[bottom_start:, :].copy()
+    top = image[:top_end, :]
+    bottom = image[bottom_start:, :]
+    if copy:
+        return top.copy(), bottom.copy()
 
     return top, bottom
 
@@ -280,6 +294,7 @@ def order_points(pts: np.ndarray) -> np.ndarray:
     return rect
 
 
+@timed
 def perspective_transform(
     image: np.ndarray,
     src_points: np.ndarray,
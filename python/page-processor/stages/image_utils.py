@@ -7,12 +7,30 @@ and are collected here to avoid duplication.
 
 import cv2
 import numpy as np
+from typing import Optional
+
+from .profiling import span
+
+# Longest side (px) of the raster most detectors analyse.
+ANALYSIS_MAX_DIM = 1500
 
 
 def _to_gray(image: np.ndarray) -> np.ndarray:
     """Return a single-channel grayscale image."""
     if len(image.shape) == 3:
-        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        with span('cv2.cvtColor'):
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def rebinarize(image: np.ndarray) -> np.ndarray:
+    """
+    Snap a resampled bitonal image back to pure black/white (in place).
+
+    Bitonal pages are warped with the usual interpolation and thresholded
+    afterwards, which keeps glyph edges smoother than nearest-neighbour.
+    """
+    cv2.threshold(image, 127, 255, cv2.THRESH_BINARY, dst=image)
     return image
 
 
@@ -30,7 +48,8 @@ def _resize_for_analysis(gray: np.ndarray, max_dim: int = 1500) -> tuple[np.ndar
     scale = max_dim / float(max(h, w))
     new_w = max(1, int(round(w * scale)))
     new_h = max(1, int(round(h * scale)))
-    resized = cv2.resize(gray, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    with span('cv2.resize'):
+        resized = cv2.resize(gray, (new_w, new_h), interpolation=cv2.INTER_AREA)
     return resized, scale
 
 
@@ -41,3 +60,184 @@ def _smooth_1d(values: np.ndarray, kernel_size: int) -> np.ndarray:
     if k % 2 == 0:
         k += 1
     return cv2.GaussianBlur(values.reshape(1, -1).astype(np.float32), (k, 1), 0).reshape(-1)
+
+
+def hough_line_stats(
+    lines: Optional[np.ndarray],
+    max_angle: float = 15.0,
+    std_scale: float = 5.0,
+    count_scale: float = 20.0,
+) -> dict:
+    """
+    Length-weighted angle statistics of near-horizontal line segments.
+
+    All segments are processed as arrays (no per-segment Python work), so
+    text-dense pages with thousands of HoughLinesP segments stay cheap.
+
+    Args:
+        lines: Output of cv2.HoughLinesP (any shape reshapeable to (N, 4)), or None
+        max_angle: Segments steeper than this (degrees) are ignored
+        std_scale: Angle std (degrees) at which consistency reaches zero
+        count_scale: Number of kept segments that gives full count confidence
+
+    Returns:
+        Dictionary with angle (weighted mean segment angle in image
+        coordinates, i.e. the correction angle for a CCW-positive rotation),
+        confidence, lines_count (kept segments), angle_std and
+        total_lines (all segments)
+    """
+    if lines is None or len(lines) == 0:
+        return {'angle': 0.0, 'confidence': 0.0, 'lines_count': 0, 'angle_std': 0.0, 'total_lines': 0}
+
+    seg = np.asarray(lines).reshape(-1, 4).astype(np.float64)
+    dx = seg[:, 2] - seg[:, 0]
+    dy = seg[:, 3] - seg[:, 1]
+    angles = np.degrees(np.arctan2(dy, dx))
+
+    # Skip vertical segments and keep near-horizontal ones (likely text lines).
+    keep = (np.abs(dx) >= 1.0) & (np.abs(angles) <= max_angle)
+    n = int(np.count_nonzero(keep))
+    if n == 0:
+        return {'angle': 0.0, 'confidence': 0.0, 'lines_count': 0, 'angle_std': 0.0, 'total_lines': len(seg)}
+
+    angles = angles[keep]
+    lengths = np.hypot(dx[keep], dy[keep])
+
+    total_length = float(lengths.sum())
+    if total_length <= 0:
+        angle = float(np.median(angles))
+    else:
+        angle = float(np.dot(angles, lengths) / total_length)
+
+    angle_std = float(np.std(angles)) if n > 1 else 0.0
+    consistency = max(0.0, 1.0 - angle_std / std_scale)
+    count_score = min(1.0, n / count_scale)
+    confidence = consistency * 0.7 + count_score * 0.3
+
+    return {
+        'angle': angle,
+        'confidence': float(confidence),
+        'lines_count': n,
+        'angle_std': angle_std,
+        'total_lines': len(seg),
+    }
+
+
+class AnalysisContext:
+    """
+    Per-image cache of the derived rasters detectors share.
+
+    Built once per image and passed to every detector, so the grayscale
+    conversion, downscales, Otsu binarization and Canny edges are computed once
+    instead of once per detector. Everything is lazy and memoized.
+
+    Levels are addressed by `max_dim` (longest side in px); `None` means full
+    resolution. Arrays created here are read-only: copy before modifying.
+
+    With `keep_full_gray=False` (very large scans) levels are downscaled from
+    the colour image directly instead of from a cached full-resolution gray
+    image, which would cost a third of a frame. They can differ from the
+    default levels by one gray level of rounding.
+    """
+
+    def __init__(self, image: np.ndarray, keep_full_gray: bool = True):
+        self.image = image
+        self.keep_full_gray = keep_full_gray
+        self._gray: Optional[np.ndarray] = None
+        self._levels: dict[int, tuple[np.ndarray, float]] = {}
+        self._binary: dict[Optional[int], np.ndarray] = {}
+        self._edges: dict[Optional[int], np.ndarray] = {}
+
+    @property
+    def height(self) -> int:
+        return int(self.image.shape[0])
+
+    @property
+    def width(self) -> int:
+        return int(self.image.shape[1])
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Full-resolution grayscale image."""
+        if self._gray is None:
+            self._gray = self._freeze(_to_gray(self.image))
+        return self._gray
+
+    def level(self, max_dim: Optional[int] = ANALYSIS_MAX_DIM) -> tuple[np.ndarray, float]:
+        """
+        Grayscale pyramid level whose longest side is at most `max_dim`.
+
+        Returns (gray, scale) with the same meaning as `_resize_for_analysis`.
+        Smaller levels are derived from the nearest larger cached level.
+        """
+        if max_dim is None or max(self.height, self.width) <= max_dim:
+            return self.gray, 1.0
+
+        max_dim = int(max_dim)
+        cached = self._levels.get(max_dim)
+        if cached is not None:
+            return cached
+
+        # Downscale from the closest larger level we already have (INTER_AREA either way).
+        larger = [d for d in self._levels if d > max_dim]
+        if larger:
+            source, source_scale = self._levels[min(larger)]
+        elif self._gray is None and not self.keep_full_gray:
+            # Downscale the colour image first, so no full-resolution gray buffer exists.
+            resized, rel_scale = _resize_for_analysis(self.image, max_dim=max_dim)
+            entry = (self._freeze(_to_gray(resized)), rel_scale)
+            self._levels[max_dim] = entry
+            return entry
+        else:
+            source, source_scale = self.gray, 1.0
+
+        resized, rel_scale = _resize_for_analysis(source, max_dim=max_dim)
+        entry = (self._freeze(resized), source_scale * rel_scale)
+        self._levels[max_dim] = entry
+        return entry
+
+    def binary(self, max_dim: Optional[int] = ANALYSIS_MAX_DIM) -> np.ndarray:
+        """Inverted Otsu binarization (ink = 255) of a pyramid level."""
+        key = self._key(max_dim)
+        if key not in self._binary:
+            gray, _ = self.level(key)
+            with span('cv2.threshold'):
+                _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+            self._binary[key] = self._freeze(binary)
+        return self._binary[key]
+
+    def edges(self, max_dim: Optional[int] = ANALYSIS_MAX_DIM) -> np.ndarray:
+        """Canny edge map (50/150) of a pyramid level."""
+        key = self._key(max_dim)
+        if key not in self._edges:
+            gray, _ = self.level(key)
+            with span('cv2.Canny'):
+                self._edges[key] = self._freeze(cv2.Canny(gray, 50, 150))
+        return self._edges[key]
+
+    def buffers(self) -> list[np.ndarray]:
+        """The image and every raster cached so far (for memory accounting)."""
+        cached = [self._gray, *(level for level, _ in self._levels.values())]
+        return [self.image, *(a for a in cached if a is not None), *self._binary.values(), *self._edges.values()]
+
+    @property
+    def small(self) -> np.ndarray:
+        """Analysis-scale grayscale image."""
+        return self.level(ANALYSIS_MAX_DIM)[0]
+
+    @property
+    def scale(self) -> float:
+        """Scale of `small` relative to the full-resolution image."""
+        return self.level(ANALYSIS_MAX_DIM)[1]
+
+    def _key(self, max_dim: Optional[int]) -> Optional[int]:
+        # Levels that need no resize are the full-resolution image; share their cache entry.
+        if max_dim is None or max(self.height, self.width) <= max_dim:
+            return None
+        return int(max_dim)
+
+    def _freeze(self, arr: np.ndarray) -> np.ndarray:
+        # Never lock the caller's own array (e.g. a grayscale input passed through).
+        if arr is not self.image:
+            arr.flags.writeable = False
+        return arr
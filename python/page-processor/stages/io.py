@@ -2,22 +2,477 @@
 I/O utilities for stage processing.
 
 Provides consistent image loading and saving with proper error handling.
+
+Besides file paths, every loader and `save_image` accept raw buffer handles:
+`raw:` followed by a JSON header (inline, or the path of a .json file):
+
+    raw:{"storage": "shm", "name": "pp-page", "shape": [1600, 1200, 3],
+         "dtype": "uint8", "strides": [3600, 3, 1], "offset": 0, "channels": "rgb"}
+
+`storage` is "shm" (POSIX shared memory segment `name`) or "mmap" (file
+`path`). `strides` (bytes) default to C-contiguous and `channels` to gray/bgr/
+bgra by channel count. Raw pixels skip image codecs entirely, for interactive
+previews where the caller already holds decoded pixels.
+
+Ownership: buffers passed in stay the caller's (they are copied, never
+unlinked). Buffers written by `save_image` are handed over to the caller, who
+must unlink the segment / delete the file once it has read the pixels.
 """
 
 import cv2
 import numpy as np
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Optional, Tuple
 import json
+import os
+import secrets
 import sys
 
+from .image_utils import _resize_for_analysis
+from .profiling import timed
+
+# DCT-domain downscaled JPEG decodes, keyed by reduction factor.
+_REDUCED_GRAYSCALE = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+_REDUCED_COLOR = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+# EXIF orientation tag, and its values that turn the image by 90 degrees (5-8).
+EXIF_ORIENTATION = 0x0112
+_EXIF_TRANSPOSED = {5, 6, 7, 8}
+# Formats whose EXIF block precedes the pixel data.
+_EXIF_HEADER_FORMATS = ('JPEG', 'MPO', 'TIFF', 'WEBP')
 
-def load_image(image_path: str) -> np.ndarray:
+
+@dataclass
+class ImageInfo:
+    """Image properties read from the file header (no pixel decode)."""
+    width: int
+    height: int
+    format: str  # e.g. 'PNG', 'JPEG', 'TIFF'
+    mode: str  # PIL mode, e.g. '1', 'L', 'RGB'
+
+
+def _exif_orientation(img) -> Optional[int]:
+    """
+    EXIF orientation of an opened Pillow image, without decoding pixels.
+
+    JPEG, TIFF and WebP keep EXIF ahead of the pixel data, where `open` has
+    already read it. Elsewhere (PNG) `getexif` would load the whole image to
+    reach a trailing chunk, so only EXIF that `open` came across is used.
+    """
+    from PIL import Image  # type: ignore
+
+    if img.format in _EXIF_HEADER_FORMATS:
+        return img.getexif().get(EXIF_ORIENTATION)
+    raw = img.info.get('exif')
+    if not raw:
+        return None
+    exif = Image.Exif()
+    exif.load(raw)
+    return exif.get(EXIF_ORIENTATION)
+
+
+def probe_image(image_path: str) -> ImageInfo:
+    """
+    Read image dimensions and format from the file header.
+
+    Dimensions are those of the decoded pixels: swapped when the EXIF
+    orientation turns the image by 90 degrees, as decoding does.
+
+    Args:
+        image_path: Path to image file (or raw buffer handle)
+
+    Returns:
+        ImageInfo for the file
+
+    Raises:
+        ValueError: If the file is missing or not a readable image
+    """
+    # Pillow only parses the header on open; pixels are never decoded here.
+    if is_raw_handle(image_path):
+        header = parse_raw_handle(image_path)
+        if len(header.shape) < 2:
+            raise ValueError(f"Raw buffer header needs 'shape': {image_path}")
+        modes = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+        return ImageInfo(
+            width=header.shape[1],
+            height=header.shape[0],
+            format='RAW',
+            mode=modes[_RAW_CHANNELS.get(header.resolved_channels(), 1)],
+        )
+
+    from PIL import Image  # type: ignore
+
+    path = Path(image_path)
+    if not path.exists():
+        raise ValueError(f"Image file does not exist: {image_path}")
+
+    # Only the header is read, so Pillow's decompression-bomb guard (which warns
+    # above ~89 MP and refuses above ~179 MP) would just reject large scans.
+    bomb_limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        with Image.open(str(path)) as img:
+            width, height = img.size
+            # cv2.imread applies the EXIF orientation: report the size pixels decode to.
+            if _exif_orientation(img) in _EXIF_TRANSPOSED:
+                width, height = height, width
+            return ImageInfo(
+                width=int(width),
+                height=int(height),
+                format=str(img.format or ''),
+                mode=str(img.mode),
+            )
+    except Exception as e:
+        raise ValueError(f"Failed to read image header: {image_path}") from e
+    finally:
+        Image.MAX_IMAGE_PIXELS = bomb_limit
+
+
+def _reduction_factor(info: ImageInfo, max_dim: int) -> int:
+    """Largest JPEG DCT reduction (2/4/8) that still decodes at least `max_dim` px."""
+    longest = max(info.width, info.height)
+    for factor in (8, 4, 2):
+        if -(-longest // factor) >= max_dim:
+            return factor
+    return 1
+
+
+def _imread_full(path: Path, flags: int, info: Optional[ImageInfo] = None) -> Optional[np.ndarray]:
+    """
+    Decode an image at full resolution straight into a NumPy array.
+
+    Plain `cv2.imread` decodes into an OpenCV allocation that the Python
+    binding then copies, briefly holding the image twice. Where OpenCV has the
+    `imread(filename, dst, flags)` overload, decode into a preallocated array.
+    `info` is the file's probe_image result, when the caller already has it.
+    """
+    try:
+        info = info or probe_image(str(path))
+        shape = (info.height, info.width)
+        if flags != cv2.IMREAD_GRAYSCALE:
+            shape += (3,)
+        image = cv2.imread(str(path), np.empty(shape, dtype=np.uint8), flags)
+    except (ValueError, TypeError, cv2.error):
+        image = None  # Unknown header, or an OpenCV without the overload.
+
+    if image is None or image.size == 0:
+        image = cv2.imread(str(path), flags)
+    return image
+
+
+def _imread_reduced(
+    path: Path,
+    flags: int,
+    reduced_flags: dict,
+    max_dim: Optional[int],
+    info: Optional[ImageInfo] = None,
+) -> Optional[np.ndarray]:
+    """
+    Decode an image, downscaled so its longest side is at most `max_dim`.
+
+    JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale in the DCT domain (the
+    full raster is never materialized); other formats are decoded normally and
+    then area-downscaled. `info` is as for _imread_full.
+    """
+    if not max_dim:
+        return _imread_full(path, flags, info)
+
+    image = None
+    try:
+        info = info or probe_image(str(path))
+        factor = _reduction_factor(info, max_dim) if info.format == 'JPEG' else 1
+        if factor > 1:
+            image = cv2.imread(str(path), reduced_flags[factor])
+    except ValueError:
+        image = None
+
+    if image is None:
+        image = cv2.imread(str(path), flags)
+    if image is None:
+        return None
+
+    resized, _ = _resize_for_analysis(image, max_dim=max_dim)
+    return resized
+
+
+RAW_PREFIX = 'raw:'
+RAW_STORAGES = ('shm', 'mmap')
+
+# Channel layouts of raw buffers, by channel count (1 = 2-D array).
+_RAW_CHANNELS = {
+    'gray': 1,
+    'bgr': 3,
+    'rgb': 3,
+    'bgra': 4,
+    'rgba': 4,
+}
+_RAW_TO_BGR = {
+    'gray': cv2.COLOR_GRAY2BGR,
+    'rgb': cv2.COLOR_RGB2BGR,
+    'bgra': cv2.COLOR_BGRA2BGR,
+    'rgba': cv2.COLOR_RGBA2BGR,
+}
+_RAW_TO_GRAY = {
+    'bgr': cv2.COLOR_BGR2GRAY,
+    'rgb': cv2.COLOR_RGB2GRAY,
+    'bgra': cv2.COLOR_BGRA2GRAY,
+    'rgba': cv2.COLOR_RGBA2GRAY,
+}
+
+
+@dataclass
+class RawImageHeader:
+    """Location and layout of raw pixels in shared memory or a mapped file."""
+    storage: str  # 'shm' or 'mmap'
+    location: str = ''  # shm segment name or file path ('' = generate on write, shm only)
+    shape: Tuple[int, ...] = ()  # () for a write destination
+    dtype: str = 'uint8'
+    strides: Optional[Tuple[int, ...]] = None  # bytes; None = C-contiguous
+    offset: int = 0
+    channels: Optional[str] = None  # see _RAW_CHANNELS; None = by channel count
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RawImageHeader':
+        storage = data.get('storage')
+        if storage not in RAW_STORAGES:
+            raise ValueError(f"Raw storage must be one of {RAW_STORAGES}, got {storage!r}")
+        location = data.get('name' if storage == 'shm' else 'path') or ''
+        strides = data.get('strides')
+        channels = data.get('channels')
+        if channels is not None and channels not in _RAW_CHANNELS:
+            raise ValueError(f"Unknown raw channel layout: {channels!r}")
+        return cls(
+            storage=storage,
+            location=str(location),
+            shape=tuple(int(n) for n in data.get('shape') or ()),
+            dtype=str(data.get('dtype') or 'uint8'),
+            strides=tuple(int(n) for n in strides) if strides else None,
+            offset=int(data.get('offset') or 0),
+            channels=channels,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'storage': self.storage,
+            'name' if self.storage == 'shm' else 'path': self.location,
+            'shape': list(self.shape),
+            'dtype': self.dtype,
+            'strides': list(self.resolved_strides()),
+            'offset': self.offset,
+            'channels': self.resolved_channels(),
+        }
+
+    def resolved_strides(self) -> Tuple[int, ...]:
+        if self.strides is not None:
+            return self.strides
+        strides = []
+        step = np.dtype(self.dtype).itemsize
+        for n in reversed(self.shape):
+            strides.append(step)
+            step *= n
+        return tuple(reversed(strides))
+
+    def resolved_channels(self) -> str:
+        if self.channels:
+            return self.channels
+        depth = self.shape[2] if len(self.shape) == 3 else 1
+        return {1: 'gray', 3: 'bgr', 4: 'bgra'}.get(depth, 'gray')
+
+    def describe(self, image: np.ndarray) -> 'RawImageHeader':
+        """Header for writing `image` contiguously at this header's location."""
+        location = self.location
+        if not location:
+            if self.storage != 'shm':
+                raise ValueError("Raw mmap output needs a 'path'")
+            location = f"pp-{secrets.token_hex(8)}"
+        header = replace(
+            self,
+            location=location,
+            shape=tuple(int(n) for n in image.shape),
+            dtype=str(image.dtype),
+            strides=None,
+            offset=0,
+            channels=None,
+        )
+        header.strides = header.resolved_strides()
+        header.channels = header.resolved_channels()
+        return header
+
+
+def is_raw_handle(image_path: str) -> bool:
+    """True if `image_path` is a `raw:` buffer handle rather than a file path."""
+    return isinstance(image_path, str) and image_path.startswith(RAW_PREFIX)
+
+
+def parse_raw_handle(handle: str) -> RawImageHeader:
+    """
+    Parse a `raw:` handle (inline JSON header or path to a JSON header file).
+
+    Raises:
+        ValueError: If the handle or its header is invalid
+    """
+    body = handle[len(RAW_PREFIX):].strip()
+    try:
+        if body.startswith('{'):
+            data = json.loads(body)
+        else:
+            with open(body, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Invalid raw buffer header: {handle}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Invalid raw buffer header: {handle}")
+    return RawImageHeader.from_dict(data)
+
+
+def raw_handle(header: RawImageHeader) -> str:
+    """Inline `raw:` handle string for a header."""
+    return RAW_PREFIX + json.dumps(header.to_dict(), separators=(',', ':'))
+
+
+def _open_shm(name: str, create: bool = False, size: int = 0):
+    """
+    Open a POSIX shared memory segment without handing it to the resource tracker.
+
+    Python's tracker unlinks tracked segments when this process exits; that
+    would destroy the caller's input and the outputs we hand over.
+    """
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:
+        pass  # Python < 3.13: no `track`, unregister by hand.
+
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    if os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def read_raw(header: RawImageHeader) -> np.ndarray:
+    """
+    Copy the pixels described by `header` into a new array.
+
+    The buffer itself is only read; it stays open/mapped just for the copy.
+
+    Raises:
+        ValueError: If the buffer is missing or smaller than the header says
+    """
+    if not header.shape or not header.location:
+        raise ValueError("Raw buffer header needs 'shape' and a name/path")
+    dtype = np.dtype(header.dtype)
+    strides = header.resolved_strides()
+    if len(strides) != len(header.shape) or any(st < 0 for st in strides) or header.offset < 0:
+        raise ValueError("Raw buffer strides/offset must be non-negative and match the shape")
+    required = header.offset + dtype.itemsize + sum((n - 1) * st for n, st in zip(header.shape, strides))
+
+    if header.storage == 'shm':
+        try:
+            shm = _open_shm(header.location)
+        except FileNotFoundError as e:
+            raise ValueError(f"Shared memory segment does not exist: {header.location}") from e
+        try:
+            if shm.size < required:
+                raise ValueError(f"Shared memory segment too small: {header.location}")
+            view = np.ndarray(header.shape, dtype, buffer=shm.buf, offset=header.offset, strides=strides)
+            image = view.copy()
+            del view  # release the export so the segment can be closed
+        finally:
+            shm.close()
+        return image
+
+    path = Path(header.location)
+    if not path.exists():
+        raise ValueError(f"Raw image file does not exist: {header.location}")
+    if path.stat().st_size < required:
+        raise ValueError(f"Raw image file too small: {header.location}")
+    mapped = np.memmap(str(path), dtype=np.uint8, mode='r')
+    view = np.ndarray(header.shape, dtype, buffer=mapped, offset=header.offset, strides=strides)
+    return view.copy()
+
+
+def write_raw(image: np.ndarray, header: RawImageHeader) -> RawImageHeader:
+    """
+    Write `image` contiguously to a new shm segment / file.
+
+    Args:
+        image: Pixels to write
+        header: Destination (storage and optional name/path)
+
+    Returns:
+        The complete header of the written buffer (ownership passes to the caller)
+    """
+    header = header.describe(image)
+    data = np.ascontiguousarray(image)
+
+    if header.storage == 'shm':
+        if os.name != 'posix':
+            # Windows segments die with their last handle, i.e. when we exit.
+            raise ValueError("Raw shm output needs POSIX shared memory; use mmap storage")
+        shm = _open_shm(header.location, create=True, size=max(1, data.nbytes))
+        try:
+            target = np.ndarray(data.shape, data.dtype, buffer=shm.buf)
+            target[...] = data
+            del target
+        finally:
+            shm.close()
+        return header
+
+    path = Path(header.location)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data.tofile(str(path))
+    return header
+
+
+def _load_raw(image_path: str, conversions: dict, target: str) -> np.ndarray:
+    """Read a raw handle and convert its channels to `target` ('bgr' or 'gray')."""
+    header = parse_raw_handle(image_path)
+    image = read_raw(header)
+    if image.dtype != np.uint8:
+        raise ValueError(f"Raw image must be uint8, got {image.dtype}: {image_path}")
+
+    channels = header.resolved_channels()
+    if image.ndim == 3 and image.shape[2] == 1:
+        image = image[:, :, 0]
+    depth = image.shape[2] if image.ndim == 3 else 1
+    if image.ndim not in (2, 3) or _RAW_CHANNELS[channels] != depth:
+        raise ValueError(f"Raw image shape {image.shape} does not match channels '{channels}'")
+
+    if channels == target:
+        return image
+    return cv2.cvtColor(image, conversions[channels])
+
+
+def image_stem(image_path: str) -> str:
+    """Base name for outputs derived from an input path or raw handle."""
+    if is_raw_handle(image_path):
+        location = parse_raw_handle(image_path).location
+        return Path(location).stem or 'page'
+    return Path(image_path).stem
+
+
+@timed
+def load_image(image_path: str, max_dim: Optional[int] = None, info: Optional[ImageInfo] = None) -> np.ndarray:
     """
     Load an image from disk.
 
     Args:
-        image_path: Path to image file (PNG, JPEG, TIFF, etc.)
+        image_path: Path to image file (PNG, JPEG, TIFF, etc.) or raw buffer handle
+        max_dim: If set, decode downscaled to at most this many px on the
+                 longest side (detection-only callers)
+        info: The file's probe_image result, if already read (saves a probe)
 
     Returns:
         Image as numpy array in BGR format
@@ -25,12 +480,16 @@ def load_image(image_path: str) -> np.ndarray:
     Raises:
         ValueError: If image cannot be loaded
     """
+    if is_raw_handle(image_path):
+        image = _load_raw(image_path, _RAW_TO_BGR, 'bgr')
+        return _resize_for_analysis(image, max_dim=max_dim)[0] if max_dim else image
+
     path = Path(image_path)
 
     if not path.exists():
         raise ValueError(f"Image file does not exist: {image_path}")
 
-    image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    image = _imread_reduced(path, cv2.IMREAD_COLOR, _REDUCED_COLOR, max_dim, info)
 
     if image is None:
         raise ValueError(f"Failed to load image: {image_path}")
@@ -38,12 +497,16 @@ def load_image(image_path: str) -> np.ndarray:
     return image
 
 
-def load_grayscale(image_path: str) -> np.ndarray:
+@timed
+def load_grayscale(image_path: str, max_dim: Optional[int] = None, info: Optional[ImageInfo] = None) -> np.ndarray:
     """
     Load an image as grayscale.
 
     Args:
-        image_path: Path to image file
+        image_path: Path to image file or raw buffer handle
+        max_dim: If set, decode downscaled to at most this many px on the
+                 longest side (detection-only callers)
+        info: The file's probe_image result, if already read (saves a probe)
 
     Returns:
         Image as numpy array in grayscale
@@ -51,12 +514,16 @@ def load_grayscale(image_path: str) -> np.ndarray:
     Raises:
         ValueError: If image cannot be loaded
     """
+    if is_raw_handle(image_path):
+        image = _load_raw(image_path, _RAW_TO_GRAY, 'gray')
+        return _resize_for_analysis(image, max_dim=max_dim)[0] if max_dim else image
+
     path = Path(image_path)
 
     if not path.exists():
         raise ValueError(f"Image file does not exist: {image_path}")
 
-    image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    image = _imread_reduced(path, cv2.IMREAD_GRAYSCALE, _REDUCED_GRAYSCALE, max_dim, info)
 
     if image is None:
         raise ValueError(f"Failed to load image: {image_path}")
@@ -64,25 +531,74 @@ def load_grayscale(image_path: str) -> np.ndarray:
     return image
 
 
+# Pillow modes of single-channel sources (with alpha dropped, which white-on-transparent
+# scans do not use).
+_GRAY_MODES = {'1', 'L', 'LA', 'I', 'I;16', 'I;16B', 'I;16L'}
+
+
+def _is_bilevel(gray: np.ndarray) -> bool:
+    """True if a grayscale image holds only 0 and 255."""
+    return cv2.countNonZero(cv2.inRange(gray, 1, 254)) == 0
+
+
+@timed
+def load_native(image_path: str) -> Tuple[np.ndarray, str]:
+    """
+    Load an image for the processing pipeline in its own channel count.
+
+    Args:
+        image_path: Path to image file or raw buffer handle
+
+    Returns:
+        Tuple of (image, color_mode):
+        - 'bitonal': single-channel uint8 holding only 0 and 255 (1-bit
+          sources, and grayscale sources that contain only black and white)
+        - 'gray': single-channel uint8
+        - 'color': BGR
+
+    Raises:
+        ValueError: If image cannot be loaded
+    """
+    info = None
+    if is_raw_handle(image_path):
+        single_channel = parse_raw_handle(image_path).resolved_channels() == 'gray'
+    else:
+        info = probe_image(image_path)
+        single_channel = info.mode in _GRAY_MODES
+
+    if not single_channel:
+        return load_image(image_path, info=info), 'color'
+
+    gray = load_grayscale(image_path, info=info)
+    return gray, 'bitonal' if _is_bilevel(gray) else 'gray'
+
+
+@timed
 def save_image(
     image: np.ndarray,
     output_path: str,
     quality: int = 95,
+    bilevel: bool = False,
 ) -> str:
     """
     Save an image to disk.
 
     Args:
         image: Image as numpy array
-        output_path: Path to save image
+        output_path: Path to save image, or a raw destination handle such as
+                     `raw:{"storage": "shm"}` (name generated if omitted)
         quality: JPEG quality (1-100) or PNG compression (0-9)
+        bilevel: Image is single-channel 0/255; write PNGs with 1 bit per pixel
 
     Returns:
-        Absolute path to saved image
+        Absolute path to saved image (complete raw handle for raw output)
 
     Raises:
         ValueError: If image cannot be saved
     """
+    if is_raw_handle(output_path):
+        return raw_handle(write_raw(image, parse_raw_handle(output_path)))
+
     path = Path(output_path)
 
     # Ensure parent directory exists
@@ -97,6 +613,8 @@ def save_image(
         # For PNG, quality is compression level (0-9)
         compression = min(9, max(0, 9 - quality // 10))
         params = [cv2.IMWRITE_PNG_COMPRESSION, compression]
+        if bilevel:
+            params += [cv2.IMWRITE_PNG_BILEVEL, 1]
     elif ext in ['.tif', '.tiff']:
         params = []
     else:
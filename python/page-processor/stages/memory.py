@@ -0,0 +1,210 @@
+"""
+Per-stage memory measurement.
+
+`MemoryProbe` splits a run into consecutive stages (`checkpoint`) and reports,
+for each, three views of memory:
+
+- peak_rss_mb: process RSS, sampled on a background thread while the stage
+  runs. This is the figure that matters for batch concurrency and the only one
+  that sees OpenCV's and the codecs' own buffers.
+- traced_peak_mb: tracemalloc's peak of Python and NumPy allocations during
+  the stage (NumPy reports its buffers to tracemalloc), temporaries included.
+- arrays_mb: bytes of the large buffers the caller still holds at the end of
+  the stage, each underlying buffer counted once however many views share it.
+
+Measuring is optional: tracemalloc slows down allocation-heavy Python code.
+"""
+
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Iterable, Optional
+
+import numpy as np
+
+MB = 1024 * 1024
+
+# RSS sampling period while a probe runs.
+SAMPLE_INTERVAL_S = 0.005
+
+
+def _statm_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _psutil_rss() -> Optional[int]:
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        return None
+    return int(psutil.Process().memory_info().rss)
+
+
+def _max_rss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        # Windows: no getrusage.
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def rss_reader():
+    """
+    Best available RSS source for this platform.
+
+    Returns:
+        (reader, name): `reader()` returns bytes; name is 'statm' (Linux),
+        'psutil', 'max_rss' (process high-water mark only: a stage's figure is
+        the highest RSS reached so far) or None when nothing is available
+    """
+    if _statm_rss() is not None:
+        return _statm_rss, "statm"
+    if _psutil_rss() is not None:
+        return _psutil_rss, "psutil"
+    if _max_rss() is not None:
+        return _max_rss, "max_rss"
+    return (lambda: None), None
+
+
+def buffer_bytes(arrays: Iterable) -> int:
+    """
+    Total size of the buffers behind `arrays`, counting shared buffers once.
+
+    Views (slices, reshapes, read-only wrappers) are traced back to the array
+    that owns the memory. None entries are skipped.
+    """
+    seen: set[int] = set()
+    total = 0
+    for arr in arrays:
+        if not isinstance(arr, np.ndarray):
+            continue
+        owner = arr
+        while isinstance(owner.base, np.ndarray):
+            owner = owner.base
+        if id(owner) in seen:
+            continue
+        seen.add(id(owner))
+        # A base that is not an array (mmap, shared memory) is only counted for the part viewed.
+        total += owner.nbytes if owner.base is None else arr.nbytes
+    return total
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / MB, 1) if value is not None else None
+
+
+class MemoryProbe:
+    """
+    Measures memory per stage of a run (see the module docstring).
+
+    Stages are consecutive: each `checkpoint` closes the stage that started at
+    the previous checkpoint (or at `start`). Probes must not overlap, since
+    tracemalloc's peak is process-wide.
+
+    Args:
+        interval: RSS sampling period in seconds
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self._read_rss, self.rss_source = rss_reader()
+        self._stages: dict[str, dict] = {}
+        self._baseline: Optional[int] = None
+        self._peak: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._owns_tracemalloc = False
+
+    def start(self) -> "MemoryProbe":
+        """Start tracing and sampling; the first stage begins now."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._baseline = self._peak = self._read_rss()
+        if self.rss_source in ("statm", "psutil"):
+            self._thread = threading.Thread(target=self._sample, name="memory-probe", daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = self._read_rss()
+            with self._lock:
+                if rss is not None and (self._peak is None or rss > self._peak):
+                    self._peak = rss
+
+    def checkpoint(self, stage: str, arrays: Iterable = ()):
+        """
+        Close the current stage and start the next one.
+
+        Args:
+            stage: Name of the stage that just ended (repeated names keep the
+                   highest figures)
+            arrays: Large buffers still held at this point (for arrays_mb)
+        """
+        rss = self._read_rss()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            samples = [p for p in (self._peak, rss) if p is not None]
+            peak = max(samples) if samples else None
+            # The next stage starts from the current RSS, not from this stage's peak.
+            self._peak = rss
+        tracemalloc.reset_peak()
+
+        entry = {
+            "peak_rss_mb": _mb(peak),
+            "rss_mb": _mb(rss),
+            "traced_peak_mb": _mb(traced_peak),
+            "arrays_mb": _mb(buffer_bytes(arrays)),
+        }
+        previous = self._stages.get(stage)
+        if previous is not None:
+            for key, value in previous.items():
+                if value is not None and (entry[key] is None or value > entry[key]):
+                    entry[key] = value
+        self._stages[stage] = entry
+
+    def stop(self):
+        """Stop sampling (and tracemalloc, if this probe started it)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def report(self) -> dict:
+        """
+        Per-stage figures and the stage with the highest RSS.
+
+        Returns:
+            {"rss_source", "baseline_rss_mb", "peak_rss_mb", "peak_stage",
+            "stages": {name: {"peak_rss_mb", "rss_mb", "traced_peak_mb", "arrays_mb"}}}
+        """
+        peaks = {name: s["peak_rss_mb"] for name, s in self._stages.items() if s["peak_rss_mb"] is not None}
+        peak_stage = max(peaks, key=peaks.get) if peaks else None
+        return {
+            "rss_source": self.rss_source,
+            "baseline_rss_mb": _mb(self._baseline),
+            "peak_rss_mb": peaks[peak_stage] if peak_stage else None,
+            "peak_stage": peak_stage,
+            "stages": self._stages,
+        }
+
+    def __enter__(self) -> "MemoryProbe":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -0,0 +1,178 @@
+"""
+Profiling spans shared by the stages, the detectors and the CLI commands.
+
+`span(name)` times a block and `@timed` times a function. A span opened while
+another is running becomes its child, so one command yields a tree such as
+command -> stage -> sub-step -> OpenCV call. Spans with the same name under the
+same parent are merged (time summed, calls counted), which keeps loops from
+growing the tree.
+
+Nothing is recorded unless a `Profile` is active in the current context: outside
+the CLI (library use, worker processes, writer threads) a span costs one
+context-variable lookup. The CLI runs every command inside a Profile and adds
+its `timings` to the result; with `--profile` it also runs cProfile and writes
+the .pstats file plus the full span tree.
+"""
+
+import functools
+import json
+import os
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+# Innermost open span of the active Profile (None = not profiling).
+_current: ContextVar[Optional["Span"]] = ContextVar("page_processor_span", default=None)
+
+_NOT_RECORDING = nullcontext()
+
+
+class Span:
+    """One node of the span tree: total time and call count of a named block."""
+
+    __slots__ = ("name", "ms", "calls", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ms = 0.0
+        self.calls = 0
+        self.children: dict[str, "Span"] = {}
+
+    def child(self, name: str) -> "Span":
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = Span(name)
+        return node
+
+    def to_dict(self) -> dict:
+        """Nested JSON form: {"name", "ms", "calls", "children"}."""
+        return {
+            "name": self.name,
+            "ms": round(self.ms, 3),
+            "calls": self.calls,
+            "children": [c.to_dict() for c in self.children.values()],
+        }
+
+    def flatten(self, prefix: str = "") -> dict[str, float]:
+        """Milliseconds per descendant, keyed by slash-separated path."""
+        flat = {}
+        for c in self.children.values():
+            path = f"{prefix}{c.name}"
+            flat[path] = round(c.ms, 2)
+            flat.update(c.flatten(path + "/"))
+        return flat
+
+
+class _SpanTimer:
+    __slots__ = ("node", "token", "start")
+
+    def __init__(self, node: Span):
+        self.node = node
+
+    def __enter__(self):
+        self.token = _current.set(self.node)
+        self.start = time.perf_counter()
+        return self.node
+
+    def __exit__(self, *exc):
+        self.node.ms += (time.perf_counter() - self.start) * 1000.0
+        self.node.calls += 1
+        _current.reset(self.token)
+        return False
+
+
+def span(name: str):
+    """
+    Context manager timing a block as a child of the current span.
+
+    Args:
+        name: Span name; OpenCV calls are named after the function ('cv2.Canny')
+
+    Returns:
+        A context manager (a no-op when no Profile is active)
+    """
+    parent = _current.get()
+    if parent is None:
+        return _NOT_RECORDING
+    return _SpanTimer(parent.child(name))
+
+
+def timed(fn: Callable) -> Callable:
+    """Decorator: run every call of `fn` in a span named after the function."""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        parent = _current.get()
+        if parent is None:
+            return fn(*args, **kwargs)
+        with _SpanTimer(parent.child(name)):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def profile_paths(path: str) -> tuple[str, str]:
+    """(.pstats path, .spans.json path) for a `--profile` argument."""
+    stem = path[:-len(".pstats")] if path.endswith(".pstats") else path
+    return stem + ".pstats", stem + ".spans.json"
+
+
+class Profile:
+    """
+    Records the span tree of everything run inside it (a context manager).
+
+    Args:
+        name: Name of the root span (the command)
+        cprofile: Also run cProfile over the block (see `dump`)
+    """
+
+    def __init__(self, name: str, cprofile: bool = False):
+        self.root = Span(name)
+        self._profiler = None
+        if cprofile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+        self._token = None
+        self._start = 0.0
+
+    def __enter__(self) -> "Profile":
+        self._token = _current.set(self.root)
+        self._start = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiler is not None:
+            self._profiler.disable()
+        self.root.ms += (time.perf_counter() - self._start) * 1000.0
+        self.root.calls += 1
+        _current.reset(self._token)
+        return False
+
+    def timings(self) -> dict:
+        """Result payload: total and per-span milliseconds (flattened tree paths)."""
+        return {"total_ms": round(self.root.ms, 2), "spans": self.root.flatten()}
+
+    def dump(self, path: str) -> dict:
+        """
+        Write the cProfile stats and the span tree.
+
+        Args:
+            path: `--profile` argument; '.pstats' is appended unless present and
+                  the span tree goes next to it as '.spans.json'
+
+        Returns:
+            {"pstats": path or None (cProfile not enabled), "spans": path}
+        """
+        pstats_path, spans_path = profile_paths(path)
+        os.makedirs(os.path.dirname(os.path.abspath(spans_path)), exist_ok=True)
+        if self._profiler is not None:
+            self._profiler.dump_stats(pstats_path)
+        else:
+            pstats_path = None
+        with open(spans_path, "w", encoding="utf-8") as f:
+            json.dump(self.root.to_dict(), f, indent=2)
+        return {"pstats": pstats_path, "spans": spans_path}
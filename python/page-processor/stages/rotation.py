@@ -2,16 +2,21 @@
 Stage 1: Rotation Detection and Correction
 
 Detects and corrects page orientation (0, 90, 180, 270 degrees).
-Uses text line orientation and edge analysis for robust detection.
+Text lines give both the axis (lines run along it) and the direction (lines
+start flush at one margin and end ragged at the other). Both are read from one
+binarization of a small pyramid level, moving to a larger level only when the
+evidence is ambiguous.
 """
 
 import cv2
 import numpy as np
 from dataclasses import dataclass, asdict
-from typing import Literal
+from typing import Literal, Optional
 
-from .io import load_image, load_grayscale, save_image
+from .io import load_grayscale, load_native, probe_image, save_image
 from .geometry import rotate_90
+from .image_utils import ANALYSIS_MAX_DIM, AnalysisContext
+from .profiling import span, timed
 
 
 TRotation = Literal[0, 90, 180, 270]
@@ -30,261 +35,302 @@ class RotationResult:
         return asdict(self)
 
 
+# Pyramid levels (longest side in px) tried in turn; None = the analysis image.
+# Detection stops at the first level whose evidence is decisive.
+ROTATION_LEVELS = (500, 1000, None)
+
+# Decisive evidence: strip-profile energy along the line axis vs across it, and
+# |edge asymmetry| (see _line_edge_asymmetry) over enough pairs of lines.
+AXIS_DECISIVE_RATIO = 2.0
+DIRECTION_DECISIVE = 0.2
+MIN_LINE_PAIRS = 8
+
+# Below this |edge asymmetry| both line ends are alike (justified, right-to-left
+# or centred text): the direction is left to detect_content_orientation.
+DIRECTION_MIN = 0.1
+
+# Below this axis ratio, and without enough line pairs, there are no text lines to go by.
+AXIS_MIN_RATIO = 1.2
+
+
+@timed
 def detect_rotation(image_path: str) -> RotationResult:
     """
-    Detect optimal rotation for correct page orientation.
+    Detect the rotation that brings the page upright.
 
-    Uses multiple methods:
-    1. Text line angle distribution
-    2. Edge orientation analysis
-    3. Aspect ratio heuristics
+    Runs `detect_text_orientation` on the pyramid levels in ROTATION_LEVELS,
+    stopping at the first decisive one. Pages with too few text lines, or
+    whose line ends are too alike (|edge asymmetry| below DIRECTION_MIN), to
+    tell the direction fall back to `detect_content_orientation`, with its
+    lower confidence.
 
     Args:
         image_path: Path to input image
 
     Returns:
-        RotationResult with detected rotation and confidence
+        RotationResult with the clockwise rotation to apply (see
+        apply_rotation) and its confidence
     """
-    gray = load_grayscale(image_path)
+    # Detection never needs the full raster; JPEGs decode directly at reduced size.
+    info = probe_image(image_path)
+    gray = load_grayscale(image_path, max_dim=ANALYSIS_MAX_DIM, info=info)
     h, w = gray.shape
-
-    # Method 1: Text line orientation
-    text_result = detect_text_orientation(gray)
-
-    # Method 2: Edge orientation
-    edge_result = detect_edge_orientation(gray)
-
-    # Method 3: Content distribution (for photos/illustrations)
-    content_result = detect_content_orientation(gray)
-
-    # Combine results with weighted voting
-    candidates = {
-        0: 0.0,
-        90: 0.0,
-        180: 0.0,
-        270: 0.0,
+    ctx = AnalysisContext(gray)
+
+    levels = []
+    text = None
+    for max_dim in ROTATION_LEVELS:
+        text = detect_text_orientation(gray, ctx, max_dim)
+        levels.append(text)
+        if text['decisive'] or max_dim is None or max(h, w) <= max_dim:
+            break
+
+    debug = {
+        'levels': levels,
+        'level': text['level'],
+        'image_size': {'width': info.width, 'height': info.height},
+        'analysis_size': {'width': w, 'height': h},
     }
 
-    # Weight: text > edge > content
-    weights = {'text': 0.5, 'edge': 0.3, 'content': 0.2}
-
-    for rotation, conf in text_result.items():
-        candidates[rotation] += conf * weights['text']
+    if text['axis_ratio'] < AXIS_MIN_RATIO and text['line_pairs'] < MIN_LINE_PAIRS:
+        # No line structure (blank page, photo): leave the page as it is.
+        return RotationResult(rotation=0, confidence=0.0, method_used='none', debug=debug)
 
-    for rotation, conf in edge_result.items():
-        candidates[rotation] += conf * weights['edge']
-
-    for rotation, conf in content_result.items():
-        candidates[rotation] += conf * weights['content']
-
-    # Find best rotation
-    best_rotation = max(candidates, key=candidates.get)
-    confidence = candidates[best_rotation]
-
-    # Determine which method contributed most
-    method_contributions = {
-        'text': text_result.get(best_rotation, 0) * weights['text'],
-        'edge': edge_result.get(best_rotation, 0) * weights['edge'],
-        'content': content_result.get(best_rotation, 0) * weights['content'],
-    }
-    method_used = max(method_contributions, key=method_contributions.get)
+    rotation = text['rotation']
+    confidence = text['confidence']
+    method_used = 'text'
+    if text['line_pairs'] < MIN_LINE_PAIRS or abs(text['edge_asymmetry']) < DIRECTION_MIN:
+        content = detect_content_orientation(gray, ctx, text['level'], text['horizontal'])
+        debug['content'] = content
+        rotation = content['rotation']
+        confidence = text['axis_confidence'] * content['confidence']
+        method_used = 'content'
 
     return RotationResult(
-        rotation=best_rotation,
-        confidence=min(1.0, confidence),
+        rotation=rotation,
+        confidence=round(confidence, 3),
         method_used=method_used,
-        debug={
-            'text_scores': text_result,
-            'edge_scores': edge_result,
-            'content_scores': content_result,
-            'combined_scores': candidates,
-            'image_size': {'width': w, 'height': h},
-        }
+        debug=debug,
     )
 
 
-def detect_text_orientation(gray: np.ndarray) -> dict:
+def _upright_lines(binary: np.ndarray, horizontal: bool) -> np.ndarray:
+    """`binary` with its text lines horizontal: as is, or turned 90 counterclockwise."""
+    return binary if horizontal else np.ascontiguousarray(np.rot90(binary))
+
+
+def _rotation_for(horizontal: bool, upright: bool) -> TRotation:
+    """
+    Clockwise correction for a page whose lines run `horizontal`ly (or not)
+    and read `upright` once turned as by _upright_lines.
     """
-    Detect orientation based on text line angles.
+    if horizontal:
+        return 0 if upright else 180
+    # Turning 90 counterclockwise made it upright: it was turned 90 clockwise.
+    return 270 if upright else 90
 
-    Horizontal text lines suggest correct orientation.
-    Vertical text lines suggest 90 or 270 rotation needed.
 
-    Returns:
-        Dictionary mapping rotation values to confidence scores
+@timed
+def _strip_profile_energy(binary: np.ndarray, strip: int, window: int) -> float:
     """
-    h, w = gray.shape
-    scores = {0: 0.0, 90: 0.0, 180: 0.0, 270: 0.0}
-
-    # Binarize image
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-
-    # Create horizontal and vertical kernels for line detection
-    kernel_h = cv2.getStructuringElement(cv2.MORPH_RECT, (w // 20, 1))
-    kernel_v = cv2.getStructuringElement(cv2.MORPH_RECT, (1, h // 20))
-
-    # Detect horizontal and vertical structures
-    horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel_h)
-    vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel_v)
-
-    h_count = np.sum(horizontal) / 255
-    v_count = np.sum(vertical) / 255
-
-    total = h_count + v_count
-    if total == 0:
-        return scores
-
-    h_ratio = h_count / total
-    v_ratio = v_count / total
-
-    # Horizontal text dominance suggests 0 or 180 rotation
-    if h_ratio > v_ratio:
-        # Need to distinguish between 0 and 180
-        top_half = binary[:h//2, :]
-        bottom_half = binary[h//2:, :]
-
-        top_content = np.sum(top_half)
-        bottom_content = np.sum(bottom_half)
-
-        if top_content >= bottom_content:
-            # More content at top - likely correct (0)
-            scores[0] = h_ratio
-            scores[180] = h_ratio * 0.3
-        else:
-            # More content at bottom - might be upside down
-            scores[180] = h_ratio * 0.7
-            scores[0] = h_ratio * 0.5
-    else:
-        # Vertical text dominance suggests 90 or 270 rotation
-        left_half = binary[:, :w//2]
-        right_half = binary[:, w//2:]
+    Row-profile energy of `binary` within vertical strips.
 
-        left_content = np.sum(left_half)
-        right_content = np.sum(right_half)
+    Each strip (`strip` px wide) is reduced to its ink fraction per row, and
+    the profile's local mean (over `window` rows) is subtracted, so that only
+    line-scale structure counts: a gutter shadow or a block of dense text does
+    not. Horizontal text lines give a strong profile in every strip; strips
+    are narrow enough that skew does not blur lines into each other.
+    """
+    h, w = binary.shape
+    n = w // strip
+    if n == 0 or h < 3:
+        return 0.0
+    strips = binary[:, :n * strip].reshape(h, n, strip)
+    profiles = strips.mean(axis=2, dtype=np.float32) / np.float32(255.0)
+    profiles -= cv2.blur(profiles, (1, window), borderType=cv2.BORDER_REFLECT)
+    return float(np.mean(profiles * profiles))
+
+
+@timed
+def _line_edge_asymmetry(lines: np.ndarray) -> tuple[float, int]:
+    """
+    How much more ragged line ends are than line starts.
 
-        if left_content >= right_content:
-            scores[270] = v_ratio
-            scores[90] = v_ratio * 0.3
-        else:
-            scores[90] = v_ratio
-            scores[270] = v_ratio * 0.3
+    Words of a line are merged into one component; each line is paired with
+    the next line below it in the same column, and the horizontal offsets of
+    their left and right ends compared. Left-to-right text starts flush at the
+    left margin (indents aside) and ends ragged, or at most as flush when
+    justified, with short last lines. Skew shifts both ends alike.
 
-    return scores
+    The cue assumes left-to-right text. Fully justified pages score near 0
+    (offsets under a line height are treated as noise); right-to-left pages
+    are ragged on the left and score like an upside-down page.
 
+    Args:
+        lines: Ink = 255, text lines horizontal
 
-def detect_edge_orientation(gray: np.ndarray) -> dict:
+    Returns:
+        (score, pairs): score in [-1, 1], positive when the ends on the right
+        are the ragged ones (page upright), negative when upside down
+    """
+    h, w = lines.shape
+    k = max(3, max(h, w) // 60)
+    with span('cv2.dilate'):
+        merged = cv2.dilate(lines, cv2.getStructuringElement(cv2.MORPH_RECT, (k, 1)))
+    with span('cv2.connectedComponentsWithStats'):
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(merged, connectivity=8)
+
+    stats, centroids = stats[1:], centroids[1:]
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    keep = (widths > w * 0.05) & (heights < h * 0.05) & (widths > 3 * heights)
+    if np.count_nonzero(keep) < 2:
+        return 0.0, 0
+
+    order = np.argsort(centroids[keep, 1])
+    x0 = stats[keep, cv2.CC_STAT_LEFT][order].astype(np.float32)
+    x1 = x0 + widths[keep][order]
+    cy = centroids[keep, 1][order]
+    heights = heights[keep][order]
+
+    left, right = [], []
+    for i in range(len(x0)):
+        for j in range(i + 1, min(len(x0), i + 8)):
+            if cy[j] - cy[i] > 3 * max(heights[i], heights[j]):
+                break
+            overlap = min(x1[i], x1[j]) - max(x0[i], x0[j])
+            if overlap > 0.5 * min(x1[i] - x0[i], x1[j] - x0[j]):
+                left.append(abs(x0[j] - x0[i]))
+                right.append(abs(x1[j] - x1[i]))
+                break
+    if not left:
+        return 0.0, 0
+
+    # Offsets beyond a few line heights (headings, paragraph ends) would dominate the mean.
+    cap = 4.0 * float(np.median(heights))
+    left_mean = float(np.minimum(left, cap).mean())
+    right_mean = float(np.minimum(right, cap).mean())
+    # Ends that differ by under a line height in total (glyph shapes, rounding) are
+    # equally flush, however lopsided their ratio.
+    total = max(left_mean + right_mean, float(np.median(heights)))
+    return ((right_mean - left_mean) / total if total > 0 else 0.0), len(left)
+
+
+@timed
+def detect_text_orientation(
+    gray: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
+    max_dim: Optional[int] = ROTATION_LEVELS[0],
+) -> dict:
     """
-    Detect orientation based on edge distribution.
+    Detect orientation from the text lines of one pyramid level.
+
+    The axis comes from strip profiles (`_strip_profile_energy`) taken along
+    rows and along columns, or, when those are close, from the orientation
+    in which more text lines form; the direction from `_line_edge_asymmetry`
+    on the same binarization turned so that lines run horizontally.
 
-    Documents typically have strong horizontal edges at top (header)
-    and bottom (footer/page number).
+    Args:
+        gray: Grayscale image
+        ctx: Shared analysis context for `gray` (built if omitted)
+        max_dim: Pyramid level (None = analysis image)
 
     Returns:
-        Dictionary mapping rotation values to confidence scores
+        {"rotation", "confidence", "axis_confidence", "decisive", "level",
+        "horizontal", "axis_ratio", "edge_asymmetry", "line_pairs"}
     """
-    h, w = gray.shape
-    scores = {0: 0.0, 90: 0.0, 180: 0.0, 270: 0.0}
-
-    # Detect edges
-    edges = cv2.Canny(gray, 50, 150)
-
-    # Calculate edge density in different regions
-    margin = int(min(h, w) * 0.1)  # 10% margin
-
-    top_region = edges[:margin, :]
-    bottom_region = edges[-margin:, :]
-    left_region = edges[:, :margin]
-    right_region = edges[:, -margin:]
-
-    top_density = np.sum(top_region) / (margin * w)
-    bottom_density = np.sum(bottom_region) / (margin * w)
-    left_density = np.sum(left_region) / (margin * h)
-    right_density = np.sum(right_region) / (margin * h)
-
-    # Normalize
-    max_density = max(top_density, bottom_density, left_density, right_density, 1)
-    top_density /= max_density
-    bottom_density /= max_density
-    left_density /= max_density
-    right_density /= max_density
-
-    # Strong top/bottom edges suggest horizontal orientation
-    h_strength = (top_density + bottom_density) / 2
-    v_strength = (left_density + right_density) / 2
-
-    if h_strength > v_strength:
-        # Horizontal edges dominant
-        if top_density >= bottom_density:
-            scores[0] = h_strength
-            scores[180] = h_strength * 0.4
-        else:
-            scores[180] = h_strength * 0.7
-            scores[0] = h_strength * 0.5
-    else:
-        # Vertical edges dominant
-        if left_density >= right_density:
-            scores[270] = v_strength
-            scores[90] = v_strength * 0.4
-        else:
-            scores[90] = v_strength * 0.7
-            scores[270] = v_strength * 0.5
+    if ctx is None:
+        ctx = AnalysisContext(gray)
+    binary = ctx.binary(max_dim)
+    h, w = binary.shape
+
+    # Strips of ~1/16 of the page keep skew drift (up to ~5 deg) within a line gap;
+    # the detrending window spans a few lines.
+    size = max(h, w)
+    strip = max(4, size // 16)
+    window = max(3, size // 50) | 1
+    along_rows = _strip_profile_energy(binary, strip, window)
+    along_cols = _strip_profile_energy(binary.T, strip, window)
+    horizontal = along_rows >= along_cols
+    low, high = sorted((along_rows, along_cols))
+    axis_ratio = high / low if low > 0 else (float('inf') if high > 0 else 1.0)
+
+    asymmetry, pairs = _line_edge_asymmetry(_upright_lines(binary, horizontal))
+    axis_conf = 1.0 - 1.0 / axis_ratio if axis_ratio > 1.0 else 0.0
+
+    if axis_ratio < AXIS_DECISIVE_RATIO:
+        # Weak profiles (a few lines, mixed content): the axis along which lines form wins.
+        other_asymmetry, other_pairs = _line_edge_asymmetry(_upright_lines(binary, not horizontal))
+        if other_pairs > pairs:
+            horizontal = not horizontal
+            asymmetry, pairs, other_pairs = other_asymmetry, other_pairs, pairs
+        if pairs:
+            axis_conf = max(axis_conf, (pairs - other_pairs) / (pairs + other_pairs))
+
+    # With no direction evidence (too few lines, or alike ends below the noise
+    # floor), 0 and 180 are a coin toss: confidence rests on the axis alone.
+    has_direction = pairs >= MIN_LINE_PAIRS and abs(asymmetry) >= DIRECTION_MIN
+    direction_conf = min(1.0, abs(asymmetry) / (2 * DIRECTION_DECISIVE)) if has_direction else 0.0
+    decisive = (
+        axis_ratio >= AXIS_DECISIVE_RATIO
+        and pairs >= MIN_LINE_PAIRS
+        and abs(asymmetry) >= DIRECTION_DECISIVE
+    )
 
-    return scores
+    return {
+        'rotation': _rotation_for(horizontal, asymmetry >= 0),
+        'confidence': round(axis_conf * (0.5 + 0.5 * direction_conf), 3),
+        'axis_confidence': round(axis_conf, 3),
+        'decisive': bool(decisive),
+        'level': max_dim,
+        'horizontal': bool(horizontal),
+        'axis_ratio': round(min(axis_ratio, 1e3), 3),
+        'edge_asymmetry': round(asymmetry, 3),
+        'line_pairs': pairs,
+    }
 
 
-def detect_content_orientation(gray: np.ndarray) -> dict:
+@timed
+def detect_content_orientation(
+    gray: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
+    max_dim: Optional[int] = ROTATION_LEVELS[0],
+    horizontal: bool = True,
+) -> dict:
     """
-    Detect orientation based on content distribution.
+    Detect direction from where the ink is, for pages with few text lines.
+
+    Most pages carry more content towards the top (titles, headings, text
+    ending before the page does) than towards the bottom.
 
-    Most documents have more content at top (title/header) than bottom.
+    Args:
+        gray: Grayscale image
+        ctx: Shared analysis context for `gray` (built if omitted)
+        max_dim: Pyramid level (None = analysis image)
+        horizontal: Whether the page's lines run along rows
 
     Returns:
-        Dictionary mapping rotation values to confidence scores
+        {"rotation", "confidence", "balance"} with balance in [-1, 1],
+        positive when the upper half holds more ink
     """
-    h, w = gray.shape
-    scores = {0: 0.0, 90: 0.0, 180: 0.0, 270: 0.0}
-
-    # Binarize
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-
-    # Divide into quadrants
-    top_half = binary[:h//2, :]
-    bottom_half = binary[h//2:, :]
-    left_half = binary[:, :w//2]
-    right_half = binary[:, w//2:]
-
-    top_content = np.sum(top_half) / (h * w // 2)
-    bottom_content = np.sum(bottom_half) / (h * w // 2)
-    left_content = np.sum(left_half) / (h * w // 2)
-    right_content = np.sum(right_half) / (h * w // 2)
-
-    # Normalize
-    max_content = max(top_content, bottom_content, left_content, right_content, 1)
-    top_content /= max_content
-    bottom_content /= max_content
-    left_content /= max_content
-    right_content /= max_content
-
-    # Determine primary axis and direction
-    h_diff = abs(top_content - bottom_content)
-    v_diff = abs(left_content - right_content)
-
-    if h_diff >= v_diff:
-        # Horizontal content difference
-        if top_content >= bottom_content:
-            scores[0] = h_diff
-        else:
-            scores[180] = h_diff
-    else:
-        # Vertical content difference
-        if left_content >= right_content:
-            scores[270] = v_diff
-        else:
-            scores[90] = v_diff
+    if ctx is None:
+        ctx = AnalysisContext(gray)
+    lines = _upright_lines(ctx.binary(max_dim), horizontal)
+    half = lines.shape[0] // 2
+    top = cv2.countNonZero(lines[:half])
+    bottom = cv2.countNonZero(lines[lines.shape[0] - half:])
+    total = top + bottom
+    balance = (top - bottom) / total if total else 0.0
 
-    return scores
+    return {
+        'rotation': _rotation_for(horizontal, balance >= 0),
+        # At best a weak cue: capped well below what text lines give.
+        'confidence': round(min(0.5, abs(balance)), 3),
+        'balance': round(balance, 3),
+    }
 
 
+@timed
 def apply_rotation(
     image_path: str,
     output_path: str,
@@ -301,7 +347,7 @@ def apply_rotation(
     Returns:
         Result dictionary with output path and metadata
     """
-    image = load_image(image_path)
+    image, color_mode = load_native(image_path)
     h, w = image.shape[:2]
 
     if rotation == 0:
@@ -311,7 +357,7 @@ def apply_rotation(
         rotated = rotate_90(image, times)
 
     new_h, new_w = rotated.shape[:2]
-    saved_path = save_image(rotated, output_path)
+    saved_path = save_image(rotated, output_path, bilevel=color_mode == 'bitonal')
 
     return {
         'success': True,
@@ -16,8 +16,10 @@ import numpy as np
 from dataclasses import dataclass, asdict
 from typing import Literal, Optional, Tuple, List
 
-from .io import load_image, load_grayscale, save_image
+from .io import load_grayscale, load_native, probe_image, save_image
 from .geometry import split_horizontal, split_vertical
+from .image_utils import ANALYSIS_MAX_DIM, AnalysisContext
+from .profiling import timed
 
 
 TSplitType = Literal['none', 'vertical', 'horizontal']
@@ -59,6 +61,7 @@ class SymmetryResult:
     position: float
 
 
+@timed
 def detect_split(
     image_path: str,
     min_confidence: float = 0.6,
@@ -79,9 +82,12 @@ def detect_split(
     Returns:
         SplitResult with detection results and confidence
     """
-    gray = load_grayscale(image_path)
+    # Detection never needs the full raster; JPEGs decode directly at reduced size.
+    info = probe_image(image_path)
+    gray = load_grayscale(image_path, max_dim=ANALYSIS_MAX_DIM, info=info)
     h, w = gray.shape
-    aspect_ratio = w / h
+    aspect_ratio = info.width / info.height
+    ctx = AnalysisContext(gray)
 
     # Method 1: Aspect ratio (weak indicator only)
     # Book spreads are typically 1.15-1.8 wide
@@ -96,7 +102,7 @@ def detect_split(
     gutter_result = detect_gutter_shadow(gray)
 
     # Method 4: Content symmetry
-    symmetry_result = detect_content_symmetry(gray)
+    symmetry_result = detect_content_symmetry(gray, ctx)
 
     # Combine results with weighted voting
     # Weights: valley > gutter > symmetry > aspect
@@ -115,7 +121,7 @@ def detect_split(
     ]
 
     # Calculate total weighted confidence
-    total_confidence = sum(m[1] * weights[m[0]] for m in methods)
+    total_confidence = float(sum(m[1] * weights[m[0]] for m in methods))
 
     # Find best position estimate from methods with confidence > 0.3
     position_votes = [
@@ -127,7 +133,7 @@ def detect_split(
     if position_votes:
         total_weight = sum(w for _, w in position_votes)
         if total_weight > 0:
-            weighted_position = sum(p * w for p, w in position_votes) / total_weight
+            weighted_position = float(sum(p * w for p, w in position_votes) / total_weight)
         else:
             weighted_position = 0.5
     else:
@@ -137,7 +143,7 @@ def detect_split(
     method_scores = {m[0]: m[1] * weights[m[0]] for m in methods}
     best_method = max(method_scores, key=method_scores.get)
 
-    should_split = total_confidence >= min_confidence
+    should_split = bool(total_confidence >= min_confidence)
 
     return SplitResult(
         should_split=should_split,
@@ -156,11 +162,13 @@ def detect_split(
             'symmetry_position': symmetry_result.position,
             'method_scores': method_scores,
             'position_votes': [(p, w) for p, w in position_votes],
-            'image_size': {'width': w, 'height': h},
+            'image_size': {'width': info.width, 'height': info.height},
+            'analysis_size': {'width': w, 'height': h},
         }
     )
 
 
+@timed
 def detect_vertical_valley(gray: np.ndarray) -> ValleyResult:
     """
     Detect valley (minimum) in vertical projection profile.
@@ -221,9 +229,10 @@ def detect_vertical_valley(gray: np.ndarray) -> ValleyResult:
     # Scale so 50% depth = 100% confidence
     confidence = min(1.0, valley_depth * 2)
 
-    return ValleyResult(confidence=confidence, position=global_position)
+    return ValleyResult(confidence=float(confidence), position=float(global_position))
 
 
+@timed
 def detect_gutter_shadow(gray: np.ndarray) -> GutterResult:
     """
     Detect gutter shadow - the dark vertical band where book binding creates shadow.
@@ -276,10 +285,14 @@ def detect_gutter_shadow(gray: np.ndarray) -> GutterResult:
     # Convert to global position
     global_position = (center_start + min_pos) / w
 
-    return GutterResult(confidence=confidence, position=global_position)
+    return GutterResult(confidence=float(confidence), position=float(global_position))
 
 
-def detect_content_symmetry(gray: np.ndarray) -> SymmetryResult:
+@timed
+def detect_content_symmetry(
+    gray: np.ndarray,
+    ctx: Optional[AnalysisContext] = None,
+) -> SymmetryResult:
     """
     Detect if image has two symmetric content regions (left/right pages).
 
@@ -287,6 +300,7 @@ def detect_content_symmetry(gray: np.ndarray) -> SymmetryResult:
 
     Args:
         gray: Grayscale image
+        ctx: Shared analysis context for `gray` (built if omitted)
 
     Returns:
         SymmetryResult with confidence and position (always 0.5 for symmetry)
@@ -294,7 +308,9 @@ def detect_content_symmetry(gray: np.ndarray) -> SymmetryResult:
     h, w = gray.shape
 
     # Threshold to binary
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if ctx is None:
+        ctx = AnalysisContext(gray)
+    binary = ctx.binary(None)
 
     # Find content bounding boxes on left and right halves
     left_half = binary[:, :w//2]
@@ -337,7 +353,7 @@ def detect_content_symmetry(gray: np.ndarray) -> SymmetryResult:
 
     confidence = (alignment_score * 0.4 + height_score * 0.3 + width_score * 0.3)
 
-    return SymmetryResult(confidence=confidence, position=0.5)
+    return SymmetryResult(confidence=float(confidence), position=0.5)
 
 
 def find_content_bounds(binary: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
@@ -358,6 +374,7 @@ def find_content_bounds(binary: np.ndarray) -> Optional[Tuple[int, int, int, int
     return cv2.boundingRect(coords)
 
 
+@timed
 def apply_split(
     image_path: str,
     output_dir: str,
@@ -380,7 +397,8 @@ def apply_split(
     """
     from pathlib import Path
 
-    image = load_image(image_path)
+    image, color_mode = load_native(image_path)
+    bilevel = color_mode == 'bitonal'
     h, w = image.shape[:2]
 
     output_dir_path = Path(output_dir)
@@ -391,7 +409,7 @@ def apply_split(
     if split_type == 'none':
         # No split - just copy
         output_path = output_dir_path / f"{input_stem}.png"
-        saved_path = save_image(image, str(output_path))
+        saved_path = save_image(image, str(output_path), bilevel=bilevel)
 
         return {
             'success': True,
@@ -409,8 +427,8 @@ def apply_split(
         left_path = output_dir_path / f"{input_stem}_1.png"
         right_path = output_dir_path / f"{input_stem}_2.png"
 
-        left_saved = save_image(left, str(left_path))
-        right_saved = save_image(right, str(right_path))
+        left_saved = save_image(left, str(left_path), bilevel=bilevel)
+        right_saved = save_image(right, str(right_path), bilevel=bilevel)
 
         return {
             'success': True,
@@ -434,8 +452,8 @@ def apply_split(
         top_path = output_dir_path / f"{input_stem}_1.png"
         bottom_path = output_dir_path / f"{input_stem}_2.png"
 
-        top_saved = save_image(top, str(top_path))
-        bottom_saved = save_image(bottom, str(bottom_path))
+        top_saved = save_image(top, str(top_path), bilevel=bilevel)
+        bottom_saved = save_image(bottom, str(bottom_path), bilevel=bilevel)
 
         return {
             'success': True,
@@ -0,0 +1,215 @@
+"""
+Background Page Writer
+
+Encodes and writes output pages on a small thread pool so PNG encoding overlaps
+with rendering the next page (or processing the next input).
+
+cv2.imwrite releases the GIL while encoding, so writer threads run in parallel
+with NumPy/OpenCV work on the main thread. The pool is bounded: `submit` blocks
+while too many pages are queued, which caps the memory held by pending pages.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Optional
+
+import cv2
+import numpy as np
+
+from png_stream import write_png_strips
+from stages.io import is_raw_handle, parse_raw_handle, write_raw
+
+
+def png_compression_level() -> int:
+    """PNG compression from PAGE_PROCESSOR_PNG_COMPRESSION (0-9, default 1)."""
+    # PNG compression is lossless; lower values speed up saves dramatically on large pages.
+    try:
+        level = int(os.environ.get("PAGE_PROCESSOR_PNG_COMPRESSION", "1"))
+    except Exception:
+        level = 1
+    return max(0, min(9, level))
+
+
+class PageWriter:
+    """
+    Bounded thread pool that writes page images.
+
+    Args:
+        max_workers: Encoder threads
+        max_pending: Pages queued or being written before `submit` blocks
+        png_compression: PNG compression level (default: from environment)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 4,
+        png_compression: Optional[int] = None,
+    ):
+        self.png_compression = png_compression_level() if png_compression is None else int(png_compression)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="page-writer")
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+
+    def _write(self, page: np.ndarray, path: str, bilevel: bool) -> dict:
+        try:
+            t0 = time.monotonic()
+            if is_raw_handle(path):
+                write_raw(page, parse_raw_handle(path))
+                ok = True
+            else:
+                params = [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+                if bilevel:
+                    params += [cv2.IMWRITE_PNG_BILEVEL, 1]
+                ok = cv2.imwrite(path, page, params)
+            if not ok:
+                raise IOError(f"Failed to write image: {path}")
+            done = time.monotonic()
+            return {"path": path, "encode_ms": int((done - t0) * 1000), "done": done}
+        finally:
+            self._slots.release()
+
+    def submit(self, page: np.ndarray, path: str, bilevel: bool = False) -> Future:
+        """
+        Queue a page for writing (blocks while the queue is full).
+
+        `path` may be a complete raw handle (see stages.io) to write raw pixels
+        instead of a PNG. `bilevel` writes a single-channel 0/255 page as a
+        1-bit PNG.
+
+        The page must not be modified until the returned future completes.
+
+        Returns:
+            Future resolving to {"path", "encode_ms", "done"} (`done` is a
+            time.monotonic() timestamp); raises on write failure
+        """
+        self._slots.acquire()
+        try:
+            return self._pool.submit(self._write, page, path, bilevel)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _write_strips(
+        self,
+        strips: Callable[[], Iterable[np.ndarray]],
+        size: tuple,
+        path: str,
+        bilevel: bool,
+    ) -> dict:
+        try:
+            t0 = time.monotonic()
+            width, height, channels = size
+            write_png_strips(path, width, height, channels, strips(), self.png_compression, bilevel=bilevel)
+            done = time.monotonic()
+            return {"path": path, "encode_ms": int((done - t0) * 1000), "done": done}
+        finally:
+            self._slots.release()
+
+    def submit_strips(
+        self,
+        strips: Callable[[], Iterable[np.ndarray]],
+        width: int,
+        height: int,
+        channels: int,
+        path: str,
+        bilevel: bool = False,
+    ) -> Future:
+        """
+        Queue a PNG that is rendered and encoded strip by strip on the writer thread.
+
+        Args:
+            strips: Zero-argument callable returning the strips, top to bottom
+            width: Image width
+            height: Image height
+            channels: 1, 3 or 4
+            path: Output PNG path
+            bilevel: Write a 1-bit PNG (single-channel 0/255 strips)
+
+        Returns:
+            Future like `submit`'s; `encode_ms` includes rendering the strips
+        """
+        self._slots.acquire()
+        try:
+            return self._pool.submit(self._write_strips, strips, (width, height, channels), path, bilevel)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def close(self):
+        """Wait for queued writes and stop the threads."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PendingPage:
+    """
+    A processed page whose outputs may still be being written.
+
+    `wait()` blocks until every output is on disk, reports one "saved"
+    progress event per file (on the calling thread) and returns the final
+    result with save timings filled in. A memory probe, if given, gets its
+    "save" checkpoint once the outputs are written.
+    """
+
+    def __init__(
+        self,
+        result: dict,
+        writes: list[Future],
+        progress_callback: Optional[Callable[[dict], None]] = None,
+        total_start: Optional[float] = None,
+        save_start: Optional[float] = None,
+        memory=None,
+    ):
+        self.result = result
+        self.writes = writes
+        self.progress_callback = progress_callback
+        self.total_start = total_start
+        self.save_start = save_start
+        self.memory = memory
+
+    def wait(self) -> dict:
+        """Wait for the outputs and return the completed result."""
+        wait_start = time.monotonic()
+        wait(self.writes)
+        if self.memory is not None:
+            self.memory.checkpoint("save")
+        timings = self.result.setdefault("timings_ms", {})
+
+        errors = []
+        encode_ms = []
+        finished = self.save_start or wait_start
+        for future in self.writes:
+            try:
+                info = future.result()
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            encode_ms.append(info["encode_ms"])
+            finished = max(finished, info["done"])
+            if self.progress_callback:
+                name = "raw buffer" if is_raw_handle(info["path"]) else os.path.basename(info["path"])
+                self.progress_callback({
+                    "stage": "saved",
+                    "message": f"Saved {name}",
+                    "output_path": info["path"],
+                })
+
+        # Measured to the last write, not to this call: a caller may wait late on purpose.
+        timings["save_wait"] = int((time.monotonic() - wait_start) * 1000)
+        timings["encode"] = encode_ms
+        if self.save_start is not None:
+            timings["save"] = int((finished - self.save_start) * 1000)
+        if self.total_start is not None:
+            timings["total"] = int((finished - self.total_start) * 1000)
+
+        if errors:
+            self.result["success"] = False
+            self.result["error"] = "; ".join(errors)
+        return self.result